@@ -2,14 +2,54 @@
 from flask import Flask, jsonify
 from flask_migrate import Migrate
 from flask_cors import CORS
-from app.database.db import get_database_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.database.db import get_database_url, get_engine_options, get_listen_url, get_replica_url
+from app.database.replica import init_read_replica, CONSISTENCY_HEADER
 from app.extensions import db
+from app.metrics import init_metrics
 from app.routes import register_routes
+from app.features.storage.infrastructure.storage_backend import init_storage
+from app.features.storage.infrastructure.metadata_cache import init_metadata_cache
+from app.features.storage.interfaces.cli import register_cli
+from app.features.storage.aplications.services.cleanup_services import init_reaper
 from pathlib import Path
 import os
 
 migrate = Migrate()
 
+# CORS (compartido con el modo ASGI, que atiende algunas rutas sin Flask)
+CORS_ORIGINS = [
+    "http://localhost:5173",
+    "http://127.0.0.1:5173",
+    "https://asvita-front.onrender.com",
+]
+CORS_METHODS = ["GET", "HEAD", "POST", "PATCH", "DELETE", "OPTIONS"]
+CORS_ALLOW_HEADERS = [
+    "Content-Type",
+    "Authorization",
+    "X-Fields",            # <- si lo usas
+    "Range",               # descargas parciales (visor PDF)
+    "If-Range",
+    "If-None-Match",
+    "If-Modified-Since",
+    "Upload-Offset",       # subidas reanudables
+    "Upload-Length",
+    CONSISTENCY_HEADER,    # read-your-writes con réplica
+]
+CORS_EXPOSE_HEADERS = [
+    "Content-Disposition",  # <- si devuelves descargas/streams
+    "Content-Range",
+    "Accept-Ranges",
+    "ETag",
+    "Last-Modified",
+    "Location",
+    "Upload-Offset",
+    "Upload-Length",
+    "Upload-Expires",
+    "X-Next-Cursor",       # listados paginados
+    CONSISTENCY_HEADER,
+]
+
 
 def create_app():
     app = Flask(__name__)
@@ -17,6 +57,16 @@ def create_app():
     # DB / Core
     app.config["SQLALCHEMY_DATABASE_URI"] = get_database_url()
     app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    # pool por proceso dimensionado a WEB_CONCURRENCY x THREADS (ver db.py)
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = get_engine_options()
+    # LISTEN necesita una sesión real de Postgres (no PgBouncer transaction)
+    app.config["DATABASE_LISTEN_URI"] = get_listen_url()
+    # réplica de lectura opcional (listados y descargas con @read_replica)
+    replica_url = get_replica_url()
+    if replica_url:
+        app.config["SQLALCHEMY_BINDS"] = {"replica": replica_url}
+    app.config["DB_REPLICA_MAX_LAG_SECONDS"] = float(os.getenv("DB_REPLICA_MAX_LAG_SECONDS", 5))
+    app.config["DB_REPLICA_CHECK_SECONDS"] = float(os.getenv("DB_REPLICA_CHECK_SECONDS", 1))
     app.config.setdefault("MAX_CONTENT_LENGTH", 32 * 1024 * 1024)
 
     # Uploads
@@ -25,42 +75,121 @@ def create_app():
         Path(app.instance_path) / "uploads")
     app.config["UPLOAD_FOLDER"] = upload_root
     Path(upload_root).mkdir(parents=True, exist_ok=True)
+    # tamaño de chunk para hash + escritura en streaming (bytes)
+    app.config["UPLOAD_CHUNK_SIZE"] = int(
+        os.getenv("UPLOAD_CHUNK_SIZE", 1024 * 1024))
+    # subidas en lote (muchos PDFs o un ZIP)
+    app.config["BATCH_MAX_ITEMS"] = int(os.getenv("BATCH_MAX_ITEMS", 1000))
+    app.config["BATCH_MAX_CONTENT_LENGTH"] = int(
+        os.getenv("BATCH_MAX_CONTENT_LENGTH", 512 * 1024 * 1024))
+    # subidas reanudables (create / PATCH chunk / HEAD offset / finalize)
+    app.config["RESUMABLE_MAX_SIZE"] = int(
+        os.getenv("RESUMABLE_MAX_SIZE", 1024 * 1024 * 1024))
+    app.config["RESUMABLE_TTL_SECONDS"] = int(
+        os.getenv("RESUMABLE_TTL_SECONDS", 24 * 3600))
+
+    # listados paginados por cursor (X-Next-Cursor) cuando el cliente manda
+    # ?limit=; el default aplica a un ?cursor= sin ?limit=
+    app.config["LIST_DEFAULT_LIMIT"] = int(os.getenv("LIST_DEFAULT_LIMIT", 500))
+    app.config["LIST_MAX_LIMIT"] = int(os.getenv("LIST_MAX_LIMIT", 2000))
+    # serializador precompilado para listados (mismo JSON que marshal de restx)
+    app.config["FAST_SERIALIZER"] = os.getenv("FAST_SERIALIZER", "0") == "1"
+
+    # Storage físico: "local" (UPLOAD_FOLDER) o "s3" (bucket S3-compatible)
+    app.config["STORAGE_BACKEND"] = os.getenv("STORAGE_BACKEND", "local")
+    app.config["UPLOAD_STAGING_DIR"] = os.getenv("UPLOAD_STAGING_DIR")
+    app.config["S3_BUCKET"] = os.getenv("S3_BUCKET")
+    app.config["S3_PREFIX"] = os.getenv("S3_PREFIX", "")
+    app.config["S3_ENDPOINT_URL"] = os.getenv("S3_ENDPOINT_URL")
+    app.config["S3_REGION"] = os.getenv("S3_REGION")
+    app.config["S3_MAX_POOL_CONNECTIONS"] = int(
+        os.getenv("S3_MAX_POOL_CONNECTIONS", 32))
+    app.config["S3_MULTIPART_CHUNK_SIZE"] = int(
+        os.getenv("S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024))
+    app.config["S3_PRESIGNED_DOWNLOADS"] = os.getenv(
+        "S3_PRESIGNED_DOWNLOADS", "1") == "1"
+    init_storage(app)
+
+    # Borrado físico en background (blobs sin referencias), por lotes
+    app.config["REAPER_ENABLED"] = os.getenv("REAPER_ENABLED", "1") == "1"
+    app.config["REAPER_BATCH_SIZE"] = int(os.getenv("REAPER_BATCH_SIZE", 500))
+    app.config["REAPER_INTERVAL_SECONDS"] = float(
+        os.getenv("REAPER_INTERVAL_SECONDS", 60))
+    init_reaper(app)
+
+    # Cache por proceso de metadata de datarooms/carpetas (0 = desactivada);
+    # con METADATA_CACHE_NOTIFY=1 las escrituras invalidan a los demás
+    # workers vía Postgres LISTEN/NOTIFY
+    app.config["METADATA_CACHE_SIZE"] = int(os.getenv("METADATA_CACHE_SIZE", 10000))
+    app.config["METADATA_CACHE_TTL_SECONDS"] = float(
+        os.getenv("METADATA_CACHE_TTL_SECONDS", 60))
+    app.config["METADATA_CACHE_NOTIFY"] = os.getenv("METADATA_CACHE_NOTIFY", "0") == "1"
+    init_metadata_cache(app)
+
+    # Búsqueda full-text: con SEARCH_EXTRACT_ENABLED=1 cada upload encola la
+    # extracción de texto. Apagado por defecto: sin un `flask worker` que vea
+    # los blobs los jobs solo se acumulan en failed
+    app.config["SEARCH_EXTRACT_ENABLED"] = os.getenv("SEARCH_EXTRACT_ENABLED", "0") == "1"
+    app.config["SEARCH_EXTRACT_BATCH_SIZE"] = int(os.getenv("SEARCH_EXTRACT_BATCH_SIZE", 20))
+    app.config["SEARCH_TEXT_CONFIG"] = os.getenv("SEARCH_TEXT_CONFIG", "simple")
+
+    # Miniaturas: con THUMBNAIL_ENQUEUE_ENABLED=1 cada upload encola la del
+    # tamaño por defecto (la genera el worker); sin él, o si el job no corrió,
+    # se renderiza en el request
+    app.config["THUMBNAIL_ENQUEUE_ENABLED"] = os.getenv("THUMBNAIL_ENQUEUE_ENABLED", "0") == "1"
+
+    # Cola de jobs en Postgres (`flask worker`); JOB_CONCURRENCY="tipo=n,..."
+    # pisa el límite global de jobs en curso por tipo
+    app.config["JOB_WORKER_PROCESSES"] = int(
+        os.getenv("JOB_WORKER_PROCESSES", os.cpu_count() or 2))
+    app.config["JOB_CONCURRENCY"] = os.getenv("JOB_CONCURRENCY", "")
+    app.config["JOB_POLL_INTERVAL_SECONDS"] = float(os.getenv("JOB_POLL_INTERVAL_SECONDS", 1))
+    app.config["JOB_LEASE_SECONDS"] = float(os.getenv("JOB_LEASE_SECONDS", 900))
+
+    # Descargas: "x-accel" (nginx), "x-sendfile" (Apache/lighttpd) o
+    # "sendfile" (sin proxy: gunicorn envía con os.sendfile vía wsgi.file_wrapper)
+    app.config["DOWNLOAD_OFFLOAD"] = os.getenv("DOWNLOAD_OFFLOAD", "sendfile").lower()
+    app.config["X_ACCEL_REDIRECT_PREFIX"] = os.getenv(
+        "X_ACCEL_REDIRECT_PREFIX", "/_protected_uploads/")
+
+    # Métricas Prometheus en /metrics (requiere prometheus_client) y log de
+    # requests lentos con sus consultas SQL (0 = desactivado)
+    app.config["METRICS_ENABLED"] = os.getenv("METRICS_ENABLED", "0") == "1"
+    app.config["METRICS_TOKEN"] = os.getenv("METRICS_TOKEN")
+    app.config["SLOW_REQUEST_MS"] = int(os.getenv("SLOW_REQUEST_MS", 1000))
+    app.config["SLOW_REQUEST_QUERIES"] = int(os.getenv("SLOW_REQUEST_QUERIES", 50))
 
     # Extensiones
     db.init_app(app)
-    from app.database.models import dataroom, folder, file, user, membership, audit_log  # noqa
+    init_read_replica(app)
+    from app.database.models import dataroom, folder, file, blob, user, membership, audit_log, upload_session, job  # noqa
     migrate.init_app(app, db)
 
     # CORS
     CORS(
         app,
-        resources={r"/api/*": {
-            "origins": [
-                "http://localhost:5173",
-                "http://127.0.0.1:5173",
-                "https://asvita-front.onrender.com",
-            ]
-        }},
-        methods=["GET", "POST", "PATCH", "DELETE", "OPTIONS"],
-        allow_headers=[
-            "Content-Type",
-            "Authorization",
-            "X-Fields",            # <- si lo usas
-        ],
-        expose_headers=[
-            "Content-Disposition",  # <- si devuelves descargas/streams
-        ],
+        resources={r"/api/*": {"origins": CORS_ORIGINS}},
+        methods=CORS_METHODS,
+        allow_headers=CORS_ALLOW_HEADERS,
+        expose_headers=CORS_EXPOSE_HEADERS,
         supports_credentials=False,
     )
 
-    # Rutas / Swagger (RESTX)
+    # Rutas / Swagger (RESTX) y comandos CLI
     register_routes(app)
+    register_cli(app)
+    init_metrics(app)
 
     # Errores JSON
     @app.errorhandler(ValueError)
     def handle_value_error(e):
         return jsonify({"error": str(e)}), 400
 
+    @app.errorhandler(PoolTimeoutError)
+    def handle_pool_timeout(e):
+        # pool agotado: fallar rápido en vez de colgar el hilo (DB_POOL_TIMEOUT)
+        return jsonify({"error": "database busy, retry"}), 503, {"Retry-After": "1"}
+
     @app.errorhandler(404)
     def handle_404(e):
         return jsonify({"error": "not found"}), 404
@@ -1,7 +1,10 @@
 from .dataroom import Dataroom
 from .folder import Folder
 from .file import File
+from .blob import Blob
 from .user import User
 from .membership import Membership
 from .audit_log import AuditLog
+from .upload_session import UploadSession
+from .job import Job
 from .mixins import TimestampMixin, SoftDeleteMixin
@@ -0,0 +1,31 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Text, Index, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import Mapped, mapped_column, deferred
+from app.extensions import db
+from .mixins import TimestampMixin, TableNameFromClassMixin
+
+
+class Blob(TimestampMixin, TableNameFromClassMixin, db.Model):
+    """Contenido físico deduplicado (content-addressed) por sha256, con conteo de referencias."""
+    checksum_sha256: Mapped[str] = mapped_column(String(64), primary_key=True)
+
+    # clave relativa al storage: blobs/ab/cd/<sha256>
+    storage_path: Mapped[str] = mapped_column(String(2048), nullable=False)
+    size_bytes: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # cuántas filas File apuntan a este blob; al llegar a 0 se borra del disco
+    ref_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+    # búsqueda full-text: se extrae una vez por contenido (no por File).
+    # text_extracted_at NULL = pendiente; con valor y sin vector = sin texto/ilegible
+    text_extracted_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    text_content: Mapped[str | None] = deferred(mapped_column(Text, nullable=True))
+    search_vector = deferred(mapped_column(TSVECTOR, nullable=True))
+
+    __table_args__ = (
+        Index("ix_blob_search_vector", "search_vector", postgresql_using="gin"),
+        # cola implícita de extracción: solo las filas pendientes
+        Index("ix_blob_text_pending", "checksum_sha256",
+              postgresql_where=text("text_extracted_at IS NULL")),
+    )
@@ -25,4 +25,6 @@ class Dataroom(UUIDPrimaryKeyMixin, TimestampMixin, TableNameFromClassMixin, db.
 
     __table_args__ = (
         Index("ix_dataroom_name", "name", postgresql_using="btree"),
+        # keyset de listados por fecha de creación
+        Index("ix_dataroom_created", "created_at", "id"),
     )
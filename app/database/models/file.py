@@ -1,4 +1,4 @@
-from sqlalchemy import String, Integer, ForeignKey, Index, UniqueConstraint
+from sqlalchemy import String, Integer, ForeignKey, Index, UniqueConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.extensions import db
 from .mixins import UUIDPrimaryKeyMixin, TimestampMixin, SoftDeleteMixin, TableNameFromClassMixin
@@ -42,4 +42,15 @@ class File(UUIDPrimaryKeyMixin, TimestampMixin, SoftDeleteMixin, TableNameFromCl
         # evita archivos con el mismo nombre en la misma carpeta
         UniqueConstraint("folder_id", "name", name="uq_file_name_per_folder"),
         Index("ix_file_dataroom_folder", "dataroom_id", "folder_id"),
+        # parciales: listado por carpeta (ordenado por nombre) y papelera
+        Index("ix_file_live_folder_name", "folder_id", "name",
+              postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_file_live_folder_created", "folder_id", "created_at", "id",
+              postgresql_where=text("deleted_at IS NULL")),
+        # búsqueda por nombre (LIKE '%x%', similitud) con pg_trgm
+        Index("ix_file_live_name_trgm", "name", postgresql_using="gin",
+              postgresql_ops={"name": "gin_trgm_ops"},
+              postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_file_trash_dataroom", "dataroom_id", "deleted_at",
+              postgresql_where=text("deleted_at IS NOT NULL")),
     )
@@ -1,4 +1,4 @@
-from sqlalchemy import String, ForeignKey, Index, UniqueConstraint, CheckConstraint
+from sqlalchemy import String, ForeignKey, Index, UniqueConstraint, CheckConstraint, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 from app.extensions import db
 from .mixins import UUIDPrimaryKeyMixin, TimestampMixin, SoftDeleteMixin, TableNameFromClassMixin
@@ -44,4 +44,20 @@ class Folder(UUIDPrimaryKeyMixin, TimestampMixin, SoftDeleteMixin, TableNameFrom
                         name="ck_folder_not_self_parent"),
         Index("ix_folder_dataroom_parent", "dataroom_id", "parent_id"),
         Index("ix_folder_path", "path", postgresql_using="btree"),
+        # prefijo (LIKE 'a/b/%') por dataroom para rename/move de subárboles
+        Index("ix_folder_dataroom_path_pattern", "dataroom_id", "path",
+              postgresql_ops={"path": "text_pattern_ops"}),
+        # parciales: los listados solo ven filas vivas, la papelera no los engorda
+        Index("ix_folder_live_dataroom_parent", "dataroom_id", "parent_id",
+              postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_folder_live_dataroom_path", "dataroom_id", "path",
+              postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_folder_live_dataroom_created", "dataroom_id", "created_at", "id",
+              postgresql_where=text("deleted_at IS NULL")),
+        # búsqueda por path (LIKE '%x%', similitud) con pg_trgm
+        Index("ix_folder_live_path_trgm", "path", postgresql_using="gin",
+              postgresql_ops={"path": "gin_trgm_ops"},
+              postgresql_where=text("deleted_at IS NULL")),
+        Index("ix_folder_trash_dataroom", "dataroom_id", "deleted_at",
+              postgresql_where=text("deleted_at IS NOT NULL")),
     )
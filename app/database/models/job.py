@@ -0,0 +1,43 @@
+from datetime import datetime
+from sqlalchemy import String, Integer, Text, Index, text, func
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.orm import Mapped, mapped_column
+from app.extensions import db
+from .mixins import UUIDPrimaryKeyMixin, TimestampMixin, TableNameFromClassMixin
+
+
+class Job(UUIDPrimaryKeyMixin, TimestampMixin, TableNameFromClassMixin, db.Model):
+    """
+    Trabajo de background (cola en Postgres). Los workers lo reclaman con
+    FOR UPDATE SKIP LOCKED; al terminar bien la fila se borra, así que en la
+    tabla solo quedan pendientes, en curso y fallidos definitivos.
+    """
+    type: Mapped[str] = mapped_column(String(64), nullable=False)
+    payload: Mapped[dict] = mapped_column(JSONB, nullable=False, default=dict)
+
+    # 'queued' | 'running' | 'failed'
+    status: Mapped[str] = mapped_column(
+        String(16), nullable=False, default="queued", server_default="queued")
+    attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    max_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=5)
+    # no se reclama antes de esta hora (reintentos con backoff)
+    run_at: Mapped[datetime] = mapped_column(
+        nullable=False, server_default=func.now())
+
+    locked_at: Mapped[datetime | None] = mapped_column(nullable=True)
+    locked_by: Mapped[str | None] = mapped_column(String(128), nullable=True)
+    last_error: Mapped[str | None] = mapped_column(Text, nullable=True)
+
+    # evita encolar dos veces lo mismo mientras siga pendiente o en curso
+    dedupe_key: Mapped[str | None] = mapped_column(String(255), nullable=True)
+
+    __table_args__ = (
+        # lo que barre el claim: pendientes por tipo en orden de run_at
+        Index("ix_job_queued_type_run_at", "type", "run_at",
+              postgresql_where=text("status = 'queued'")),
+        # conteo de en curso por tipo (límite de concurrencia) y leases vencidos
+        Index("ix_job_running_type", "type", "locked_at",
+              postgresql_where=text("status = 'running'")),
+        Index("ix_job_active_dedupe", "dedupe_key", unique=True,
+              postgresql_where=text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')")),
+    )
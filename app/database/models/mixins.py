@@ -2,7 +2,12 @@ import uuid
 from sqlalchemy import func
 from sqlalchemy.orm import declared_attr, Mapped, mapped_column
 from sqlalchemy.dialects.postgresql import UUID
-from datetime import datetime
+from datetime import datetime, timezone
+
+
+def utcnow() -> datetime:
+    # columnas DateTime sin tz (como server_default now() en UTC)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
 
 
 class UUIDPrimaryKeyMixin:
@@ -0,0 +1,21 @@
+from datetime import datetime
+from sqlalchemy import String, BigInteger, ForeignKey
+from sqlalchemy.orm import Mapped, mapped_column
+from app.extensions import db
+from .mixins import UUIDPrimaryKeyMixin, TimestampMixin, TableNameFromClassMixin
+
+
+class UploadSession(UUIDPrimaryKeyMixin, TimestampMixin, TableNameFromClassMixin, db.Model):
+    """Subida reanudable (tus-style): los chunks se acumulan en staging hasta el finalize."""
+    dataroom_id = mapped_column(ForeignKey(
+        "dataroom.id", ondelete="CASCADE"), nullable=False, index=True)
+    folder_id = mapped_column(ForeignKey(
+        "folder.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    filename: Mapped[str] = mapped_column(String(255), nullable=False)
+    # tamaño total anunciado por el cliente al crear la subida
+    upload_length: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    # archivo parcial; su tamaño en disco ES el offset actual
+    staging_path: Mapped[str] = mapped_column(String(2048), nullable=False)
+
+    expires_at: Mapped[datetime] = mapped_column(nullable=False, index=True)
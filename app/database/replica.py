@@ -0,0 +1,177 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app, has_app_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+log = logging.getLogger(__name__)
+
+REPLICA_BIND = "replica"
+# el cliente devuelve en sus lecturas el token que recibió en su última escritura
+CONSISTENCY_HEADER = "X-Consistency-Token"
+_ROUTE_KEY = "read_replica"
+_WRITE_METHODS = frozenset(("POST", "PUT", "PATCH", "DELETE"))
+
+
+class RoutingSession(Session):
+    """
+    Sesión que manda a la réplica las consultas hechas dentro de
+    `read_replica` (marcado en session.info); todo lo demás, y cualquier
+    flush, va al primario.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and self.info.get(_ROUTE_KEY) and not self._flushing:
+            engine = self._db.engines.get(REPLICA_BIND)
+            if engine is not None:
+                return engine
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _lsn(value: str | None) -> int | None:
+    # '16/B374D848' -> entero comparable
+    if not value:
+        return None
+    hi, _, lo = value.partition("/")
+    return (int(hi, 16) << 32) | int(lo, 16)
+
+
+class ReplicaMonitor:
+    """
+    Estado de la réplica por proceso, refrescado como mucho cada `interval`
+    segundos con una consulta barata. Un solo hilo mide a la vez; los demás
+    usan el último valor conocido.
+    """
+
+    def __init__(self, max_lag: float = 5.0, interval: float = 1.0):
+        self.max_lag = max_lag
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._checked_at = 0.0
+        self._healthy = False
+        self._standby = True
+        self._replay_lsn: int | None = None
+
+    def mark_down(self) -> None:
+        self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def _probe(self, engine) -> None:
+        try:
+            with engine.connect() as conn:
+                row = conn.execute(text(
+                    "SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text, "
+                    "CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+                )).one()
+            standby, replay, lag = row
+            self._standby = bool(standby)
+            self._replay_lsn = _lsn(replay)
+            self._healthy = not standby or (lag or 0) <= self.max_lag
+            if not self._healthy:
+                log.warning("replica: lag %.1fs above %.1fs, reading from primary", lag, self.max_lag)
+        except Exception:
+            log.warning("replica: health check failed, reading from primary", exc_info=True)
+            self._healthy = False
+        self._checked_at = time.monotonic()
+
+    def usable(self, engine, min_lsn: int | None = None) -> bool:
+        if time.monotonic() - self._checked_at >= self.interval and self._lock.acquire(blocking=False):
+            try:
+                self._probe(engine)
+            finally:
+                self._lock.release()
+        if not self._healthy:
+            return False
+        if min_lsn is not None and self._standby:
+            # read-your-writes: la réplica todavía no aplicó la escritura del cliente
+            return self._replay_lsn is not None and self._replay_lsn >= min_lsn
+        return True
+
+
+def _replica_engine():
+    from app.extensions import db
+    return db.engines.get(REPLICA_BIND)
+
+
+def _client_min_lsn() -> int | None:
+    try:
+        return _lsn(request.headers.get(CONSISTENCY_HEADER))
+    except (RuntimeError, ValueError):
+        return None  # fuera de un request o token inválido
+
+
+def _replica_usable() -> bool:
+    if not has_app_context():
+        return False
+    monitor = current_app.extensions.get("replica_monitor")
+    engine = _replica_engine() if monitor else None
+    return engine is not None and monitor.usable(engine, _client_min_lsn())
+
+
+@contextmanager
+def _routed(session, to_replica: bool):
+    prev = session.info.get(_ROUTE_KEY)
+    session.info[_ROUTE_KEY] = to_replica
+    try:
+        yield
+    finally:
+        session.info[_ROUTE_KEY] = prev
+
+
+def on_primary():
+    """Fuerza el primario dentro de un bloque (p.ej. lo que alimenta caches)."""
+    from app.extensions import db
+    return _routed(db.session, False)
+
+
+def read_replica(func):
+    """
+    Marca un service de solo lectura: sus consultas van a la réplica si
+    existe, su lag está dentro de DB_REPLICA_MAX_LAG_SECONDS y ya aplicó la
+    última escritura del cliente (X-Consistency-Token). Si la réplica falla
+    a mitad de camino se repite en el primario.
+    """
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        from app.extensions import db
+        if not _replica_usable():
+            return func(*args, **kwargs)
+        try:
+            with _routed(db.session, True):
+                return func(*args, **kwargs)
+        except OperationalError:
+            log.warning("replica: query failed, retrying on primary", exc_info=True)
+            current_app.extensions["replica_monitor"].mark_down()
+            db.session.rollback()
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def init_read_replica(app) -> None:
+    if not app.config.get("SQLALCHEMY_BINDS", {}).get(REPLICA_BIND):
+        return
+    app.extensions["replica_monitor"] = ReplicaMonitor(
+        max_lag=app.config.get("DB_REPLICA_MAX_LAG_SECONDS", 5.0),
+        interval=app.config.get("DB_REPLICA_CHECK_SECONDS", 1.0),
+    )
+
+    @app.after_request
+    def _consistency_token(response):
+        # tras una escritura, la posición del WAL del primario: el cliente la
+        # reenvía y sus lecturas no usan la réplica hasta que llegue a ella
+        if request.method in _WRITE_METHODS and response.status_code < 400:
+            from app.extensions import db
+            try:
+                with on_primary():
+                    lsn = db.session.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+                response.headers[CONSISTENCY_HEADER] = lsn
+            except Exception:
+                log.warning("replica: could not read primary WAL position", exc_info=True)
+                db.session.rollback()
+        return response
@@ -1,9 +1,11 @@
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy.orm import DeclarativeBase
+from app.database.replica import RoutingSession
 
 
 class Base(DeclarativeBase):
     pass
 
 
-db = SQLAlchemy(model_class=Base)
+# RoutingSession: lecturas marcadas con @read_replica van al bind "replica"
+db = SQLAlchemy(model_class=Base, session_options={"class_": RoutingSession})
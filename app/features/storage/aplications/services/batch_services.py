@@ -0,0 +1,284 @@
+# app/features/storage/aplications/services/batch_services.py
+import re
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from sqlalchemy import select, insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from werkzeug.utils import secure_filename
+from app.extensions import db
+from app.database.models.blob import Blob
+from app.database.models.file import File
+from app.database.models.folder import Folder
+from app.features.storage.aplications.services.lookups import (
+    get_dataroom_meta, get_folder_meta, get_live_folder,
+)
+from app.features.storage.aplications.services.naming import (
+    MAX_ATTEMPTS, like_prefix, next_free_name, is_name_conflict, split_first_dot,
+)
+from app.features.storage.aplications.services.storege_services import (
+    DEFAULT_CHUNK_SIZE, blob_key, discard, is_pdf, put_linked, stage_upload,
+)
+from app.features.storage.aplications.services.search_services import enqueue_text_extraction
+from app.features.storage.aplications.services.thumbnail_services import enqueue_thumbnails
+from app.features.storage.infrastructure.storage_backend import StorageBackend
+from uuid import UUID
+
+DEFAULT_MAX_ITEMS = 1000
+_DRIVE = re.compile(r"^[A-Za-z]:")
+DEFAULT_MAX_UNCOMPRESSED = 2 * 1024 * 1024 * 1024
+
+
+@dataclass
+class _Item:
+    source: str                 # nombre en el request / ruta dentro del ZIP
+    rel_dir: str = ""           # subcarpeta relativa a la carpeta destino
+    filename: str = ""
+    tmp_path: str | None = None
+    size_bytes: int = 0
+    checksum: str | None = None
+    error: str | None = None
+    result: dict = field(default_factory=dict)
+
+
+def _is_zip(file_storage) -> bool:
+    name = (file_storage.filename or "").lower()
+    return name.endswith(".zip") or (file_storage.mimetype or "") in (
+        "application/zip", "application/x-zip-compressed")
+
+
+def _clean_dir(parts: list[str]) -> str | None:
+    # rutas del ZIP: sin absolutas ni '..' (zip-slip); None si es inválida
+    if parts and (parts[0] == "" or _DRIVE.match(parts[0])):
+        return None  # "/etc/x.pdf", "C:/x.pdf"
+    clean = []
+    for p in parts:
+        p = p.strip()
+        if p in ("", "."):
+            continue
+        if p == "..":
+            return None
+        clean.append(p)
+    return "/".join(clean)
+
+
+def _items_from_zip(file_storage, staging_dir: str, chunk_size: int,
+                    max_items: int, max_uncompressed: int) -> tuple[list[_Item], set[str]]:
+    items, dirs = [], set()
+    with zipfile.ZipFile(file_storage.stream) as zf:
+        infos = [i for i in zf.infolist() if not i.filename.startswith("__MACOSX/")]
+        if len(infos) > max_items:
+            raise ValueError(f"Too many entries in archive (max {max_items})")
+        if sum(i.file_size for i in infos) > max_uncompressed:
+            raise ValueError("Archive too large once uncompressed")
+
+        for info in infos:
+            parts = info.filename.replace("\\", "/").split("/")
+            if info.is_dir():
+                rel = _clean_dir(parts)
+                if rel:
+                    dirs.add(rel)
+                continue
+            rel_dir = _clean_dir(parts[:-1])
+            item = _Item(source=info.filename, rel_dir=rel_dir or "",
+                         filename=secure_filename(parts[-1]))
+            items.append(item)
+            if rel_dir is None:
+                item.error = "Invalid path in archive"
+            elif not item.filename or not item.filename.lower().endswith(".pdf"):
+                item.error = "Only PDF files are allowed"
+            else:
+                try:
+                    with zf.open(info) as entry:
+                        item.tmp_path, item.size_bytes, item.checksum = stage_upload(
+                            entry, staging_dir, chunk_size=chunk_size)
+                except (zipfile.BadZipFile, RuntimeError, OSError) as e:
+                    item.error = f"Could not extract entry: {e}"
+            if rel_dir:
+                dirs.add(rel_dir)
+    return items, dirs
+
+
+def _items_from_files(file_storages, staging_dir: str, chunk_size: int) -> list[_Item]:
+    items = []
+    for fs in file_storages:
+        item = _Item(source=fs.filename or "", filename=secure_filename(fs.filename or ""))
+        items.append(item)
+        if not item.filename:
+            item.error = "Empty filename"
+        elif not is_pdf(item.filename, fs.mimetype):
+            item.error = "Only PDF files are allowed"
+        else:
+            item.tmp_path, item.size_bytes, item.checksum = stage_upload(
+                fs.stream, staging_dir, chunk_size=chunk_size)
+    return items
+
+
+def _ensure_folders(dr_id, root, rel_dirs: set[str]) -> dict[str, UUID]:
+    """
+    Mapea cada subcarpeta relativa del lote a su folder_id: reutiliza las que
+    ya existen (1 query sobre el subárbol) y crea el resto en un bulk insert.
+    Una carpeta en la papelera no se reutiliza pero sigue ocupando su nombre,
+    así que la nueva recibe el siguiente sufijo libre ("a (2)").
+    """
+    ids = {"": root.id}
+    if not rel_dirs:
+        return ids
+    existing = db.session.execute(
+        select(Folder.id, Folder.parent_id, Folder.name, Folder.deleted_at).where(
+            Folder.dataroom_id == dr_id,
+            Folder.path.like(like_prefix(root.path + "/"), escape="\\"),
+        )
+    ).all()
+    by_name = {(r.parent_id, r.name): r for r in existing}
+    siblings: dict = {}
+    for r in existing:
+        siblings.setdefault(r.parent_id, set()).add(r.name)
+
+    # incluye ancestros implícitos ("a/b/c" necesita "a" y "a/b")
+    wanted = set()
+    for rel in rel_dirs:
+        parts = rel.split("/")
+        wanted.update("/".join(parts[:i]) for i in range(1, len(parts) + 1))
+
+    paths = {"": root.path}
+    rows = []
+    # ordenado por profundidad: el padre se inserta antes que el hijo
+    for rel in sorted(wanted, key=lambda r: (r.count("/"), r)):
+        parent_rel, _, name = rel.rpartition("/")
+        parent_id = ids[parent_rel]
+        found = by_name.get((parent_id, name))
+        if found is not None and found.deleted_at is None:
+            ids[rel] = found.id
+            paths[rel] = f"{paths[parent_rel]}/{name}"
+            continue
+        taken = siblings.setdefault(parent_id, set())
+        name = next_free_name(name, taken, split_first_dot)
+        taken.add(name)
+        ids[rel] = uuid.uuid4()
+        paths[rel] = f"{paths[parent_rel]}/{name}"
+        rows.append({"id": ids[rel], "name": name, "path": paths[rel],
+                     "dataroom_id": dr_id, "parent_id": parent_id})
+    if rows:
+        db.session.execute(insert(Folder), rows)
+    return ids
+
+
+def _acquire_blobs(items: list[_Item]) -> dict[str, str]:
+    # un único upsert por lote; una fila por checksum (ON CONFLICT no admite
+    # repetir la misma clave) y en orden para no generar deadlocks entre lotes
+    counts: dict[str, tuple[int, int]] = {}
+    for it in items:
+        refs, _ = counts.get(it.checksum, (0, it.size_bytes))
+        counts[it.checksum] = (refs + 1, it.size_bytes)
+    values = [{"checksum_sha256": sha, "storage_path": blob_key(sha),
+               "size_bytes": size, "ref_count": refs}
+              for sha, (refs, size) in sorted(counts.items())]
+    stmt = pg_insert(Blob).values(values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[Blob.checksum_sha256],
+        set_={"ref_count": Blob.ref_count + stmt.excluded.ref_count},
+    ).returning(Blob.checksum_sha256, Blob.storage_path)
+    return {r.checksum_sha256: r.storage_path for r in db.session.execute(stmt)}
+
+
+def _persist(dr_id, root, items: list[_Item], rel_dirs: set[str],
+             storage: StorageBackend) -> None:
+    folder_ids = _ensure_folders(dr_id, root, rel_dirs)
+    ok = [it for it in items if it.error is None]
+    if not ok:
+        return
+
+    keys = _acquire_blobs(ok)
+    for it in ok:
+        # en cada intento: un rollback por conflicto de nombres deshace
+        # también la ref, y el reaper pudo borrar el blob entre medio. El
+        # temporal se conserva (hard link a put_file) hasta después del commit
+        if storage.stat(keys[it.checksum]) is None:
+            put_linked(storage, keys[it.checksum], it.tmp_path)
+
+    # nombres únicos por carpeta: 1 query para todas las carpetas del lote
+    taken: dict = {}
+    for r in db.session.execute(
+            select(File.folder_id, File.name)
+            .where(File.folder_id.in_(list({folder_ids[it.rel_dir] for it in ok})))):
+        taken.setdefault(r.folder_id, set()).add(r.name)
+
+    rows = []
+    for it in ok:
+        folder_id = folder_ids[it.rel_dir]
+        names = taken.setdefault(folder_id, set())
+        name = next_free_name(it.filename, names)
+        names.add(name)
+        file_id = uuid.uuid4()
+        rows.append({
+            "id": file_id, "name": name, "original_filename": it.filename,
+            "content_type": "application/pdf", "size_bytes": it.size_bytes,
+            "storage_path": keys[it.checksum], "checksum_sha256": it.checksum,
+            "version": 1, "folder_id": folder_id, "dataroom_id": dr_id,
+        })
+        it.result = {"id": str(file_id), "name": name, "folder_id": str(folder_id),
+                     "size_bytes": it.size_bytes}
+    db.session.execute(insert(File), rows)
+    enqueue_text_extraction(list(keys))
+    enqueue_thumbnails(list(keys.values()))
+
+
+def upload_batch(dataroom_id: UUID, folder_id: UUID, file_storages: list,
+                 storage: StorageBackend, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 max_items: int = DEFAULT_MAX_ITEMS,
+                 max_uncompressed: int = DEFAULT_MAX_UNCOMPRESSED) -> list[dict]:
+    """
+    Sube muchos PDFs (o un único ZIP, recreando sus carpetas) bajo `folder_id`.
+    Cada entrada se stremea al staging con su hash en una pasada; después
+    todas las filas Folder/File/Blob van en bulk inserts dentro de UNA
+    transacción. Devuelve un resultado por ítem.
+    """
+    dr = get_dataroom_meta(dataroom_id)
+    folder = get_folder_meta(folder_id)
+    if folder.dataroom_id != dr.id:
+        raise ValueError("Folder does not belong to dataroom")
+    if not file_storages:
+        raise ValueError("No files received")
+    if len(file_storages) > max_items:
+        raise ValueError(f"Too many files (max {max_items})")
+
+    rel_dirs: set[str] = set()
+    items: list[_Item] = []
+    try:
+        if len(file_storages) == 1 and _is_zip(file_storages[0]):
+            try:
+                items, rel_dirs = _items_from_zip(file_storages[0], storage.staging_dir,
+                                                  chunk_size, max_items, max_uncompressed)
+            except zipfile.BadZipFile:
+                raise ValueError("Invalid ZIP archive")
+        else:
+            items = _items_from_files(file_storages, storage.staging_dir, chunk_size)
+
+        for attempt in range(MAX_ATTEMPTS):
+            try:
+                # el path de la raíz, leído y bloqueado en esta transacción
+                root = get_live_folder(folder.id, for_share=True)
+                _persist(dr.id, root, items, rel_dirs, storage)
+                db.session.commit()
+                break
+            except IntegrityError as e:
+                # otro request tomó un nombre de carpeta/archivo: se recalcula el lote
+                db.session.rollback()
+                if not is_name_conflict(e) or attempt == MAX_ATTEMPTS - 1:
+                    raise
+    except BaseException:
+        db.session.rollback()
+        raise
+    finally:
+        for it in items:
+            if it.tmp_path:
+                discard(it.tmp_path)
+
+    return [
+        {"source": it.source, "status": "error", "error": it.error}
+        if it.error else
+        {"source": it.source, "status": "created", **it.result}
+        for it in items
+    ]
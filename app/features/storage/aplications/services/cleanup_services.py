@@ -0,0 +1,173 @@
+# app/features/storage/aplications/services/cleanup_services.py
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from flask import current_app
+from sqlalchemy import select, delete, update, func
+from app.extensions import db
+from app.database.models.blob import Blob
+from app.database.models.file import File
+from app.features.storage.aplications.services.thumbnail_services import (
+    delete_with_thumbnails, thumbnail_base_key,
+)
+from app.features.storage.infrastructure.storage_backend import StorageBackend
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def reap_blobs(storage: StorageBackend, batch_size: int = DEFAULT_BATCH_SIZE) -> int:
+    """
+    Borra del storage los blobs sin referencias (ref_count <= 0), por lotes.
+    Cada lote se toma con FOR UPDATE SKIP LOCKED (varios workers pueden
+    reapear a la vez) y el objeto se borra con la fila aún bloqueada: un
+    upload concurrente del mismo contenido espera al commit y lo reescribe.
+    """
+    total = 0
+    failed: set[str] = set()
+    while True:
+        stmt = (select(Blob.checksum_sha256, Blob.storage_path)
+                .where(Blob.ref_count <= 0)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True))
+        if failed:
+            # lo que falló en esta pasada no se vuelve a pedir hasta la próxima
+            stmt = stmt.where(Blob.checksum_sha256.not_in(failed))
+        rows = db.session.execute(stmt).all()
+        if not rows:
+            db.session.rollback()
+            return total
+        reaped = []
+        for r in rows:
+            try:
+                # las miniaturas viven junto al blob y se van con él
+                delete_with_thumbnails(storage, r.storage_path)
+                reaped.append(r.checksum_sha256)
+            except Exception:
+                # la fila queda y se reintenta en la próxima pasada
+                log.exception("reaper: could not delete %s", r.storage_path)
+                failed.add(r.checksum_sha256)
+        if reaped:
+            db.session.execute(
+                delete(Blob)
+                .where(Blob.checksum_sha256.in_(reaped), Blob.ref_count <= 0)
+            )
+        db.session.commit()
+        total += len(reaped)
+        if not reaped or len(rows) < batch_size:
+            # lote entero fallido (storage caído): no insistir en un bucle
+            return total
+
+
+class BlobReaper:
+    """
+    Hilo de fondo por proceso (se arranca perezosamente, así sobrevive al
+    fork de gunicorn) que borra blobs sin referencias y rutas sueltas de
+    uploads antiguos. Se despierta al borrar algo y, además, cada `interval`.
+    """
+
+    def __init__(self, app, batch_size: int = DEFAULT_BATCH_SIZE, interval: float = 60.0):
+        self._app = app
+        self._batch_size = batch_size
+        self._interval = interval
+        self._paths: deque[str] = deque()
+        self._wake = threading.Event()
+        self._lock = threading.Lock()
+        self._pid: int | None = None
+
+    def notify(self, paths=()) -> None:
+        self._paths.extend(paths)
+        self._ensure_started()
+        self._wake.set()
+
+    def _ensure_started(self) -> None:
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            threading.Thread(target=self._run, name="blob-reaper", daemon=True).start()
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait(self._interval)
+            self._wake.clear()
+            with self._app.app_context():
+                try:
+                    storage = self._app.extensions["storage"]
+                    while self._paths:
+                        delete_with_thumbnails(storage, self._paths.popleft())
+                    reap_blobs(storage, self._batch_size)
+                except Exception:
+                    log.exception("reaper: pass failed")
+
+
+def schedule_reap(paths=()) -> None:
+    """Llamar DESPUÉS del commit: despierta al reaper del proceso."""
+    reaper = current_app.extensions.get("blob_reaper")
+    if reaper is not None:
+        reaper.notify(paths)
+
+
+def init_reaper(app) -> None:
+    if app.config.get("REAPER_ENABLED", True):
+        app.extensions["blob_reaper"] = BlobReaper(
+            app,
+            batch_size=app.config.get("REAPER_BATCH_SIZE", DEFAULT_BATCH_SIZE),
+            interval=app.config.get("REAPER_INTERVAL_SECONDS", 60),
+        )
+
+
+def recount_blob_refs() -> int:
+    """Recalcula blob.ref_count desde la tabla file (corrige desvíos). Devuelve filas corregidas."""
+    counted = (select(func.count())
+               .select_from(File)
+               .where(File.checksum_sha256 == Blob.checksum_sha256,
+                      File.storage_path == Blob.storage_path)
+               .scalar_subquery())
+    result = db.session.execute(
+        update(Blob)
+        .values(ref_count=counted)
+        .where(Blob.ref_count != counted)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def scan_orphans(storage: StorageBackend, root: str | None = None, min_age_seconds: int = 3600,
+                 delete_orphans: bool = False) -> dict:
+    """
+    Reconcilia el storage contra la DB:
+    - objetos que ningún blob ni File referencia (huérfanos; se borran con
+      delete_orphans si tienen más de min_age_seconds, para no pisar uploads
+      en curso que aún no hicieron commit); una miniatura es huérfana si lo
+      es su blob,
+    - blobs cuya fila existe pero el objeto no (faltantes).
+    """
+    known = set(db.session.execute(select(Blob.storage_path)).scalars())
+    blob_keys = set(known)
+    for path in db.session.execute(select(File.storage_path)).scalars():
+        # uploads antiguos guardaban la ruta absoluta dentro del root local
+        if root and os.path.isabs(path):
+            path = os.path.relpath(path, root).replace(os.sep, "/")
+        known.add(path)
+
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=min_age_seconds)
+    orphans, deleted, seen = [], [], set()
+    for key, stat in storage.iter_keys():
+        seen.add(key)
+        if key in known or key.endswith(".part") or thumbnail_base_key(key) in known:
+            continue
+        orphans.append(key)
+        if delete_orphans and stat.modified_at and stat.modified_at < cutoff:
+            storage.delete(key)
+            deleted.append(key)
+
+    return {
+        "orphans": orphans,
+        "deleted": deleted,
+        "missing": sorted(blob_keys - seen),
+    }
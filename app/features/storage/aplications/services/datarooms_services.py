@@ -1,6 +1,20 @@
 # app/features/storage/applications/services/datarooms_services.py
+from sqlalchemy import select
 from app.extensions import db
 from app.database.models.dataroom import Dataroom
+from app.database.replica import read_replica
+from app.features.storage.aplications.services.pagination import (
+    MAX_LIMIT, keyset_page, projection, sort_columns,
+)
+
+# columnas publicables (las de dataroom_model) y órdenes soportados
+DATAROOM_COLUMNS = {"id": Dataroom.id, "name": Dataroom.name,
+                    "description": Dataroom.description}
+DATAROOM_SORTS = {
+    "-created_at": ((Dataroom.created_at, Dataroom.id), True),
+    "created_at": ((Dataroom.created_at, Dataroom.id), False),
+    "name": ((Dataroom.name, Dataroom.id), False),
+}
 
 
 def create_dataroom(name: str, description: str | None = None) -> Dataroom:
@@ -10,8 +24,13 @@ def create_dataroom(name: str, description: str | None = None) -> Dataroom:
     return dr
 
 
-def list_datarooms() -> list[Dataroom]:
-    return Dataroom.query.order_by(Dataroom.created_at.desc()).all()
+@read_replica
+def list_datarooms(limit: int | None = None, cursor: str | None = None,
+                   sort: str = "-created_at", fields: set[str] | None = None,
+                   max_limit: int = MAX_LIMIT):
+    """Página de datarooms (Rows con solo las columnas pedidas) y cursor siguiente."""
+    stmt = select(*projection(DATAROOM_COLUMNS, fields, sort_columns(DATAROOM_SORTS, sort)))
+    return keyset_page(stmt, sort, DATAROOM_SORTS, cursor, limit, max_limit=max_limit)
 
 
 def get_dataroom(dataroom_id):
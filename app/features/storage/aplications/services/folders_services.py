@@ -1,94 +1,268 @@
-from sqlalchemy import and_
+from sqlalchemy import select, func, update, delete, literal, or_
+from werkzeug.exceptions import NotFound
 from app.extensions import db
-from app.database.models.dataroom import Dataroom
 from app.database.models.folder import Folder
 from app.database.models.file import File
+from app.database.replica import read_replica
+from app.features.storage.aplications.services.lookups import (
+    folders_changed, get_dataroom_meta, get_folder_meta, get_live_folder,
+)
+from app.features.storage.aplications.services.pagination import (
+    MAX_LIMIT, keyset_page, projection, sort_columns,
+)
+from app.features.storage.aplications.services.naming import (
+    allocate_unique_name, like_prefix, split_first_dot,
+)
+from app.features.storage.aplications.services.storege_services import release_blob_refs
+from app.features.storage.aplications.services.cleanup_services import schedule_reap
 from uuid import UUID
 
 
-def _sibling_name_exists(dataroom_id, parent_id, name) -> bool:
-    q = Folder.query.filter(
-        and_(Folder.dataroom_id == dataroom_id,
-             Folder.parent_id == parent_id, Folder.name == name)
+def _sibling_names(dataroom_id, parent_id, base: str, exclude_id=None) -> list[str]:
+    # una sola query: todos los hermanos cuyo nombre empieza por `base`
+    stmt = select(Folder.name).where(
+        Folder.dataroom_id == dataroom_id,
+        Folder.parent_id == parent_id,
+        Folder.name.like(like_prefix(base), escape="\\"),
     )
-    return db.session.query(q.exists()).scalar()
-
-
-def _unique_name(dataroom_id, parent_id, desired: str) -> str:
-    if not _sibling_name_exists(dataroom_id, parent_id, desired):
-        return desired
-    base, dot, ext = desired.partition(".")  # por si usas carpetas con puntos
-    n = 2
-    while True:
-        candidate = f"{base} ({n}){dot}{ext}" if dot else f"{base} ({n})"
-        if not _sibling_name_exists(dataroom_id, parent_id, candidate):
-            return candidate
-        n += 1
+    if exclude_id is not None:
+        stmt = stmt.where(Folder.id != exclude_id)
+    return db.session.execute(stmt).scalars().all()
 
 
 def create_folder(dataroom_id: UUID, parent_id: str | None, name: str) -> Folder:
-    dr = Dataroom.query.get_or_404(dataroom_id)
-    parent = Folder.query.get(parent_id) if parent_id else None
+    dr = get_dataroom_meta(dataroom_id)
+    parent = get_live_folder(parent_id, for_share=True) if parent_id else None
     if parent and parent.dataroom_id != dr.id:
         raise ValueError("Parent folder does not belong to dataroom")
 
-    name = _unique_name(dr.id, parent.id if parent else None, name)
-    path = f"{(parent.path + '/') if parent else ''}{name}"
-    folder = Folder(name=name, dataroom_id=dr.id,
-                    parent_id=parent.id if parent else None, path=path)
-    db.session.add(folder)
+    parent_id = parent.id if parent else None
+    folder = Folder(dataroom_id=dr.id, parent_id=parent_id)
+
+    def _apply(unique: str) -> None:
+        folder.name = unique
+        folder.path = f"{(parent.path + '/') if parent else ''}{unique}"
+        db.session.add(folder)
+
+    allocate_unique_name(name, lambda base: _sibling_names(dr.id, parent_id, base),
+                         _apply, split=split_first_dot)
     db.session.commit()
     return folder
 
 
-def list_files(folder_id: UUID):
-    Folder.query.get_or_404(folder_id)
-    return (File.query
-            .filter_by(folder_id=folder_id)
-            .order_by(File.name)
-            .all())
+# columnas publicables (las de file_model / folder_model) y órdenes soportados;
+# cada orden termina en id para que el keyset sea total
+FILE_COLUMNS = {
+    "id": File.id, "name": File.name, "original_filename": File.original_filename,
+    "size_bytes": File.size_bytes, "content_type": File.content_type,
+    "storage_path": File.storage_path, "version": File.version,
+}
+FILE_SORTS = {
+    "name": ((File.name, File.id), False),
+    "-name": ((File.name, File.id), True),
+    "created_at": ((File.created_at, File.id), False),
+    "-created_at": ((File.created_at, File.id), True),
+}
+FOLDER_COLUMNS = {"id": Folder.id, "name": Folder.name, "path": Folder.path,
+                  "parent_id": Folder.parent_id}
+FOLDER_SORTS = {
+    "path": ((Folder.path, Folder.id), False),
+    "created_at": ((Folder.created_at, Folder.id), False),
+    "-created_at": ((Folder.created_at, Folder.id), True),
+}
 
 
-def list_folders(dataroom_id: UUID) -> list[dict]:
+@read_replica
+def list_files(folder_id: UUID, limit: int | None = None, cursor: str | None = None,
+               sort: str = "name", fields: set[str] | None = None,
+               max_limit: int = MAX_LIMIT):
+    """
+    Página de archivos vivos de la carpeta: (rows, next_cursor). Selecciona
+    solo las columnas pedidas (X-Fields) y pagina por keyset sobre el orden
+    elegido, así el costo no crece con el tamaño de la carpeta.
+    """
+    get_folder_meta(folder_id)
+    stmt = (select(*projection(FILE_COLUMNS, fields, sort_columns(FILE_SORTS, sort)))
+            .where(File.folder_id == folder_id, File.deleted_at.is_(None)))
+    return keyset_page(stmt, sort, FILE_SORTS, cursor, limit, max_limit=max_limit)
+
+
+@read_replica
+def list_folders(dataroom_id: UUID, limit: int | None = None, cursor: str | None = None,
+                 sort: str = "path", fields: set[str] | None = None,
+                 max_limit: int = MAX_LIMIT):
     # opcional: 404 si no existe el dataroom
-    Dataroom.query.get_or_404(dataroom_id)
-
-    folders = (Folder.query
-               .filter_by(dataroom_id=dataroom_id)
-               .order_by(Folder.path)
-               .all())
-    return [
-        {
-            "id": str(f.id),
-            "name": f.name,
-            "path": f.path,
-            "parent_id": str(f.parent_id) if f.parent_id else None,
+    get_dataroom_meta(dataroom_id)
+    stmt = (select(*projection(FOLDER_COLUMNS, fields, sort_columns(FOLDER_SORTS, sort)))
+            .where(Folder.dataroom_id == dataroom_id, Folder.deleted_at.is_(None)))
+    return keyset_page(stmt, sort, FOLDER_SORTS, cursor, limit, max_limit=max_limit)
+
+
+TREE_DEFAULT_LIMIT = 500
+TREE_MAX_LIMIT = 2000
+
+
+def get_tree(dataroom_id: UUID, max_depth: int | None = None, cursor: str | None = None,
+             limit: int = TREE_DEFAULT_LIMIT, include_files: bool = True) -> dict:
+    """
+    Árbol de carpetas (+ metadata de archivos) de un dataroom en 3 queries
+    fijas y sin cargar entidades ORM: existencia del dataroom, página de
+    carpetas por keyset sobre `path`, y archivos de esas carpetas.
+
+    max_depth=1 devuelve solo el primer nivel. Si una página corta un
+    subárbol, los hijos que quedan en la página siguiente vienen como raíces
+    con su parent_id para que el cliente los cuelgue.
+    """
+    get_dataroom_meta(dataroom_id)
+    limit = max(1, min(limit, TREE_MAX_LIMIT))
+
+    stmt = (select(Folder.id, Folder.name, Folder.path, Folder.parent_id)
+            .where(Folder.dataroom_id == dataroom_id, Folder.deleted_at.is_(None))
+            .order_by(Folder.path)
+            .limit(limit + 1))
+    if cursor:
+        stmt = stmt.where(Folder.path > cursor)
+    if max_depth is not None:
+        # profundidad = cantidad de '/' en el path (0 en el primer nivel)
+        depth = func.length(Folder.path) - func.length(func.replace(Folder.path, "/", ""))
+        stmt = stmt.where(depth < max_depth)
+    rows = db.session.execute(stmt).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    nodes: dict = {}
+    roots = []
+    # ordenado por path: el padre siempre aparece antes que sus hijos
+    for r in rows:
+        node = {
+            "id": str(r.id),
+            "name": r.name,
+            "path": r.path,
+            "parent_id": str(r.parent_id) if r.parent_id else None,
+            "children": [],
+            "files": [],
         }
-        for f in folders
-    ]
+        nodes[r.id] = node
+        parent = nodes.get(r.parent_id)
+        (parent["children"] if parent else roots).append(node)
 
+    if include_files and nodes:
+        files = db.session.execute(
+            select(File.id, File.folder_id, File.name, File.original_filename,
+                   File.size_bytes, File.content_type, File.version)
+            .where(File.folder_id.in_(list(nodes)), File.deleted_at.is_(None))
+            .order_by(File.folder_id, File.name)
+        ).all()
+        for r in files:
+            nodes[r.folder_id]["files"].append({
+                "id": str(r.id),
+                "name": r.name,
+                "original_filename": r.original_filename,
+                "size_bytes": r.size_bytes,
+                "content_type": r.content_type,
+                "version": r.version,
+            })
+
+    return {
+        "folders": roots,
+        "next_cursor": rows[-1].path if has_more else None,
+    }
 
-def rename_folder(folder_id: UUID, new_name: str) -> Folder:
-    f = Folder.query.get_or_404(folder_id)
-    # asegura nombre único entre hermanos
-    new_name = _unique_name(f.dataroom_id, f.parent_id, new_name)
 
+def _move_subtree(f: Folder, parent_path: str, new_name: str) -> None:
+    """
+    Cambia nombre/ubicación de `f` y reescribe el path de TODOS sus
+    descendientes con un único UPDATE set-based, acotado al dataroom:
+        UPDATE folder SET path = :new || substr(path, len(:old) + 1)
+        WHERE dataroom_id = :dr AND path LIKE :old || '/%'
+    (index-backed por ix_folder_dataroom_path_pattern, text_pattern_ops).
+    """
     old_path = f.path
-    parent_path = f.path.rsplit("/", 1)[0] if "/" in f.path else ""
     new_path = f"{parent_path + '/' if parent_path else ''}{new_name}"
     f.name = new_name
     f.path = new_path
+    db.session.flush()
+
+    if new_path != old_path:
+        db.session.execute(
+            update(Folder)
+            .where(Folder.dataroom_id == f.dataroom_id,
+                   Folder.path.like(like_prefix(old_path + "/"), escape="\\"))
+            .values(path=literal(new_path).concat(func.substr(Folder.path, len(old_path) + 1)))
+            .execution_options(synchronize_session=False)
+        )
 
-    # actualiza paths hijos por prefijo
-    prefix = old_path + "/"
-    descendants = Folder.query.filter(Folder.path.startswith(prefix)).all()
-    for d in descendants:
-        d.path = new_path + d.path[len(old_path):]
+
+def rename_folder(folder_id: UUID, new_name: str) -> Folder:
+    # bloqueada: el path nuevo se calcula sobre el vigente, no sobre uno que
+    # un rename concurrente del padre está por reescribir
+    f = get_live_folder(folder_id, for_update=True)
+    if new_name == f.name:
+        return f
+    # asegura nombre único entre hermanos
+    parent_path = f.path.rsplit("/", 1)[0] if "/" in f.path else ""
+    allocate_unique_name(
+        new_name,
+        lambda base: _sibling_names(f.dataroom_id, f.parent_id, base, exclude_id=f.id),
+        lambda unique: _move_subtree(f, parent_path, unique),
+        split=split_first_dot,
+    )
+    folders_changed(f.dataroom_id)
+    db.session.commit()
+    return f
+
+
+def move_folder(folder_id: UUID, new_parent_id: str | None) -> Folder:
+    f = get_live_folder(folder_id, for_update=True)
+    parent = get_live_folder(new_parent_id, for_share=True) if new_parent_id else None
+    if parent:
+        if parent.dataroom_id != f.dataroom_id:
+            raise ValueError("Parent folder does not belong to dataroom")
+        if parent.id == f.id or parent.path.startswith(f.path + "/"):
+            raise ValueError("Cannot move a folder into its own subtree")
+
+    parent_id = parent.id if parent else None
+    if parent_id == f.parent_id:
+        return f
+    desired = f.name
+
+    def _apply(unique: str) -> None:
+        f.parent_id = parent_id
+        _move_subtree(f, parent.path if parent else "", unique)
+
+    allocate_unique_name(
+        desired,
+        lambda base: _sibling_names(f.dataroom_id, parent_id, base, exclude_id=f.id),
+        _apply,
+        split=split_first_dot,
+    )
+    folders_changed(f.dataroom_id)
     db.session.commit()
     return f
 
 
 def delete_folder_recursive(folder_id: UUID) -> None:
-    f = Folder.query.get_or_404(folder_id)
-    db.session.delete(f)  # ondelete + cascade se encargan del resto
+    """Borrado definitivo (sin pasar por la papelera); también sirve para carpetas ya en ella."""
+    # bloquea la carpeta: un borrado concurrente de la misma (o del padre) espera
+    f = db.session.execute(
+        select(Folder).where(Folder.id == folder_id).with_for_update()
+    ).scalar_one_or_none()
+    if f is None:
+        raise NotFound()
+    subtree = select(Folder.id).where(
+        Folder.dataroom_id == f.dataroom_id,
+        or_(Folder.id == f.id, Folder.path.like(like_prefix(f.path + "/"), escape="\\")))
+    # las refs salen de las filas que ESTE statement borra: si un delete_file
+    # concurrente ya se llevó un archivo, no vuelve aquí y no se descuenta dos veces
+    refs = db.session.execute(
+        delete(File)
+        .where(File.folder_id.in_(subtree))
+        .returning(File.checksum_sha256, File.storage_path)
+        .execution_options(synchronize_session=False)
+    ).all()
+    legacy = release_blob_refs(refs)
+    db.session.delete(f)  # las subcarpetas se van por ondelete=CASCADE
+    folders_changed(f.dataroom_id)
     db.session.commit()
+    # el borrado físico va en background, fuera del request
+    schedule_reap(legacy)
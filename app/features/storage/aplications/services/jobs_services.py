@@ -0,0 +1,182 @@
+# app/features/storage/aplications/services/jobs_services.py
+import random
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from sqlalchemy import select, update, delete, exists, func, case, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.database.models.job import Job
+from uuid import UUID, uuid4
+
+JOBS_CHANNEL = "asvita_jobs"
+QUEUED, RUNNING, FAILED = "queued", "running", "failed"
+MAX_BACKOFF_SECONDS = 3600
+MAX_ERROR_CHARS = 4000
+
+
+@dataclass(frozen=True)
+class JobType:
+    name: str
+    func: Callable[[dict], None]
+    # máximo de jobs de este tipo en curso a la vez, entre TODOS los workers
+    concurrency: int = 1
+    max_attempts: int = 5
+    # espera antes del primer reintento; se duplica en cada intento
+    backoff_seconds: float = 30.0
+
+
+JOB_TYPES: dict[str, JobType] = {}
+
+
+def job_handler(name: str, concurrency: int = 1, max_attempts: int = 5,
+                backoff_seconds: float = 30.0):
+    """
+    Registra `func(payload)` como handler del tipo `name`. El handler corre
+    en un proceso del worker con app context; si lanza, el job se reintenta
+    con backoff exponencial hasta `max_attempts`. Debe ser idempotente: tras
+    un corte el mismo job puede ejecutarse otra vez.
+    """
+    def decorator(func):
+        JOB_TYPES[name] = JobType(name, func, concurrency, max_attempts, backoff_seconds)
+        return func
+    return decorator
+
+
+def enqueue_many(job_type: str, items) -> None:
+    """
+    Encola [(payload, dedupe_key)] DENTRO de la transacción del llamador: el
+    job existe si y solo si el commit de la escritura que lo originó se hizo.
+    Con dedupe_key no se duplica lo que ya esté pendiente o en curso.
+    """
+    spec = JOB_TYPES.get(job_type)
+    rows = [{"id": uuid4(), "type": job_type, "payload": payload, "dedupe_key": key,
+             "status": QUEUED, "attempts": 0,
+             "max_attempts": spec.max_attempts if spec else 5}
+            for payload, key in items]
+    if not rows:
+        return
+    stmt = pg_insert(Job).values(rows).on_conflict_do_nothing(
+        index_elements=[Job.dedupe_key],
+        index_where=Job.dedupe_key.isnot(None) & Job.status.in_((QUEUED, RUNNING)))
+    db.session.execute(stmt)
+    # despierta a los workers en cuanto haya commit (Postgres no entrega antes)
+    db.session.execute(select(func.pg_notify(JOBS_CHANNEL, job_type)))
+
+
+def enqueue(job_type: str, payload: dict | None = None, dedupe_key: str | None = None) -> None:
+    enqueue_many(job_type, [(payload or {}, dedupe_key)])
+
+
+def claim_jobs(job_type: str, n: int, worker_id: str, concurrency: int) -> list:
+    """
+    Reclama hasta `n` jobs vencidos de un tipo sin pasar el límite global de
+    concurrencia. El advisory lock por tipo serializa solo el conteo+claim
+    (una transacción corta); SKIP LOCKED evita esperar filas tomadas.
+    Devuelve Rows (id, type, payload, attempts, max_attempts).
+    """
+    db.session.execute(select(func.pg_advisory_xact_lock(func.hashtext(f"{JOBS_CHANNEL}:{job_type}"))))
+    running = db.session.execute(
+        select(func.count()).select_from(Job)
+        .where(Job.type == job_type, Job.status == RUNNING)
+    ).scalar_one()
+    n = min(n, concurrency - running)
+    if n <= 0:
+        db.session.commit()
+        return []
+    ids = (select(Job.id)
+           .where(Job.type == job_type, Job.status == QUEUED, Job.run_at <= func.now())
+           .order_by(Job.run_at)
+           .limit(n)
+           .with_for_update(skip_locked=True))
+    rows = db.session.execute(
+        update(Job)
+        .where(Job.id.in_(ids.scalar_subquery()))
+        .values(status=RUNNING, attempts=Job.attempts + 1,
+                locked_at=func.now(), locked_by=worker_id)
+        .returning(Job.id, Job.type, Job.payload, Job.attempts, Job.max_attempts)
+        .execution_options(synchronize_session=False)
+    ).all()
+    db.session.commit()
+    return rows
+
+
+def complete_job(job_id: UUID) -> None:
+    db.session.execute(delete(Job).where(Job.id == job_id)
+                       .execution_options(synchronize_session=False))
+    db.session.commit()
+
+
+def retry_delay(backoff_seconds: float, attempts: int) -> float:
+    # exponencial con jitter para que los fallos en masa no vuelvan todos juntos
+    delay = min(backoff_seconds * 2 ** max(attempts - 1, 0), MAX_BACKOFF_SECONDS)
+    return delay * random.uniform(0.8, 1.2)
+
+
+def fail_job(job_id: UUID, attempts: int, error: str, backoff_seconds: float = 30.0) -> None:
+    """Reencola con backoff o, agotados los intentos, lo deja en 'failed' con el error."""
+    db.session.execute(
+        update(Job)
+        .where(Job.id == job_id)
+        .values(status=case((Job.attempts >= Job.max_attempts, FAILED), else_=QUEUED),
+                run_at=func.now() + timedelta(seconds=retry_delay(backoff_seconds, attempts)),
+                locked_at=None, locked_by=None,
+                last_error=error[-MAX_ERROR_CHARS:])
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+
+
+def requeue_stale_jobs(lease_seconds: float) -> int:
+    """
+    Devuelve a la cola los jobs 'running' cuyo worker murió (lease vencido).
+    El intento ya contó al reclamarlo, así que un job que tumba al worker
+    una y otra vez termina en 'failed'.
+    """
+    result = db.session.execute(
+        update(Job)
+        .where(Job.status == RUNNING,
+               Job.locked_at < func.now() - timedelta(seconds=lease_seconds))
+        .values(status=case((Job.attempts >= Job.max_attempts, FAILED), else_=QUEUED),
+                locked_at=None, locked_by=None,
+                last_error="lease expired (worker died or job took too long)")
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def retry_failed_jobs(job_type: str | None = None) -> int:
+    active, failed = aliased(Job), aliased(Job)
+    # de varios fallidos con la misma dedupe_key se reencola solo el último
+    # (dos activos con la misma clave violarían ix_job_active_dedupe); los
+    # anteriores quedan como historial
+    newest = (select(failed.id).where(failed.status == FAILED, failed.dedupe_key.is_not(None))
+              .distinct(failed.dedupe_key)
+              .order_by(failed.dedupe_key, failed.created_at.desc(), failed.id.desc()))
+    if job_type:
+        newest = newest.where(failed.type == job_type)
+    # si ya se volvió a encolar lo mismo (misma dedupe_key), el fallido se queda
+    stmt = update(Job).where(
+        Job.status == FAILED,
+        or_(Job.dedupe_key.is_(None), Job.id.in_(newest)),
+        ~exists().where(active.dedupe_key == Job.dedupe_key,
+                        active.status.in_((QUEUED, RUNNING))))
+    if job_type:
+        stmt = stmt.where(Job.type == job_type)
+    result = db.session.execute(
+        stmt.values(status=QUEUED, attempts=0, run_at=func.now())
+        .execution_options(synchronize_session=False))
+    db.session.commit()
+    return result.rowcount
+
+
+def job_stats() -> list:
+    """Rows (type, status, n, oldest) para monitoreo."""
+    return db.session.execute(
+        select(Job.type, Job.status, func.count().label("n"),
+               func.min(Job.created_at).label("oldest"))
+        .group_by(Job.type, Job.status)
+        .order_by(Job.type, Job.status)
+    ).all()
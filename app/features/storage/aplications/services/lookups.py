@@ -0,0 +1,85 @@
+# app/features/storage/aplications/services/lookups.py
+from flask import abort
+from sqlalchemy import select
+from app.extensions import db
+from app.database.models.dataroom import Dataroom
+from app.database.models.folder import Folder
+from app.database.models.file import File
+from app.database.replica import on_primary
+from app.features.storage.infrastructure.metadata_cache import (
+    get_metadata_cache, invalidate_metadata,
+)
+from uuid import UUID
+
+
+def get_live_folder(folder_id: UUID, for_share: bool = False,
+                    for_update: bool = False) -> Folder:
+    """
+    Carpeta viva desde el primario (404 también si está en la papelera).
+    Con for_share toma FOR SHARE hasta el commit: un rename/move/borrado
+    concurrente espera, así quien escribe debajo usa un path vigente. Con
+    for_update (quien cambia el path de la carpeta o de su subárbol) la
+    lectura espera a que termine un rename concurrente de un ancestro y
+    devuelve el path ya actualizado.
+    """
+    query = Folder.query.filter(Folder.id == folder_id, Folder.deleted_at.is_(None))
+    if for_update:
+        query = query.with_for_update().populate_existing()
+    elif for_share:
+        query = query.with_for_update(read=True).populate_existing()
+    return query.first_or_404()
+
+
+def get_live_file(file_id: UUID) -> File:
+    return File.query.filter(File.id == file_id,
+                             File.deleted_at.is_(None)).first_or_404()
+
+
+def _first_row_or_404(stmt):
+    # db.first_or_404 devuelve solo la primera columna; aquí queremos la Row
+    row = db.session.execute(stmt).first()
+    if row is None:
+        abort(404)
+    return row
+
+
+def _cached_row(kind: str, key, stmt):
+    cache = get_metadata_cache()
+    if cache is None:
+        return _first_row_or_404(stmt)
+    key = str(key)
+    row = cache.get(kind, key)
+    if row is None:
+        generation = cache.generation
+        # siempre del primario: una fila vieja de la réplica quedaría en la
+        # cache con una generación vigente hasta el TTL
+        with on_primary():
+            row = _first_row_or_404(stmt)
+        cache.put(kind, key, row, generation)
+    return row
+
+
+def get_dataroom_meta(dataroom_id: UUID):
+    """Metadata de solo lectura del dataroom (Row id/name), cacheada por proceso."""
+    return _cached_row("dataroom", dataroom_id,
+                       select(Dataroom.id, Dataroom.name).where(Dataroom.id == dataroom_id))
+
+
+def get_folder_meta(folder_id: UUID):
+    """
+    Metadata de solo lectura de una carpeta viva (Row id/dataroom_id/
+    parent_id/name/path), cacheada por proceso. Solo para validar en
+    lecturas: una escritura que dependa de la carpeta (su path, que siga
+    viva) usa get_live_folder(for_share=True). El path cacheado puede estar
+    viejo (rename/move de un ancestro en otro worker): nunca usarlo para
+    armar una consulta de subárbol.
+    """
+    return _cached_row("folder", folder_id,
+                       select(Folder.id, Folder.dataroom_id, Folder.parent_id,
+                              Folder.name, Folder.path)
+                       .where(Folder.id == folder_id, Folder.deleted_at.is_(None)))
+
+
+def folders_changed(dataroom_id) -> None:
+    """Llamar antes del commit de cualquier escritura que cambie path/visibilidad de carpetas."""
+    invalidate_metadata(db.session, "folder", dataroom_id)
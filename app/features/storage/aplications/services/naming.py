@@ -0,0 +1,68 @@
+# app/features/storage/aplications/services/naming.py
+from typing import Callable, Iterable
+from sqlalchemy.exc import IntegrityError
+from app.extensions import db
+
+# constraints que indican "otro request tomó ese nombre primero"
+NAME_CONSTRAINTS = {"uq_file_name_per_folder", "uq_folder_sibling_name"}
+MAX_ATTEMPTS = 5
+
+
+def like_prefix(prefix: str) -> str:
+    # escapa comodines de LIKE para que el prefijo sea literal (usar con escape="\\")
+    return prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def split_first_dot(desired: str) -> tuple[str, str]:
+    # carpetas: "a.b.c" -> ("a", ".b.c")
+    base, dot, ext = desired.partition(".")
+    return base, f"{dot}{ext}"
+
+
+def split_extension(desired: str) -> tuple[str, str]:
+    # archivos: "a.b.pdf" -> ("a.b", ".pdf")
+    base, dot, ext = desired.rpartition(".")
+    return (base, f".{ext}") if dot else (desired, "")
+
+
+def next_free_name(desired: str, taken: set[str],
+                   split: Callable[[str], tuple[str, str]] = split_extension) -> str:
+    """Primer nombre libre entre desired, 'base (2).ext', 'base (3).ext'... (en memoria)."""
+    if desired not in taken:
+        return desired
+    base, suffix = split(desired)
+    n = 2
+    while f"{base} ({n}){suffix}" in taken:
+        n += 1
+    return f"{base} ({n}){suffix}"
+
+
+def is_name_conflict(err: IntegrityError) -> bool:
+    diag = getattr(err.orig, "diag", None)
+    return getattr(diag, "constraint_name", None) in NAME_CONSTRAINTS
+
+
+def allocate_unique_name(desired: str,
+                         sibling_names: Callable[[str], Iterable[str]],
+                         apply: Callable[[str], None],
+                         split: Callable[[str], tuple[str, str]] = split_extension) -> str:
+    """
+    Asigna un nombre único entre hermanos sin sondear candidato por candidato:
+    - sibling_names(base) trae en UNA query los nombres que empiezan por base,
+    - se elige el siguiente sufijo libre en memoria,
+    - apply(name) aplica el nombre (add/flush) dentro de un SAVEPOINT; si un
+      request concurrente ganó la carrera (unique violation) se reintenta
+      sin perder el resto de la transacción.
+    """
+    base, _ = split(desired)
+    for _ in range(MAX_ATTEMPTS):
+        name = next_free_name(desired, set(sibling_names(base)), split)
+        try:
+            with db.session.begin_nested():
+                apply(name)
+        except IntegrityError as e:
+            if not is_name_conflict(e):
+                raise
+            continue
+        return name
+    raise ValueError("Could not allocate a unique name, try again")
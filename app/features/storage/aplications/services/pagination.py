@@ -0,0 +1,89 @@
+# app/features/storage/aplications/services/pagination.py
+import base64
+import binascii
+import json
+from datetime import datetime
+from uuid import UUID
+from sqlalchemy import literal, tuple_
+from app.extensions import db
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 2000
+
+
+def encode_cursor(sort: str, values) -> str:
+    raw = json.dumps([sort, [v.isoformat() if isinstance(v, datetime) else str(v)
+                             for v in values]], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, columns) -> list:
+    """Devuelve los valores del cursor con el tipo de cada columna; ValueError si no sirve."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, values = json.loads(raw)
+    except (binascii.Error, ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort or len(values) != len(columns):
+        raise ValueError("Cursor does not match sort order")
+    out = []
+    for col, v in zip(columns, values):
+        py_type = col.type.python_type
+        if py_type is datetime:
+            v = datetime.fromisoformat(v)
+        elif py_type is UUID:
+            v = UUID(v)
+        out.append(v)
+    return out
+
+
+def sort_columns(sorts: dict, sort: str) -> tuple:
+    if sort not in sorts:
+        raise ValueError(f"Invalid sort (use one of: {', '.join(sorts)})")
+    return sorts[sort][0]
+
+
+def projection(available: dict, fields: set[str] | None, required) -> list:
+    """
+    Columnas a seleccionar: las pedidas por X-Fields (o todas si no hay
+    máscara) más las que hacen falta para ordenar y armar el cursor.
+    Nombres desconocidos se ignoran (la máscara de restx hace el resto).
+    """
+    if fields:
+        names = [n for n in available if n in fields]
+    else:
+        names = list(available)
+    cols = [available[n] for n in names]
+    cols += [c for c in required if c not in cols]
+    return cols
+
+
+def keyset_page(stmt, sort: str, sorts: dict, cursor: str | None, limit: int | None,
+                default_limit: int = DEFAULT_LIMIT, max_limit: int = MAX_LIMIT):
+    """
+    Aplica orden + keyset a `stmt` (un select de columnas) y devuelve
+    (rows, next_cursor). `sorts` mapea el nombre público del orden a
+    (columnas, descendente); la última columna debe ser única (el id) para
+    que el orden sea total y el cursor no salte ni repita filas. Sin limit
+    ni cursor devuelve todas las filas (el contrato anterior a la paginación).
+    """
+    columns = sort_columns(sorts, sort)
+    desc = sorts[sort][1]
+    if limit is None and not cursor:
+        stmt = stmt.order_by(*[c.desc() if desc else c.asc() for c in columns])
+        return db.session.execute(stmt).all(), None
+    limit = max(1, min(limit or default_limit, max_limit))
+
+    if cursor:
+        key = tuple_(*columns)
+        values = tuple_(*[literal(v, c.type)
+                          for c, v in zip(columns, decode_cursor(cursor, sort, columns))])
+        stmt = stmt.where(key < values if desc else key > values)
+    stmt = stmt.order_by(*[c.desc() if desc else c.asc() for c in columns]).limit(limit + 1)
+
+    rows = db.session.execute(stmt).all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]._mapping
+    return rows, encode_cursor(sort, [last[c] for c in columns])
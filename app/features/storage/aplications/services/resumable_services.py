@@ -0,0 +1,228 @@
+# app/features/storage/aplications/services/resumable_services.py
+import fcntl
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import timedelta
+from sqlalchemy import select, update
+from werkzeug.exceptions import Conflict, Gone, NotFound
+from werkzeug.utils import secure_filename
+from app.extensions import db
+from app.database.models.file import File
+from app.database.models.mixins import utcnow
+from app.database.models.upload_session import UploadSession
+from app.features.storage.aplications.services.lookups import get_dataroom_meta, get_live_folder
+from app.features.storage.aplications.services.storege_services import (
+    DEFAULT_CHUNK_SIZE, discard, ingest_staged_file, is_pdf, sha256_file,
+)
+from app.features.storage.infrastructure.storage_backend import StorageBackend
+from app.metrics import count_upload_bytes
+from uuid import UUID
+
+DEFAULT_MAX_SIZE = 1024 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 24 * 3600
+
+# Estado SHA-256 incremental por subida: {upload_id: (offset, hasher)}.
+# hashlib no se puede serializar, así que vive en memoria del proceso; si el
+# siguiente PATCH cae en otro worker (o tras un reinicio) el estado no sirve
+# y el finalize re-hashea el staging local una sola vez.
+_MAX_HASHERS = 256
+_hashers: "OrderedDict[UUID, tuple[int, object]]" = OrderedDict()
+_hashers_lock = threading.Lock()
+
+
+def _take_hasher(upload_id: UUID, offset: int):
+    with _hashers_lock:
+        cached = _hashers.pop(upload_id, None)
+    if cached and cached[0] == offset:
+        return cached[1]
+    return hashlib.sha256() if offset == 0 else None
+
+
+def _keep_hasher(upload_id: UUID, offset: int, hasher) -> None:
+    if hasher is None:
+        return
+    with _hashers_lock:
+        _hashers[upload_id] = (offset, hasher)
+        while len(_hashers) > _MAX_HASHERS:
+            _hashers.popitem(last=False)
+
+
+def _locked_session(upload_id: UUID) -> UploadSession:
+    # serializa finalize/cancel concurrentes sobre la misma subida (transacción corta)
+    up = db.session.execute(
+        select(UploadSession).where(UploadSession.id == upload_id).with_for_update()
+    ).scalar_one_or_none()
+    if up is None or up.expires_at < utcnow():
+        raise NotFound("Upload not found or expired")
+    return up
+
+
+def _live_session(upload_id: UUID) -> UploadSession:
+    up = db.session.get(UploadSession, upload_id)
+    if up is None or up.expires_at < utcnow():
+        raise NotFound("Upload not found or expired")
+    return up
+
+
+@contextmanager
+def _staging_lock(path: str):
+    """
+    flock exclusivo sobre el staging (local al nodo, como el archivo): un
+    PATCH y un finalize de la misma subida no se pisan, sin retener una
+    transacción mientras el cliente manda el cuerpo. Si otro request lo
+    tiene, 409 y el cliente reintenta tras consultar HEAD.
+    """
+    try:
+        fd = os.open(path, os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        db.session.rollback()
+        raise Gone("Upload data is no longer available, start a new upload")
+    with os.fdopen(fd, "ab") as fh:
+        try:
+            fcntl.flock(fh, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            db.session.rollback()
+            raise Conflict("Another request is writing this upload")
+        yield fh  # cerrar el archivo libera el lock
+
+
+def create_upload(dataroom_id: UUID, folder_id: UUID, filename: str, length: int,
+                  storage: StorageBackend, max_size: int = DEFAULT_MAX_SIZE,
+                  ttl_seconds: int = DEFAULT_TTL_SECONDS) -> UploadSession:
+    dr = get_dataroom_meta(dataroom_id)
+    folder = get_live_folder(folder_id, for_share=True)
+    if folder.dataroom_id != dr.id:
+        raise ValueError("Folder does not belong to dataroom")
+
+    filename = secure_filename(filename or "")
+    if not filename:
+        raise ValueError("Empty filename")
+    if not is_pdf(filename, None):
+        raise ValueError("Only PDF files are allowed")
+    if length is None or length <= 0:
+        raise ValueError("Invalid upload length")
+    if length > max_size:
+        raise ValueError(f"File too large (max {max_size} bytes)")
+
+    up = UploadSession(dataroom_id=dr.id, folder_id=folder.id, filename=filename,
+                       upload_length=length, staging_path="",
+                       expires_at=utcnow() + timedelta(seconds=ttl_seconds))
+    db.session.add(up)
+    db.session.flush()  # necesitamos el id para el nombre del staging
+    up.staging_path = os.path.join(storage.staging_dir, f"resumable-{up.id.hex}.part")
+    open(up.staging_path, "wb").close()
+    db.session.commit()
+    return up
+
+
+def _staged_size(up: UploadSession) -> int:
+    # el staging es local al nodo: pudo perderse (reinicio, otro pod, limpieza)
+    try:
+        return os.path.getsize(up.staging_path)
+    except FileNotFoundError:
+        db.session.rollback()
+        raise Gone("Upload data is no longer available, start a new upload")
+
+
+def get_upload(upload_id: UUID) -> tuple[UploadSession, int]:
+    up = UploadSession.query.get_or_404(upload_id)
+    if up.expires_at < utcnow():
+        raise NotFound("Upload not found or expired")
+    return up, _staged_size(up)
+
+
+def append_chunk(upload_id: UUID, offset: int, stream,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 ttl_seconds: int = DEFAULT_TTL_SECONDS) -> int:
+    """
+    Agrega el cuerpo del PATCH al staging si `offset` coincide con lo ya
+    recibido (si no, 409 y el cliente consulta HEAD). Devuelve el nuevo offset.
+    La transacción se cierra antes de leer el cuerpo: un cliente lento no deja
+    la conexión "idle in transaction"; los PATCH se serializan con el flock.
+    """
+    up = _live_session(upload_id)
+    upload_id, staging_path, upload_length = up.id, up.staging_path, up.upload_length
+    db.session.rollback()
+
+    with _staging_lock(staging_path) as out:
+        current = os.fstat(out.fileno()).st_size
+        if offset != current:
+            raise Conflict(f"Upload-Offset mismatch (server has {current})")
+        hasher = _take_hasher(upload_id, current)
+        written = current
+        try:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                if written + len(chunk) > upload_length:
+                    raise ValueError("Chunk exceeds declared Upload-Length")
+                out.write(chunk)
+                written += len(chunk)
+                if hasher is not None:
+                    hasher.update(chunk)
+            out.flush()
+        finally:
+            # lo escrito queda (como en tus): el próximo PATCH sigue desde ahí
+            _keep_hasher(upload_id, written, hasher)
+            count_upload_bytes(written - current, "resumable")
+
+    # un UPDATE corto después de la escritura; 0 filas = cancelada o purgada
+    # mientras se recibía
+    renewed = db.session.execute(
+        update(UploadSession)
+        .where(UploadSession.id == upload_id)
+        .values(expires_at=utcnow() + timedelta(seconds=ttl_seconds))
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    if not renewed:
+        raise NotFound("Upload not found or expired")
+    return written
+
+
+def finalize_upload(upload_id: UUID, storage: StorageBackend) -> File:
+    up = _live_session(upload_id)
+    staging_path, upload_length = up.staging_path, up.upload_length
+    db.session.rollback()
+
+    with _staging_lock(staging_path) as fh:
+        size = os.fstat(fh.fileno()).st_size
+        if size != upload_length:
+            raise Conflict(f"Upload incomplete ({size}/{upload_length} bytes)")
+        # el flock basta para que nadie escriba: si el estado incremental
+        # quedó en otro proceso, el re-hash corre sin transacción abierta
+        # (ni la fila bloqueada, ni una conexión retenida)
+        hasher = _take_hasher(upload_id, size)
+        checksum = hasher.hexdigest() if hasher is not None else sha256_file(staging_path)
+
+        up = _locked_session(upload_id)
+
+        # la carpeta pudo ir a la papelera mientras se subía: ingest_staged_file
+        # la vuelve a leer (y bloquea) del primario. El File y el borrado de la
+        # sesión se confirman juntos en el mismo commit. Si algo falla el staging
+        # se conserva y el cliente puede reintentar el finalize
+        db.session.delete(up)
+        return ingest_staged_file(up.dataroom_id, up.folder_id, up.filename,
+                                  up.staging_path, size, checksum, storage,
+                                  keep_on_error=True)
+
+
+def cancel_upload(upload_id: UUID) -> None:
+    up = _locked_session(upload_id)
+    _take_hasher(up.id, -1)
+    discard(up.staging_path)
+    db.session.delete(up)
+    db.session.commit()
+
+
+def purge_expired_uploads() -> int:
+    expired = db.session.execute(
+        select(UploadSession).where(UploadSession.expires_at < utcnow())
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    for up in expired:
+        discard(up.staging_path)
+        db.session.delete(up)
+    db.session.commit()
+    return len(expired)
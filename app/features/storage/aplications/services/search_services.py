@@ -0,0 +1,288 @@
+# app/features/storage/aplications/services/search_services.py
+import logging
+import os
+from flask import current_app
+from sqlalchemy import select, update, func, cast, literal
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from app.extensions import db
+from app.database.models.blob import Blob
+from app.database.models.file import File
+from app.database.models.folder import Folder
+from app.database.models.mixins import utcnow
+from app.features.storage.aplications.services.jobs_services import enqueue_many, job_handler
+from app.features.storage.aplications.services.lookups import get_dataroom_meta
+from app.features.storage.aplications.services.naming import like_prefix
+from app.features.storage.infrastructure.storage_backend import StorageBackend, local_copy
+from uuid import UUID
+
+log = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_TEXT_CONFIG = "simple"
+# to_tsvector falla por encima de ~1 MB; con esto sobra para cualquier contrato
+MAX_TEXT_CHARS = 500_000
+DEFAULT_SEARCH_LIMIT = 20
+MAX_SEARCH_LIMIT = 100
+EXTRACT_TEXT_JOB = "extract_text"
+
+
+def _regconfig(text_config: str):
+    return cast(literal(text_config), REGCONFIG)
+
+
+def _pdf_text(path: str) -> str:
+    from pypdf import PdfReader  # dependencia opcional
+
+    parts, size = [], 0
+    for page in PdfReader(path).pages:
+        chunk = page.extract_text() or ""
+        parts.append(chunk)
+        size += len(chunk)
+        if size >= MAX_TEXT_CHARS:
+            break
+    # Postgres no admite NUL en text
+    return "\n".join(parts)[:MAX_TEXT_CHARS].replace("\x00", "").strip()
+
+
+def pdf_text_available() -> bool:
+    try:
+        import pypdf  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def extract_blob_text(storage: StorageBackend, checksum: str, storage_path: str,
+                      text_config: str = DEFAULT_TEXT_CONFIG) -> bool:
+    """
+    Extrae el texto de un blob y lo guarda (texto + tsvector) si sigue
+    pendiente. La lectura del PDF corre fuera de transacción para no
+    bloquear uploads del mismo contenido. Un PDF ilegible queda marcado
+    sin vector para no reintentarlo; un error leyendo del storage se
+    propaga (es transitorio: que reintente la cola). Devuelve si había texto.
+    """
+    content = None
+    path, is_temp = local_copy(storage, storage_path)
+    try:
+        content = _pdf_text(path)
+    except Exception:
+        log.warning("search: could not extract text from %s", storage_path, exc_info=True)
+    finally:
+        if is_temp:
+            os.remove(path)
+
+    db.session.execute(
+        update(Blob)
+        .where(Blob.checksum_sha256 == checksum, Blob.text_extracted_at.is_(None))
+        .values(text_extracted_at=utcnow(),
+                text_content=content or None,
+                search_vector=func.to_tsvector(_regconfig(text_config), content)
+                if content else None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return bool(content)
+
+
+def extract_pending_text(storage: StorageBackend, batch_size: int = DEFAULT_BATCH_SIZE,
+                         text_config: str = DEFAULT_TEXT_CONFIG) -> int:
+    """
+    Indexa los blobs con text_extracted_at NULL (índice parcial) por lotes.
+    Es por checksum: un contenido ya indexado no se vuelve a procesar aunque
+    se suba otra vez a otra carpeta o dataroom.
+    """
+    if not pdf_text_available():
+        log.warning("search: pypdf is not installed, skipping text extraction")
+        return 0
+    total, skipped = 0, set()
+    while True:
+        stmt = (select(Blob.checksum_sha256, Blob.storage_path)
+                .where(Blob.text_extracted_at.is_(None), Blob.ref_count > 0)
+                .limit(batch_size))
+        if skipped:
+            stmt = stmt.where(Blob.checksum_sha256.notin_(skipped))
+        rows = db.session.execute(stmt).all()
+        db.session.rollback()  # no retener la transacción mientras se lee el PDF
+        for r in rows:
+            try:
+                extract_blob_text(storage, r.checksum_sha256, r.storage_path, text_config)
+            except Exception:
+                # queda pendiente para la próxima corrida
+                log.warning("search: could not read %s", r.storage_path, exc_info=True)
+                db.session.rollback()
+                skipped.add(r.checksum_sha256)
+        total += len(rows)
+        if len(rows) < batch_size:
+            return total
+
+
+def reset_empty_extractions() -> int:
+    """Vuelve a dejar pendientes los blobs que quedaron sin texto (p.ej. tras instalar OCR)."""
+    result = db.session.execute(
+        update(Blob)
+        .where(Blob.text_extracted_at.isnot(None), Blob.search_vector.is_(None))
+        .values(text_extracted_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    db.session.commit()
+    return result.rowcount
+
+
+def enqueue_text_extraction(checksums) -> None:
+    """
+    Llamar dentro de la transacción del upload: encola un job por cada blob
+    del lote que siga sin indexar (un contenido ya indexado no genera job).
+    """
+    if not current_app.config.get("SEARCH_EXTRACT_ENABLED", False) or not checksums:
+        return
+    pending = db.session.execute(
+        select(Blob.checksum_sha256)
+        .where(Blob.checksum_sha256.in_(sorted(set(checksums))),
+               Blob.text_extracted_at.is_(None))
+    ).scalars().all()
+    enqueue_many(EXTRACT_TEXT_JOB,
+                 [({"checksum": c}, f"{EXTRACT_TEXT_JOB}:{c}") for c in pending])
+
+
+def enqueue_pending_text(batch_size: int = 1000) -> int:
+    """Encola todos los blobs pendientes (backfill); lo procesan los workers."""
+    total, last = 0, ""
+    while True:
+        batch = db.session.execute(
+            select(Blob.checksum_sha256)
+            .where(Blob.text_extracted_at.is_(None), Blob.ref_count > 0,
+                   Blob.checksum_sha256 > last)
+            .order_by(Blob.checksum_sha256)
+            .limit(batch_size)
+        ).scalars().all()
+        if not batch:
+            return total
+        enqueue_many(EXTRACT_TEXT_JOB,
+                     [({"checksum": c}, f"{EXTRACT_TEXT_JOB}:{c}") for c in batch])
+        db.session.commit()
+        total += len(batch)
+        last = batch[-1]
+
+
+@job_handler(EXTRACT_TEXT_JOB, concurrency=4, max_attempts=5, backoff_seconds=30)
+def _extract_text_job(payload: dict) -> None:
+    checksum = payload["checksum"]
+    row = db.session.execute(
+        select(Blob.storage_path)
+        .where(Blob.checksum_sha256 == checksum, Blob.text_extracted_at.is_(None),
+               Blob.ref_count > 0)
+    ).first()
+    db.session.rollback()
+    if row is None:
+        return  # ya indexado (otro job/CLI) o el blob se borró
+    if not pdf_text_available():
+        # falla (y queda en 'failed' tras los reintentos) en vez de perder el job
+        raise RuntimeError("pypdf is not installed in the worker")
+    extract_blob_text(current_app.extensions["storage"], checksum, row.storage_path,
+                      current_app.config.get("SEARCH_TEXT_CONFIG", DEFAULT_TEXT_CONFIG))
+
+
+def search_files(dataroom_id: UUID, q: str, limit: int = DEFAULT_SEARCH_LIMIT,
+                 text_config: str = DEFAULT_TEXT_CONFIG) -> list:
+    """
+    Archivos vivos del dataroom cuyo contenido coincide con `q` (sintaxis
+    websearch: "frase exacta", -excluir, OR), ordenados por ts_rank_cd. El
+    snippet (ts_headline, caro) se calcula solo para la página ya limitada.
+    """
+    get_dataroom_meta(dataroom_id)
+    q = (q or "").strip()
+    if not q:
+        raise ValueError("Empty query")
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT))
+
+    cfg = _regconfig(text_config)
+    query = func.websearch_to_tsquery(cfg, q)
+    rank = func.ts_rank_cd(Blob.search_vector, query).label("rank")
+    hits = (
+        select(File.id, File.name, File.folder_id, File.size_bytes,
+               Folder.path.label("folder_path"), File.checksum_sha256, rank)
+        .join(Blob, Blob.checksum_sha256 == File.checksum_sha256)
+        .join(Folder, Folder.id == File.folder_id)
+        .where(File.dataroom_id == dataroom_id,
+               File.deleted_at.is_(None),
+               Folder.deleted_at.is_(None),
+               Blob.search_vector.op("@@")(query))
+        .order_by(rank.desc(), File.id)
+        .limit(limit)
+        .subquery()
+    )
+    snippet = func.ts_headline(cfg, Blob.text_content, query,
+                               "MaxFragments=2, MaxWords=25, MinWords=8").label("snippet")
+    return db.session.execute(
+        select(hits.c.id, hits.c.name, hits.c.folder_id, hits.c.folder_path,
+               hits.c.size_bytes, hits.c.rank, snippet)
+        .join(Blob, Blob.checksum_sha256 == hits.c.checksum_sha256)
+        .order_by(hits.c.rank.desc(), hits.c.id)
+    ).all()
+
+
+NAME_SEARCH_MODES = ("prefix", "substring", "fuzzy")
+NAME_SEARCH_TYPES = ("all", "files", "folders")
+# por debajo de un trigrama el índice no sirve para '%x%' ni para similitud
+MIN_TRGM_CHARS = 3
+
+
+def search_names(dataroom_id: UUID, q: str, mode: str = "substring", kind: str = "all",
+                 limit: int = DEFAULT_SEARCH_LIMIT) -> list[dict]:
+    """
+    Busca por nombre de archivo y por path de carpeta dentro del dataroom
+    (solo filas vivas), apoyado en los índices GIN pg_trgm:
+    - prefix:    ILIKE 'q%'
+    - substring: ILIKE '%q%'
+    - fuzzy:     q <% columna (word_similarity, tolera errores de tipeo)
+    Los resultados de ambas tablas se ordenan juntos por similitud.
+    """
+    get_dataroom_meta(dataroom_id)
+    q = (q or "").strip()
+    if not q:
+        raise ValueError("Empty query")
+    if mode not in NAME_SEARCH_MODES:
+        raise ValueError(f"Invalid mode (use one of: {', '.join(NAME_SEARCH_MODES)})")
+    if kind not in NAME_SEARCH_TYPES:
+        raise ValueError(f"Invalid type (use one of: {', '.join(NAME_SEARCH_TYPES)})")
+    if mode != "prefix" and len(q) < MIN_TRGM_CHARS:
+        raise ValueError(f"Query must have at least {MIN_TRGM_CHARS} characters for {mode} search")
+    limit = max(1, min(limit or DEFAULT_SEARCH_LIMIT, MAX_SEARCH_LIMIT))
+
+    def matches(col):
+        if mode == "fuzzy":
+            return literal(q).op("<%")(col)
+        pattern = like_prefix(q)
+        return col.ilike(pattern if mode == "prefix" else "%" + pattern, escape="\\")
+
+    def score(col):
+        return (func.word_similarity(q, col) if mode == "fuzzy"
+                else func.similarity(col, q)).label("score")
+
+    hits = []
+    if kind in ("all", "files"):
+        s = score(File.name)
+        for r in db.session.execute(
+                select(File.id, File.name, File.folder_id, Folder.path, s)
+                .join(Folder, Folder.id == File.folder_id)
+                .where(File.dataroom_id == dataroom_id, File.deleted_at.is_(None),
+                       Folder.deleted_at.is_(None), matches(File.name))
+                .order_by(s.desc(), File.name)
+                .limit(limit)):
+            hits.append({"type": "file", "id": str(r.id), "name": r.name,
+                         "path": f"{r.path}/{r.name}", "parent_id": str(r.folder_id),
+                         "score": r.score})
+    if kind in ("all", "folders"):
+        s = score(Folder.path)
+        for r in db.session.execute(
+                select(Folder.id, Folder.name, Folder.path, Folder.parent_id, s)
+                .where(Folder.dataroom_id == dataroom_id, Folder.deleted_at.is_(None),
+                       matches(Folder.path))
+                .order_by(s.desc(), Folder.path)
+                .limit(limit)):
+            hits.append({"type": "folder", "id": str(r.id), "name": r.name, "path": r.path,
+                         "parent_id": str(r.parent_id) if r.parent_id else None,
+                         "score": r.score})
+
+    hits.sort(key=lambda h: (-h["score"], h["path"]))
+    return hits[:limit]
@@ -1,113 +1,344 @@
+import logging
 import os
 import hashlib
-import uuid
+import tempfile
+import time
+from collections import Counter
+from sqlalchemy import select, update, delete, values, column, String, Integer
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 from app.extensions import db
+from app.database.models.blob import Blob
 from app.database.models.file import File
-from app.database.models.folder import Folder
-from app.database.models.dataroom import Dataroom
+from app.database.replica import read_replica
+from app.features.storage.aplications.services.lookups import (
+    get_dataroom_meta, get_folder_meta, get_live_file, get_live_folder,
+)
+from app.features.storage.aplications.services.naming import allocate_unique_name, like_prefix
+from app.features.storage.aplications.services.cleanup_services import schedule_reap
+from app.features.storage.aplications.services.search_services import enqueue_text_extraction
+from app.features.storage.aplications.services.thumbnail_services import enqueue_thumbnails
+from app.features.storage.infrastructure.storage_backend import StorageBackend, local_copy
+from app.metrics import count_upload_bytes, observe_upload_phase
 from uuid import UUID
 
+log = logging.getLogger(__name__)
 
-def _is_pdf(filename: str, content_type: str | None) -> bool:
+
+def is_pdf(filename: str, content_type: str | None) -> bool:
     return (filename.lower().endswith(".pdf")) or (content_type and content_type.startswith("application/pdf"))
 
 
-def _unique_file_name(folder_id, desired: str) -> str:
-    exists = db.session.query(File.query.filter_by(
-        folder_id=folder_id, name=desired).exists()).scalar()
-    if not exists:
-        return desired
-    base, dot, ext = desired.rpartition(".")
-    base = base if dot else desired
-    ext = ext if dot else ""
-    n = 2
-    while True:
-        candidate = f"{base} ({n}).{ext}" if ext else f"{base} ({n})"
-        exists = db.session.query(File.query.filter_by(
-            folder_id=folder_id, name=candidate).exists()).scalar()
-        if not exists:
-            return candidate
-        n += 1
+def _file_names_like(folder_id, base: str, exclude_id=None) -> list[str]:
+    # una sola query: todos los archivos de la carpeta cuyo nombre empieza por `base`
+    stmt = select(File.name).where(
+        File.folder_id == folder_id,
+        File.name.like(like_prefix(base), escape="\\"),
+    )
+    if exclude_id is not None:
+        stmt = stmt.where(File.id != exclude_id)
+    return db.session.execute(stmt).scalars().all()
+
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+BLOBS_DIR = "blobs"
+
+
+def stage_upload(stream, staging_dir: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE) -> tuple[str, int, str]:
+    """
+    Lee el stream UNA sola vez: cada chunk se hashea y se escribe en un
+    temporal dentro de staging_dir (en el driver local, mismo filesystem que
+    los blobs para renombrar atómicamente). Devuelve (ruta_temporal, tamaño, sha256).
+    """
+    os.makedirs(staging_dir, exist_ok=True)
+    started = time.perf_counter()
+    sha = hashlib.sha256()
+    size = 0
+    fd, tmp_path = tempfile.mkstemp(dir=staging_dir, prefix=".upload-", suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in iter(lambda: stream.read(chunk_size), b""):
+                sha.update(chunk)
+                out.write(chunk)
+                size += len(chunk)
+    except BaseException:
+        # no dejamos temporales huérfanos si el cliente corta la subida
+        discard(tmp_path)
+        raise
+    observe_upload_phase("stage", time.perf_counter() - started)
+    count_upload_bytes(size)
+    return tmp_path, size, sha.hexdigest()
+
+
+def discard(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def put_linked(storage: StorageBackend, key: str, path: str) -> None:
+    # put_file consume lo que recibe: se le pasa un hard link (mismo
+    # directorio, mismo filesystem) y `path` sigue en el staging
+    link = f"{path}.{os.getpid()}.{time.monotonic_ns()}.link"
+    os.link(path, link)
+    try:
+        storage.put_file(key, link, content_type="application/pdf")
+    finally:
+        discard(link)
 
 
-def _compute_sha256(stream) -> str:
+def sha256_file(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> str:
     sha = hashlib.sha256()
-    for chunk in iter(lambda: stream.read(8192), b""):
-        sha.update(chunk)
-    stream.seek(0)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(chunk_size), b""):
+            sha.update(chunk)
     return sha.hexdigest()
 
 
-def upload_pdf(dataroom_id: UUID, folder_id: UUID, file_storage, upload_dir: str) -> File:
-    dr = Dataroom.query.get_or_404(dataroom_id)
-    folder = Folder.query.get_or_404(folder_id)
+def blob_key(checksum: str) -> str:
+    # layout content-addressed: blobs/ab/cd/<sha256>
+    return "/".join((BLOBS_DIR, checksum[:2], checksum[2:4], checksum))
+
+
+def _acquire_blob(checksum: str, size_bytes: int) -> str:
+    """
+    Suma una referencia al blob (lo crea si no existe) y devuelve su clave.
+    El upsert deja la fila bloqueada hasta el commit, así un borrado
+    concurrente no puede eliminar el archivo físico entre medio.
+    """
+    stmt = (pg_insert(Blob)
+            .values(checksum_sha256=checksum, storage_path=blob_key(checksum),
+                    size_bytes=size_bytes, ref_count=1)
+            .on_conflict_do_update(
+                index_elements=[Blob.checksum_sha256],
+                set_={"ref_count": Blob.ref_count + 1})
+            .returning(Blob.storage_path))
+    return db.session.execute(stmt).scalar_one()
+
+
+def release_blob_refs(refs) -> list[str]:
+    """
+    Descuenta referencias de muchos archivos [(checksum, storage_path)] en un
+    solo UPDATE. Los blobs que quedan en 0 no se tocan aquí: el reaper los
+    borra en background. Devuelve las rutas de uploads antiguos (fuera del
+    blob store) para que el reaper también las elimine.
+    """
+    counts: Counter = Counter()
+    legacy = []
+    for checksum, storage_path in refs:
+        if checksum and storage_path == blob_key(checksum):
+            counts[checksum] += 1
+        else:
+            # upload antiguo (<dataroom>/<folder>/<uuid>.pdf): no está en el blob store
+            legacy.append(storage_path)
+    if counts:
+        released = (values(column("checksum_sha256", String), column("n", Integer),
+                           name="released")
+                    .data(sorted(counts.items())))
+        db.session.execute(
+            update(Blob)
+            .where(Blob.checksum_sha256 == released.c.checksum_sha256)
+            .values(ref_count=Blob.ref_count - released.c.n)
+            .execution_options(synchronize_session=False)
+        )
+    return legacy
+
+
+def resolve_upload_target(dataroom_id: UUID, folder_id: UUID) -> tuple[UUID, UUID]:
+    """Valida destino de un upload (carpeta viva del dataroom); devuelve (dataroom_id, folder_id)."""
+    dr = get_dataroom_meta(dataroom_id)
+    folder = get_folder_meta(folder_id)
     if folder.dataroom_id != dr.id:
         raise ValueError("Folder does not belong to dataroom")
+    return dr.id, folder.id
 
-    filename = secure_filename(file_storage.filename or "")
+
+def clean_pdf_filename(filename: str | None, content_type: str | None) -> str:
+    filename = secure_filename(filename or "")
     if not filename:
         raise ValueError("Empty filename")
-    if not _is_pdf(filename, file_storage.mimetype):
+    if not is_pdf(filename, content_type):
         raise ValueError("Only PDF files are allowed")
+    return filename
 
-    # calcula checksum para info/dedupe opcional
-    checksum = _compute_sha256(file_storage.stream)
-
-    # genera ruta en disco: uploads/<dataroom>/<folder>/<uuid>.pdf
-    ext = ".pdf" if not filename.lower().endswith(".pdf") else ""
-    disk_name = f"{uuid.uuid4().hex}{ext}"
-    dir_path = os.path.join(upload_dir, str(dr.id), str(folder.id))
-    os.makedirs(dir_path, exist_ok=True)
-    disk_path = os.path.join(dir_path, disk_name)
-    file_storage.save(disk_path)
-    size_bytes = os.path.getsize(disk_path)
-
-    # nombre visible único por carpeta
-    visible_name = _unique_file_name(folder.id, filename)
-
-    entity = File(
-        name=visible_name,
-        original_filename=filename,
-        content_type="application/pdf",
-        size_bytes=size_bytes,
-        storage_path=disk_path,
-        checksum_sha256=checksum,
-        version=1,
-        folder_id=folder.id,
-        dataroom_id=dr.id,
-    )
-    db.session.add(entity)
-    db.session.commit()
-    return entity
 
+def upload_pdf(dataroom_id: UUID, folder_id: UUID, file_storage, storage: StorageBackend,
+               chunk_size: int = DEFAULT_CHUNK_SIZE) -> File:
+    dataroom_id, folder_id = resolve_upload_target(dataroom_id, folder_id)
+    filename = clean_pdf_filename(file_storage.filename, file_storage.mimetype)
 
-def get_file_by_id(file_id: UUID) -> File:
-    return File.query.get_or_404(file_id)
+    # checksum y escritura en la misma pasada sobre el stream
+    tmp_path, size_bytes, checksum = stage_upload(
+        file_storage.stream, storage.staging_dir, chunk_size=chunk_size)
+    return ingest_staged_file(dataroom_id, folder_id, filename, tmp_path, size_bytes,
+                              checksum, storage)
 
 
-def get_file_disk_path(file: File) -> str:
-    return file.storage_path
+def ingest_staged_file(dataroom_id, folder_id, filename: str, tmp_path: str,
+                       size_bytes: int, checksum: str, storage: StorageBackend,
+                       keep_on_error: bool = False) -> File:
+    """
+    Registra un archivo ya preparado en staging (hash conocido): referencia o
+    crea el blob, lo coloca en el storage y hace commit del File. El
+    temporal se consume (o se borra si algo falla). Con keep_on_error el
+    temporal se conserva hasta el commit y sobrevive a un error: lo usa el
+    finalize reanudable, que el cliente puede reintentar.
+    """
+    try:
+        # resolve_upload_target valida contra la cache; aquí, dentro de la
+        # transacción, la carpeta tiene que seguir viva hasta el commit
+        get_live_folder(folder_id, for_share=True)
+        # contenido idéntico (aunque sea de otro dataroom) comparte el mismo blob
+        storage_key = _acquire_blob(checksum, size_bytes)
+        started = time.perf_counter()
+        if storage.stat(storage_key) is None:
+            if keep_on_error:
+                put_linked(storage, storage_key, tmp_path)
+            else:
+                storage.put_file(storage_key, tmp_path, content_type="application/pdf")
+        elif not keep_on_error:
+            discard(tmp_path)
+        observe_upload_phase("blob_write", time.perf_counter() - started)
+
+        entity = File(
+            original_filename=filename,
+            content_type="application/pdf",
+            size_bytes=size_bytes,
+            storage_path=storage_key,
+            checksum_sha256=checksum,
+            version=1,
+            folder_id=folder_id,
+            dataroom_id=dataroom_id,
+        )
+
+        def _apply(unique: str) -> None:
+            entity.name = unique
+            db.session.add(entity)
+
+        # nombre visible único por carpeta (savepoint + reintento si hay carrera)
+        allocate_unique_name(filename, lambda base: _file_names_like(folder_id, base), _apply)
+        # indexado de texto en el worker; el job se confirma con el upload
+        enqueue_text_extraction([checksum])
+        enqueue_thumbnails([storage_key])
+        started = time.perf_counter()
+        db.session.commit()
+        observe_upload_phase("commit", time.perf_counter() - started)
+    except BaseException:
+        db.session.rollback()
+        if not keep_on_error:
+            discard(tmp_path)
+        raise
+    if keep_on_error:
+        discard(tmp_path)
+    return entity
+
+
+@read_replica
+def get_file_by_id(file_id: UUID) -> File:
+    return get_live_file(file_id)
 
 
 def rename_file(file_id: UUID, new_name: str) -> File:
-    f = File.query.get_or_404(file_id)
+    f = get_live_file(file_id)
     new_name = secure_filename(new_name).replace("_", " ").strip()
     if not new_name:
         raise ValueError("Invalid name")
-    new_name = _unique_file_name(f.folder_id, new_name)
-    f.name = new_name
+    if new_name == f.name:
+        return f
+
+    def _apply(unique: str) -> None:
+        f.name = unique
+
+    allocate_unique_name(
+        new_name,
+        lambda base: _file_names_like(f.folder_id, base, exclude_id=f.id),
+        _apply,
+    )
     db.session.commit()
     return f
 
 
 def delete_file(file_id: UUID) -> None:
-    f = File.query.get_or_404(file_id)
-    try:
-        if f.storage_path and os.path.exists(f.storage_path):
-            os.remove(f.storage_path)
-    except Exception:
-        # si falla borrar archivo físico, igual borramos metadata (decisión de negocio)
-        pass
-    db.session.delete(f)
+    # borrado definitivo (sin pasar por la papelera); también para archivos ya en ella.
+    # DELETE ... RETURNING: solo quien borra la fila libera su referencia al
+    # blob (dos borrados concurrentes no la descuentan dos veces)
+    row = db.session.execute(
+        delete(File)
+        .where(File.id == file_id)
+        .returning(File.checksum_sha256, File.storage_path)
+        .execution_options(synchronize_session=False)
+    ).first()
+    if row is None:
+        db.session.rollback()
+        raise NotFound()
+    # solo metadata en el request; el archivo físico lo borra el reaper
+    # cuando se va la última referencia al blob
+    legacy = release_blob_refs([row])
     db.session.commit()
+    schedule_reap(legacy)
+
+
+def adopt_legacy_files(storage: StorageBackend, batch_size: int = 100) -> tuple[int, int]:
+    """
+    Pasa al blob store los archivos subidos antes de él (<dataroom>/<folder>/
+    <uuid>.pdf, sin fila Blob): hashea, coloca el contenido en blobs/ab/cd/<sha>,
+    suma la referencia y apunta el File al blob; el archivo viejo se borra
+    después del commit. Sin fila Blob un archivo no se indexa ni aparece en
+    search_files. Un archivo por transacción; los que no se pueden leer se
+    saltan (quedan para la próxima corrida). Devuelve (adoptados, saltados).
+    """
+    adopted, skipped, last = 0, 0, None
+    while True:
+        stmt = (select(File.id, File.storage_path)
+                .where(File.storage_path.notlike(f"{BLOBS_DIR}/%"))
+                .order_by(File.id).limit(batch_size))
+        if last is not None:
+            stmt = stmt.where(File.id > last)
+        rows = db.session.execute(stmt).all()
+        db.session.rollback()  # nada abierto mientras se lee el archivo
+        for r in rows:
+            try:
+                path, is_temp = local_copy(storage, r.storage_path)
+            except Exception:
+                log.warning("legacy: could not read %s", r.storage_path, exc_info=True)
+                skipped += 1
+                continue
+            try:
+                size_bytes = os.path.getsize(path)
+                checksum = sha256_file(path)
+                # como ingest_staged_file: la ref primero (fila bloqueada, el
+                # reaper no puede borrar el blob) y después el contenido
+                key = _acquire_blob(checksum, size_bytes)
+                if storage.stat(key) is None:
+                    if is_temp:
+                        storage.put_file(key, path, content_type="application/pdf")
+                    else:
+                        put_linked(storage, key, path)
+                moved = db.session.execute(
+                    update(File)
+                    .where(File.id == r.id, File.storage_path == r.storage_path)
+                    .values(storage_path=key, checksum_sha256=checksum, size_bytes=size_bytes)
+                    .execution_options(synchronize_session=False)
+                ).rowcount
+                if not moved:
+                    db.session.rollback()  # borrado o ya adoptado mientras tanto
+                    continue
+                enqueue_text_extraction([checksum])
+                enqueue_thumbnails([key])
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                log.warning("legacy: could not adopt %s", r.storage_path, exc_info=True)
+                skipped += 1
+                continue
+            finally:
+                if is_temp:
+                    discard(path)
+            storage.delete(r.storage_path)
+            adopted += 1
+        if len(rows) < batch_size:
+            return adopted, skipped
+        last = rows[-1].id
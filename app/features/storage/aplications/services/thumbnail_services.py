@@ -0,0 +1,120 @@
+# app/features/storage/aplications/services/thumbnail_services.py
+import logging
+import os
+import tempfile
+import threading
+from flask import current_app
+from app.features.storage.aplications.services.jobs_services import enqueue_many, job_handler
+from app.features.storage.infrastructure.storage_backend import StorageBackend, local_copy
+
+log = logging.getLogger(__name__)
+
+# tamaños admitidos (lado mayor en px): un conjunto cerrado evita que
+# cualquier ?size= genere y guarde una imagen nueva
+THUMBNAIL_SIZES = (128, 256, 512, 1024)
+DEFAULT_THUMBNAIL_SIZE = 256
+THUMBNAIL_CONTENT_TYPE = "image/webp"
+THUMBNAIL_QUALITY = 80
+_THUMB_MARK = ".thumb-"
+THUMBNAIL_JOB = "thumbnail"
+# pdfium no es thread-safe (ni entre documentos distintos): con gunicorn
+# gthread o el threadpool ASGI las renderizaciones van de a una por proceso
+_pdfium_lock = threading.Lock()
+
+
+def thumbnail_key(blob_key: str, size: int) -> str:
+    # junto al blob: blobs/ab/cd/<sha256>.thumb-256.webp (una por contenido y tamaño)
+    return f"{blob_key}{_THUMB_MARK}{size}.webp"
+
+
+def thumbnail_base_key(key: str) -> str | None:
+    """Clave del blob al que pertenece una miniatura, o None si `key` no lo es."""
+    base, mark, _ = key.rpartition(_THUMB_MARK)
+    return base if mark else None
+
+
+def delete_with_thumbnails(storage: StorageBackend, key: str) -> None:
+    storage.delete(key)
+    for size in THUMBNAIL_SIZES:
+        storage.delete(thumbnail_key(key, size))
+
+
+def thumbnails_available() -> bool:
+    try:
+        import pypdfium2  # noqa: F401
+        import PIL  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _render_first_page(pdf_path: str, size: int, out_path: str) -> None:
+    import pypdfium2 as pdfium  # dependencias opcionales
+
+    with _pdfium_lock:
+        pdf = pdfium.PdfDocument(pdf_path)
+        try:
+            page = pdf[0]
+            width, height = page.get_size()
+            image = page.render(scale=size / max(width, height, 1)).to_pil()
+            page.close()
+        finally:
+            pdf.close()
+    image.thumbnail((size, size))
+    image.save(out_path, format="WEBP", quality=THUMBNAIL_QUALITY)
+
+
+def ensure_thumbnail(storage: StorageBackend, blob_key: str, size: int) -> str:
+    """
+    Devuelve la clave de la miniatura de la primera página, generándola si
+    no existe. Es contenido derivado del blob (mismo checksum, misma
+    imagen), así que dos requests que la generen a la vez escriben lo mismo.
+    """
+    if size not in THUMBNAIL_SIZES:
+        raise ValueError(f"Invalid size (use one of: {', '.join(map(str, THUMBNAIL_SIZES))})")
+    key = thumbnail_key(blob_key, size)
+    if storage.stat(key) is not None:
+        return key
+
+    fd, out = tempfile.mkstemp(dir=storage.staging_dir, suffix=".part")
+    os.close(fd)
+    pdf_path, is_temp = None, False
+    try:
+        pdf_path, is_temp = local_copy(storage, blob_key)
+        try:
+            _render_first_page(pdf_path, size, out)
+        except Exception:
+            log.warning("thumbnail: could not render %s", blob_key, exc_info=True)
+            raise ValueError("Could not render a preview of this PDF")
+        storage.put_file(key, out, content_type=THUMBNAIL_CONTENT_TYPE)
+    finally:
+        if is_temp:
+            os.remove(pdf_path)
+        if os.path.exists(out):
+            os.remove(out)
+    return key
+
+
+def enqueue_thumbnails(blob_keys, size: int = DEFAULT_THUMBNAIL_SIZE) -> None:
+    """
+    Llamar dentro de la transacción del upload: la miniatura del tamaño de
+    los listados se genera en el worker y el primer request ya la encuentra.
+    Sin THUMBNAIL_ENQUEUE_ENABLED (o si el job no llegó a correr) el endpoint
+    la renderiza en el request.
+    """
+    if not current_app.config.get("THUMBNAIL_ENQUEUE_ENABLED", False) or not blob_keys:
+        return
+    enqueue_many(THUMBNAIL_JOB, [({"key": key, "size": size}, f"{THUMBNAIL_JOB}:{key}:{size}")
+                                 for key in sorted(set(blob_keys))])
+
+
+@job_handler(THUMBNAIL_JOB, concurrency=2, max_attempts=3, backoff_seconds=30)
+def _thumbnail_job(payload: dict) -> None:
+    if not thumbnails_available():
+        raise RuntimeError("pypdfium2/Pillow are not installed in the worker")
+    try:
+        ensure_thumbnail(current_app.extensions["storage"], payload["key"], payload["size"])
+    except FileNotFoundError:
+        return  # el blob se borró antes de que corriera el job
+    except ValueError:
+        return  # PDF ilegible: reintentar no cambia nada (ya quedó en el log)
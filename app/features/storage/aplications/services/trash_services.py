@@ -0,0 +1,173 @@
+# app/features/storage/aplications/services/trash_services.py
+from datetime import timedelta
+from sqlalchemy import select, update, delete, or_, and_
+from sqlalchemy.orm import aliased
+from app.extensions import db
+from app.database.models.folder import Folder
+from app.database.models.file import File
+from app.database.models.mixins import utcnow
+from app.features.storage.aplications.services.lookups import (
+    folders_changed, get_dataroom_meta, get_live_file, get_live_folder,
+)
+from app.features.storage.aplications.services.naming import like_prefix
+from app.features.storage.aplications.services.storege_services import release_blob_refs
+from app.features.storage.aplications.services.cleanup_services import schedule_reap
+from uuid import UUID
+
+
+def _mark_subtree(f: Folder, value, where_deleted_at) -> None:
+    """
+    Marca/desmarca deleted_at de la carpeta, sus descendientes y sus archivos
+    en UNA sentencia (UPDATE con CTE que modifica datos):
+        WITH subtree AS (UPDATE folder SET deleted_at = :v
+                         WHERE dataroom_id = :dr AND (id = :id OR path LIKE :path || '/%')
+                           AND <where_deleted_at> RETURNING id)
+        UPDATE file SET deleted_at = :v
+        WHERE folder_id IN (SELECT id FROM subtree) AND <where_deleted_at>
+    """
+    subtree = (update(Folder)
+               .where(Folder.dataroom_id == f.dataroom_id,
+                      or_(Folder.id == f.id,
+                          Folder.path.like(like_prefix(f.path + "/"), escape="\\")),
+                      where_deleted_at(Folder.deleted_at))
+               .values(deleted_at=value)
+               .returning(Folder.id)
+               .cte("subtree"))
+    db.session.execute(
+        update(File)
+        .add_cte(subtree)
+        .where(File.folder_id.in_(select(subtree.c.id)),
+               where_deleted_at(File.deleted_at))
+        .values(deleted_at=value)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def trash_folder(folder_id: UUID) -> None:
+    """
+    Manda la carpeta (con todo su subárbol) a la papelera: solo metadata, sin
+    tocar blobs ni storage. Todo el lote comparte el mismo deleted_at, que es
+    lo que usa restore_folder para no resucitar lo borrado antes por separado.
+    """
+    # bloqueada: un rename concurrente de un ancestro termina antes y el LIKE
+    # del subárbol usa el path ya reescrito
+    f = get_live_folder(folder_id, for_update=True)
+    _mark_subtree(f, utcnow(), lambda col: col.is_(None))
+    folders_changed(f.dataroom_id)
+    db.session.commit()
+
+
+def restore_folder(folder_id: UUID) -> Folder:
+    f = (Folder.query.filter(Folder.id == folder_id, Folder.deleted_at.isnot(None))
+         .with_for_update().populate_existing().first_or_404())
+    if f.parent_id is not None:
+        parent = db.session.get(Folder, f.parent_id)
+        if parent.deleted_at is not None:
+            raise ValueError("Parent folder is in trash; restore it first")
+    _mark_subtree(f, None, lambda col, ts=f.deleted_at: col == ts)
+    db.session.commit()
+    return f
+
+
+def trash_file(file_id: UUID) -> None:
+    f = get_live_file(file_id)
+    f.deleted_at = utcnow()
+    db.session.commit()
+
+
+def restore_file(file_id: UUID) -> File:
+    f = File.query.filter(File.id == file_id,
+                          File.deleted_at.isnot(None)).first_or_404()
+    if db.session.get(Folder, f.folder_id).deleted_at is not None:
+        raise ValueError("Folder is in trash; restore it first")
+    f.deleted_at = None
+    db.session.commit()
+    return f
+
+
+def list_trash(dataroom_id: UUID) -> dict:
+    """
+    Raíces de la papelera: carpetas y archivos borrados cuyo contenedor sigue
+    vivo o se borró en otro momento (lo demás vino arrastrado por ellas).
+    """
+    get_dataroom_meta(dataroom_id)
+    parent = aliased(Folder)
+
+    folders = db.session.execute(
+        select(Folder.id, Folder.name, Folder.path, Folder.parent_id, Folder.deleted_at)
+        .outerjoin(parent, Folder.parent_id == parent.id)
+        .where(Folder.dataroom_id == dataroom_id,
+               Folder.deleted_at.isnot(None),
+               or_(parent.id.is_(None),
+                   parent.deleted_at.is_(None),
+                   parent.deleted_at != Folder.deleted_at))
+        .order_by(Folder.deleted_at.desc(), Folder.path)
+    ).all()
+    files = db.session.execute(
+        select(File.id, File.name, File.folder_id, File.size_bytes, File.deleted_at,
+               Folder.path)
+        .join(Folder, File.folder_id == Folder.id)
+        .where(File.dataroom_id == dataroom_id,
+               File.deleted_at.isnot(None),
+               or_(Folder.deleted_at.is_(None),
+                   Folder.deleted_at != File.deleted_at))
+        .order_by(File.deleted_at.desc(), File.name)
+    ).all()
+
+    return {
+        "folders": [{
+            "id": str(r.id),
+            "name": r.name,
+            "path": r.path,
+            "parent_id": str(r.parent_id) if r.parent_id else None,
+            "deleted_at": r.deleted_at.isoformat(),
+        } for r in folders],
+        "files": [{
+            "id": str(r.id),
+            "name": r.name,
+            "folder_id": str(r.folder_id),
+            "folder_path": r.path,
+            "size_bytes": r.size_bytes,
+            "deleted_at": r.deleted_at.isoformat(),
+        } for r in files],
+    }
+
+
+def purge_trash(dataroom_id: UUID | None = None, older_than_seconds: int | None = None) -> dict:
+    """
+    Borra definitivamente lo que está en la papelera (de un dataroom o de
+    todos), opcionalmente solo lo borrado hace más de `older_than_seconds`.
+    Libera las referencias a blobs en una sentencia y deja el borrado físico
+    al reaper. Una carpeta en la papelera solo contiene filas en la papelera
+    con deleted_at <= al suyo, así que el CASCADE no arrastra nada vivo.
+    """
+    file_cond = [File.deleted_at.isnot(None)]
+    folder_cond = [Folder.deleted_at.isnot(None)]
+    if dataroom_id is not None:
+        get_dataroom_meta(dataroom_id)
+        file_cond.append(File.dataroom_id == dataroom_id)
+        folder_cond.append(Folder.dataroom_id == dataroom_id)
+    if older_than_seconds is not None:
+        cutoff = utcnow() - timedelta(seconds=older_than_seconds)
+        file_cond.append(File.deleted_at < cutoff)
+        folder_cond.append(Folder.deleted_at < cutoff)
+
+    # las refs salen de las filas que el DELETE efectivamente borra: un
+    # restore o un delete_file concurrente no quedan liberados de más. Los
+    # archivos dentro de las carpetas que se purgan se borran explícitamente
+    # (no por CASCADE) por la misma razón.
+    purged_folders = select(Folder.id).where(and_(*folder_cond))
+    refs = db.session.execute(
+        delete(File)
+        .where(or_(and_(*file_cond), File.folder_id.in_(purged_folders)))
+        .returning(File.checksum_sha256, File.storage_path)
+        .execution_options(synchronize_session=False)
+    ).all()
+    legacy = release_blob_refs(refs)
+    files = len(refs)
+    folders = db.session.execute(
+        delete(Folder).where(and_(*folder_cond)).execution_options(synchronize_session=False)
+    ).rowcount
+    db.session.commit()
+    schedule_reap(legacy)
+    return {"files": files, "folders": folders}
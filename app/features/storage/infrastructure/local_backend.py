@@ -0,0 +1,88 @@
+# app/features/storage/infrastructure/local_backend.py
+import os
+import shutil
+from datetime import datetime, timezone
+from typing import BinaryIO, Iterator
+
+from .storage_backend import StorageBackend, ObjectStat, DEFAULT_READ_CHUNK
+
+# permisos de un archivo creado con open(): mkstemp deja 0600 y, tras el
+# rename, un nginx/backup con otro usuario no podría leer el blob. El umask
+# se lee al importar (os.umask solo se puede consultar cambiándolo).
+_umask = os.umask(0)
+os.umask(_umask)
+FILE_MODE = 0o666 & ~_umask
+
+
+class LocalStorageBackend(StorageBackend):
+    """Filesystem local (o Disk de Render) bajo UPLOAD_FOLDER."""
+
+    def __init__(self, root: str):
+        self.root = root
+        # mismo filesystem que los blobs: put_file() es un rename atómico
+        self.staging_dir = os.path.join(root, "blobs", ".staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        # rutas absolutas (uploads antiguos) se devuelven tal cual
+        return os.path.join(self.root, key)
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: str | None = None) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.part"
+        with open(tmp_path, "wb") as out:
+            shutil.copyfileobj(stream, out, DEFAULT_READ_CHUNK)
+        os.replace(tmp_path, path)
+
+    def put_file(self, key: str, path: str, content_type: str | None = None) -> None:
+        dest = self._path(key)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        # los temporales del staging salen de mkstemp (0600)
+        os.chmod(path, FILE_MODE)
+        os.replace(path, dest)
+
+    def get_range(self, key: str, start: int = 0, end: int | None = None,
+                  chunk_size: int = DEFAULT_READ_CHUNK) -> Iterator[bytes]:
+        with open(self._path(key), "rb") as fh:
+            fh.seek(start)
+            remaining = None if end is None else end - start + 1
+            while remaining is None or remaining > 0:
+                chunk = fh.read(chunk_size if remaining is None else min(chunk_size, remaining))
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stat(self, key: str) -> ObjectStat | None:
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectStat(size=st.st_size,
+                          modified_at=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def iter_keys(self, prefix: str = "") -> Iterator[tuple[str, ObjectStat]]:
+        base = self._path(prefix) if prefix else self.root
+        for dirpath, dirnames, filenames in os.walk(base):
+            # el staging no es contenido: lo limpia purge-uploads / el propio upload
+            dirnames[:] = [d for d in dirnames if d != ".staging"]
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                key = os.path.relpath(path, self.root).replace(os.sep, "/")
+                yield key, ObjectStat(size=st.st_size,
+                                      modified_at=datetime.fromtimestamp(st.st_mtime, tz=timezone.utc))
+
+    def local_path(self, key: str) -> str | None:
+        return self._path(key)
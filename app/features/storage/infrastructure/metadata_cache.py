@@ -0,0 +1,167 @@
+# app/features/storage/infrastructure/metadata_cache.py
+import logging
+import os
+import select as _select
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+log = logging.getLogger(__name__)
+
+NOTIFY_CHANNEL = "asvita_metadata"
+_PENDING_KEY = "metadata_cache_pending"
+
+
+class MetadataCache:
+    """
+    LRU + TTL por proceso para metadata casi inmutable (datarooms y carpetas
+    vivas), indexada por (tipo, id). Guarda Rows de SQLAlchemy (tuplas
+    inmutables sin sesión), nunca entidades ORM.
+
+    La invalidación la disparan los services al escribir; con `notify` se
+    propaga al resto de workers por LISTEN/NOTIFY. El TTL acota lo que pueda
+    quedar desactualizado si se pierde una notificación.
+    """
+
+    def __init__(self, max_size: int = 10000, ttl: float = 60.0, notify: bool = False):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.notify = notify
+        self._data: "OrderedDict[tuple, tuple[float, object]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._listener_pid: int | None = None
+        # sube en cada invalidación: un put() con una generación vieja se
+        # descarta (la fila se leyó antes de una escritura que ya invalidó)
+        self.generation = 0
+
+    def get(self, kind: str, key):
+        with self._lock:
+            hit = self._data.get((kind, key))
+            if hit is None:
+                return None
+            expires, value = hit
+            if expires < time.monotonic():
+                del self._data[(kind, key)]
+                return None
+            self._data.move_to_end((kind, key))
+            return value
+
+    def put(self, kind: str, key, value, generation: int | None = None) -> None:
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[(kind, key)] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end((kind, key))
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def invalidate(self, kind: str, dataroom_id=None) -> None:
+        """
+        kind="dataroom": el dataroom y sus carpetas; kind="folder": las
+        carpetas del dataroom (un rename/move/trash cambia path o visibilidad
+        de todo un subárbol, así que se invalida por dataroom, no por id).
+        dataroom_id=None vacía todo el tipo.
+        """
+        with self._lock:
+            self.generation += 1
+            for k in [k for k, (_, v) in self._data.items()
+                      if (kind == "dataroom" or k[0] == kind)
+                      and (dataroom_id is None or _dataroom_of(k, v) == dataroom_id)]:
+                del self._data[k]
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    # --- invalidación entre workers (Postgres LISTEN/NOTIFY) ---
+
+    def ensure_listener(self, app) -> None:
+        # perezoso por pid: el hilo no sobrevive al fork de gunicorn
+        if not self.notify or self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid():
+                return
+            self._listener_pid = os.getpid()
+        threading.Thread(target=self._listen, args=(app,),
+                         name="metadata-cache-listener", daemon=True).start()
+
+    def _listen(self, app) -> None:
+        # conexión propia fuera del pool (NullPool): LISTEN la retiene para siempre
+        engine = create_engine(app.config.get("DATABASE_LISTEN_URI")
+                               or app.config["SQLALCHEMY_DATABASE_URI"], poolclass=NullPool)
+        while True:
+            try:
+                with engine.connect() as conn:
+                    conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+                    conn.exec_driver_sql(f"LISTEN {NOTIFY_CHANNEL}")
+                    raw = conn.connection.dbapi_connection
+                    # lo que cambió mientras no escuchábamos ya no se puede saber
+                    self.clear()
+                    while True:
+                        if _select.select([raw], [], [], 60) == ([], [], []):
+                            continue
+                        raw.poll()
+                        while raw.notifies:
+                            self._apply(raw.notifies.pop(0).payload)
+            except Exception:
+                log.exception("metadata cache: listener disconnected, retrying")
+                self.clear()
+                time.sleep(5)
+
+    def _apply(self, payload: str) -> None:
+        kind, _, dataroom_id = payload.partition(":")
+        self.invalidate(kind, dataroom_id or None)
+
+
+def _dataroom_of(key: tuple, value) -> str:
+    kind, ident = key
+    return str(ident) if kind == "dataroom" else str(value.dataroom_id)
+
+
+def get_metadata_cache() -> MetadataCache | None:
+    cache = current_app.extensions.get("metadata_cache")
+    if cache is not None:
+        cache.ensure_listener(current_app._get_current_object())
+    return cache
+
+
+def invalidate_metadata(session, kind: str, dataroom_id) -> None:
+    """
+    Llamar dentro de la transacción que escribe, antes del commit: invalida
+    ya en este proceso, otra vez tras el commit (por si otro hilo recargó la
+    fila vieja entretanto) y, con notify, encola un pg_notify que Postgres
+    solo entrega al resto de workers si la transacción hace commit.
+    """
+    cache = current_app.extensions.get("metadata_cache")
+    if cache is None:
+        return
+    dataroom_id = str(dataroom_id)
+    cache.invalidate(kind, dataroom_id)
+    session.info.setdefault(_PENDING_KEY, []).append((cache, kind, dataroom_id))
+    if cache.notify:
+        session.execute(select(func.pg_notify(NOTIFY_CHANNEL, f"{kind}:{dataroom_id}")))
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _invalidate_after_commit(session, transaction) -> None:
+    # solo la transacción externa (los SAVEPOINT también disparan el evento);
+    # si fue rollback invalidar de más no hace daño
+    if transaction.parent is None:
+        for cache, kind, dataroom_id in session.info.pop(_PENDING_KEY, ()):
+            cache.invalidate(kind, dataroom_id)
+
+
+def init_metadata_cache(app) -> None:
+    if app.config.get("METADATA_CACHE_SIZE", 0) > 0:
+        app.extensions["metadata_cache"] = MetadataCache(
+            max_size=app.config["METADATA_CACHE_SIZE"],
+            ttl=app.config.get("METADATA_CACHE_TTL_SECONDS", 60),
+            notify=app.config.get("METADATA_CACHE_NOTIFY", False),
+        )
@@ -0,0 +1,122 @@
+# app/features/storage/infrastructure/s3_backend.py
+import os
+import tempfile
+from typing import BinaryIO, Iterator
+
+from .storage_backend import StorageBackend, ObjectStat, DEFAULT_READ_CHUNK
+
+
+class S3StorageBackend(StorageBackend):
+    """
+    Driver S3-compatible (AWS, MinIO, R2...). Usa un único cliente boto3 por
+    proceso (thread-safe, con pool HTTP de max_pool_connections) y subidas
+    multipart por encima de multipart_chunk_size. Para probar en local basta
+    apuntar S3_ENDPOINT_URL a un MinIO o usar moto.
+    """
+
+    def __init__(self, bucket: str, prefix: str = "", endpoint_url: str | None = None,
+                 region: str | None = None, max_pool_connections: int = 32,
+                 multipart_chunk_size: int = 8 * 1024 * 1024,
+                 presign_downloads: bool = True, staging_dir: str | None = None):
+        try:
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            from botocore.config import Config
+            from botocore.exceptions import ClientError
+        except ImportError as e:  # en requirements.txt; puede faltar en un venv a mano
+            raise RuntimeError("STORAGE_BACKEND=s3 requiere boto3 (pip install boto3)") from e
+
+        self.bucket = bucket
+        self.prefix = prefix.strip("/")
+        self.presign_downloads = presign_downloads
+        self._client_error = ClientError
+        self._client = boto3.session.Session().client(
+            "s3",
+            endpoint_url=endpoint_url,
+            region_name=region,
+            config=Config(
+                max_pool_connections=max_pool_connections,
+                retries={"max_attempts": 3, "mode": "standard"},
+                # MinIO y la mayoría de stand-ins locales no soportan virtual-host
+                s3={"addressing_style": "path" if endpoint_url else "auto"},
+            ),
+        )
+        self._transfer = TransferConfig(
+            multipart_threshold=multipart_chunk_size,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=4,
+        )
+        self.staging_dir = staging_dir or os.path.join(tempfile.gettempdir(), "asvita-staging")
+        os.makedirs(self.staging_dir, exist_ok=True)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    @staticmethod
+    def _missing(error) -> bool:
+        return error.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound")
+
+    def _extra(self, content_type: str | None) -> dict:
+        return {"ContentType": content_type} if content_type else {}
+
+    def put_stream(self, key: str, stream: BinaryIO, content_type: str | None = None) -> None:
+        self._client.upload_fileobj(stream, self.bucket, self._key(key),
+                                    ExtraArgs=self._extra(content_type), Config=self._transfer)
+
+    def put_file(self, key: str, path: str, content_type: str | None = None) -> None:
+        self._client.upload_file(path, self.bucket, self._key(key),
+                                 ExtraArgs=self._extra(content_type), Config=self._transfer)
+        os.remove(path)
+
+    def get_range(self, key: str, start: int = 0, end: int | None = None,
+                  chunk_size: int = DEFAULT_READ_CHUNK) -> Iterator[bytes]:
+        kwargs = {"Bucket": self.bucket, "Key": self._key(key)}
+        if start or end is not None:
+            kwargs["Range"] = f"bytes={start}-{'' if end is None else end}"
+        try:
+            body = self._client.get_object(**kwargs)["Body"]
+        except self._client_error as e:
+            if self._missing(e):
+                # mismo contrato que el driver local: los llamadores (ZIP,
+                # extracción de texto) distinguen "no existe" sin conocer boto
+                raise FileNotFoundError(key) from e
+            raise
+        try:
+            yield from body.iter_chunks(chunk_size)
+        finally:
+            body.close()
+
+    def delete(self, key: str) -> None:
+        self._client.delete_object(Bucket=self.bucket, Key=self._key(key))
+
+    def stat(self, key: str) -> ObjectStat | None:
+        try:
+            head = self._client.head_object(Bucket=self.bucket, Key=self._key(key))
+        except self._client_error as e:
+            if self._missing(e):
+                return None
+            raise
+        return ObjectStat(size=head["ContentLength"], modified_at=head.get("LastModified"))
+
+    def iter_keys(self, prefix: str = "") -> Iterator[tuple[str, ObjectStat]]:
+        strip = len(self.prefix) + 1 if self.prefix else 0
+        paginator = self._client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=self._key(prefix)):
+            for obj in page.get("Contents", []):
+                yield obj["Key"][strip:], ObjectStat(size=obj["Size"],
+                                                     modified_at=obj.get("LastModified"))
+
+    def presigned_url(self, key: str, download_name: str, content_type: str,
+                      expires_in: int = 300) -> str | None:
+        if not self.presign_downloads:
+            return None
+        return self._client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self._key(key),
+                "ResponseContentType": content_type,
+                "ResponseContentDisposition": f'inline; filename="{download_name}"',
+            },
+            ExpiresIn=expires_in,
+        )
@@ -0,0 +1,116 @@
+# app/features/storage/infrastructure/storage_backend.py
+import os
+import tempfile
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from datetime import datetime
+from typing import BinaryIO, Iterator
+
+from flask import current_app
+
+DEFAULT_READ_CHUNK = 256 * 1024
+
+
+@dataclass(frozen=True)
+class ObjectStat:
+    size: int
+    modified_at: datetime | None = None
+
+
+class StorageBackend(ABC):
+    """
+    Interfaz mínima del almacenamiento físico. Las claves son rutas relativas
+    tipo 'blobs/ab/cd/<sha256>'; cada driver decide dónde viven los bytes.
+    """
+
+    # directorio local donde se preparan los uploads antes de put_file()
+    staging_dir: str
+
+    @abstractmethod
+    def put_stream(self, key: str, stream: BinaryIO, content_type: str | None = None) -> None:
+        ...
+
+    def put_file(self, key: str, path: str, content_type: str | None = None) -> None:
+        """Sube un archivo local ya preparado y lo elimina (se consume)."""
+        with open(path, "rb") as fh:
+            self.put_stream(key, fh, content_type=content_type)
+        os.remove(path)
+
+    @abstractmethod
+    def get_range(self, key: str, start: int = 0, end: int | None = None,
+                  chunk_size: int = DEFAULT_READ_CHUNK) -> Iterator[bytes]:
+        """
+        Itera los bytes [start, end] (end inclusivo, como HTTP Range). Si el
+        objeto no existe, FileNotFoundError al pedir el primer chunk.
+        """
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Borra el objeto; no falla si ya no existe."""
+        ...
+
+    @abstractmethod
+    def stat(self, key: str) -> ObjectStat | None:
+        ...
+
+    @abstractmethod
+    def iter_keys(self, prefix: str = "") -> Iterator[tuple[str, ObjectStat]]:
+        """Lista (clave, stat) bajo prefix; se usa para reconciliar contra la DB."""
+        ...
+
+    def local_path(self, key: str) -> str | None:
+        """Ruta en disco si el driver la tiene (permite send_file/sendfile)."""
+        return None
+
+    def presigned_url(self, key: str, download_name: str, content_type: str,
+                      expires_in: int = 300) -> str | None:
+        """URL temporal para que el cliente descargue directo del backend."""
+        return None
+
+
+def local_copy(storage: StorageBackend, key: str) -> tuple[str, bool]:
+    """
+    (ruta, es_temporal) para librerías que necesitan un archivo en disco: en
+    local se lee directo; en S3 se baja al staging y el llamador lo borra.
+    """
+    path = storage.local_path(key)
+    if path:
+        return path, False
+    fd, tmp = tempfile.mkstemp(dir=storage.staging_dir, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            for chunk in storage.get_range(key):
+                out.write(chunk)
+    except BaseException:
+        os.remove(tmp)
+        raise
+    return tmp, True
+
+
+def create_storage_backend(config) -> StorageBackend:
+    kind = (config.get("STORAGE_BACKEND") or "local").lower()
+    if kind == "local":
+        from .local_backend import LocalStorageBackend
+        return LocalStorageBackend(config["UPLOAD_FOLDER"])
+    if kind == "s3":
+        from .s3_backend import S3StorageBackend
+        return S3StorageBackend(
+            bucket=config["S3_BUCKET"],
+            prefix=config.get("S3_PREFIX", ""),
+            endpoint_url=config.get("S3_ENDPOINT_URL"),
+            region=config.get("S3_REGION"),
+            max_pool_connections=config.get("S3_MAX_POOL_CONNECTIONS", 32),
+            multipart_chunk_size=config.get("S3_MULTIPART_CHUNK_SIZE", 8 * 1024 * 1024),
+            presign_downloads=config.get("S3_PRESIGNED_DOWNLOADS", True),
+            staging_dir=config.get("UPLOAD_STAGING_DIR"),
+        )
+    raise ValueError(f"STORAGE_BACKEND desconocido: {kind}")
+
+
+def init_storage(app) -> None:
+    app.extensions["storage"] = create_storage_backend(app.config)
+
+
+def get_storage() -> StorageBackend:
+    return current_app.extensions["storage"]
@@ -0,0 +1,67 @@
+# app/features/storage/interfaces/asgi/app.py
+import os
+from contextlib import asynccontextmanager
+
+from a2wsgi import WSGIMiddleware
+from sqlalchemy.ext.asyncio import create_async_engine
+from starlette.applications import Starlette
+from starlette.middleware.cors import CORSMiddleware
+from starlette.routing import Mount, Route, request_response
+
+from app import (
+    CORS_ALLOW_HEADERS, CORS_EXPOSE_HEADERS, CORS_METHODS, CORS_ORIGINS, create_app,
+)
+from app.database.db import get_async_database_url, get_async_engine_options
+from app.features.storage.interfaces.asgi.files import download_file, upload_file
+
+API_PREFIX = "/api/v1/storage"  # el mismo path que el namespace restx
+
+
+def _with_cors(endpoint):
+    # las rutas async no pasan por Flask-CORS; los preflight (OPTIONS) sí,
+    # porque esas rutas solo declaran sus métodos y el resto cae en el Mount
+    return CORSMiddleware(
+        request_response(endpoint),
+        allow_origins=CORS_ORIGINS,
+        allow_methods=CORS_METHODS,
+        allow_headers=CORS_ALLOW_HEADERS,
+        expose_headers=CORS_EXPOSE_HEADERS,
+    )
+
+
+def create_asgi_app(flask_app=None) -> Starlette:
+    """
+    Modo ASGI (uvicorn): las transferencias (GET/HEAD de un archivo y el
+    upload de un PDF) corren en el event loop, con asyncpg para la consulta
+    y E/S de archivos no bloqueante. Todas las demás rutas, el Swagger y los
+    preflight siguen siendo la app Flask, montada vía WSGI con un threadpool
+    de THREADS hilos: mismas URLs, mismas respuestas.
+    """
+    flask_app = flask_app or create_app()
+    engine = create_async_engine(
+        get_async_database_url(flask_app.config["SQLALCHEMY_DATABASE_URI"]),
+        **get_async_engine_options(),
+    )
+
+    @asynccontextmanager
+    async def lifespan(app):
+        try:
+            yield
+        finally:
+            await engine.dispose()
+
+    routes = [
+        Route(f"{API_PREFIX}/datarooms/{{dataroom_id:uuid}}/folders/{{folder_id:uuid}}/files",
+              _with_cors(upload_file), methods=["POST"]),
+        Mount("/", WSGIMiddleware(flask_app, workers=int(os.getenv("THREADS", 4)))),
+    ]
+    # con DOWNLOAD_OFFLOAD x-accel / x-sendfile los bytes ya los manda el
+    # proxy: la descarga sigue en Flask, que arma esas cabeceras
+    if flask_app.config.get("DOWNLOAD_OFFLOAD") not in ("x-accel", "x-sendfile"):
+        routes.insert(0, Route(f"{API_PREFIX}/files/{{file_id:uuid}}",
+                               _with_cors(download_file), methods=["GET", "HEAD"]))
+
+    app = Starlette(routes=routes, lifespan=lifespan)
+    app.state.flask_app = flask_app
+    app.state.db_engine = engine
+    return app
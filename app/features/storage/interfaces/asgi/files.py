@@ -0,0 +1,341 @@
+# app/features/storage/interfaces/asgi/files.py
+import hashlib
+import os
+import tempfile
+import time
+from datetime import timezone
+
+import anyio
+from sqlalchemy import select, text
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, RedirectResponse, Response, StreamingResponse
+from werkzeug.exceptions import NotFound
+from werkzeug.http import http_date, parse_date, parse_etags, parse_if_range_header, parse_range_header
+
+from app.database.models.file import File
+from app.database.replica import CONSISTENCY_HEADER
+from app.features.storage.aplications.services.storege_services import (
+    clean_pdf_filename, ingest_staged_file, resolve_upload_target,
+)
+from app.features.storage.infrastructure.storage_backend import DEFAULT_READ_CHUNK
+from app.features.storage.interfaces.web.downloads import content_disposition
+from app.metrics import count_download_bytes, count_upload_bytes, observe_upload_phase
+
+
+class _TooLarge(Exception):
+    pass
+
+
+def _error(status: int, message: str) -> JSONResponse:
+    # mismo cuerpo que los errorhandlers de Flask
+    return JSONResponse({"error": message}, status_code=status)
+
+
+async def _in_app(request: Request, func, *args):
+    """Corre un service síncrono en el threadpool con app context (y su db.session)."""
+    flask_app = request.app.state.flask_app
+
+    def call():
+        with flask_app.app_context():
+            return func(*args)
+
+    return await run_in_threadpool(call)
+
+
+# --- descargas ---
+
+def _not_modified(request: Request, etag: str | None, last_modified) -> bool:
+    # If-None-Match manda sobre If-Modified-Since (RFC 9110 §13.2.2)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return bool(etag) and parse_etags(if_none_match).contains_weak(etag)
+    since = parse_date(request.headers.get("if-modified-since"))
+    return bool(since and last_modified and last_modified <= since)
+
+
+def _single_range(request: Request, size: int, etag: str | None, last_modified):
+    """
+    (start, end) inclusivos, [] si no es satisfacible o None para servir
+    el archivo completo. Varios rangos también van completos (RFC 9110 lo
+    permite); el visor PDF pide de a uno.
+    """
+    rng = parse_range_header(request.headers.get("range"))
+    if rng is None or rng.units != "bytes" or len(rng.ranges) != 1:
+        return None
+    if_range = parse_if_range_header(request.headers.get("if-range"))
+    if if_range.etag is not None and if_range.etag != etag:
+        return None
+    if if_range.date is not None and if_range.date != last_modified:
+        return None
+    bounds = rng.range_for_length(size)
+    if bounds is None:
+        return []
+    start, stop = bounds
+    return start, stop - 1
+
+
+async def _iter_local(path: str, start: int, end: int, chunk_size: int = DEFAULT_READ_CHUNK):
+    async with await anyio.open_file(path, "rb") as fh:
+        await fh.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await fh.read(min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def download_file(request: Request) -> Response:
+    """
+    GET /files/{id}: mismo contrato que FileDetail.get (ETag, Last-Modified,
+    304, Range, redirect presignado en S3) pero el cuerpo se envía desde el
+    event loop, así una transferencia lenta no ocupa un hilo.
+    """
+    async with request.app.state.db_engine.connect() as conn:
+        f = (await conn.execute(
+            select(File.name, File.content_type, File.size_bytes, File.storage_path,
+                   File.checksum_sha256, File.updated_at)
+            .where(File.id == request.path_params["file_id"], File.deleted_at.is_(None))
+        )).first()
+    if f is None:
+        return _error(404, "not found")
+
+    etag = f.checksum_sha256
+    last_modified = (f.updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+                     if f.updated_at else None)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": content_disposition(f.name),
+    }
+    if etag:
+        headers["ETag"] = f'"{etag}"'
+    if last_modified:
+        headers["Last-Modified"] = http_date(last_modified)
+
+    if _not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    storage = request.app.state.flask_app.extensions["storage"]
+    url = storage.presigned_url(f.storage_path, download_name=f.name,
+                                content_type=f.content_type)
+    if url:
+        return RedirectResponse(url, status_code=302)
+
+    size = f.size_bytes
+    rng = _single_range(request, size, etag, last_modified)
+    if rng == []:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    status, (start, end) = (206, rng) if rng else (200, (0, size - 1))
+    if rng:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    headers["Content-Length"] = str(end - start + 1)
+    if request.method == "HEAD" or size == 0:
+        return Response(status_code=status, media_type=f.content_type, headers=headers)
+
+    count_download_bytes(end - start + 1, "asgi")
+    path = storage.local_path(f.storage_path)
+    body = (_iter_local(path, start, end) if path
+            # S3 sin presign: boto es bloqueante, se itera en el threadpool
+            else iterate_in_threadpool(storage.get_range(f.storage_path, start, end)))
+    return StreamingResponse(body, status_code=status, media_type=f.content_type,
+                             headers=headers)
+
+
+# --- uploads ---
+
+def _multipart_parser():
+    try:
+        from python_multipart.multipart import MultipartParser, parse_options_header
+    except ImportError:  # python-multipart < 0.0.13
+        from multipart.multipart import MultipartParser, parse_options_header
+    return MultipartParser, parse_options_header
+
+
+class _PdfPartWriter:
+    """
+    Recibe los eventos del parser multipart y escribe la parte "file" en un
+    temporal del staging mientras calcula su sha256 (como stage_upload);
+    las demás partes se descartan. Escribe en bloques de chunk_size.
+    """
+
+    def __init__(self, staging_dir: str, chunk_size: int, parse_options_header):
+        self.staging_dir = staging_dir
+        self.chunk_size = chunk_size
+        self._parse_options = parse_options_header
+        self._headers: dict[bytes, bytes] = {}
+        self._field = b""
+        self._value = b""
+        self._out = None
+        self._buffer: list[bytes] = []
+        self._buffered = 0
+        self.sha = hashlib.sha256()
+        self.filename: str | None = None
+        self.tmp_path: str | None = None
+        self.size = 0
+        self.done = False
+
+    async def handle(self, kind: str, data: bytes) -> None:
+        if kind == "begin":
+            self._headers, self._field, self._value = {}, b"", b""
+        elif kind == "header_field":
+            self._field += data
+        elif kind == "header_value":
+            self._value += data
+        elif kind == "header_end":
+            self._headers[self._field.lower()] = self._value
+            self._field, self._value = b"", b""
+        elif kind == "headers_finished":
+            await self._start_part()
+        elif kind == "data" and self._out is not None:
+            self.sha.update(data)
+            self.size += len(data)
+            self._buffer.append(data)
+            self._buffered += len(data)
+            if self._buffered >= self.chunk_size:
+                await self._flush()
+        elif kind == "end" and self._out is not None:
+            await self._flush()
+            await self._out.aclose()
+            self._out = None
+            self.done = True
+
+    async def _start_part(self) -> None:
+        _, opts = self._parse_options(self._headers.get(b"content-disposition", b""))
+        if self.done or opts.get(b"name") != b"file" or b"filename" not in opts:
+            return
+        raw = opts[b"filename"]
+        try:
+            filename = raw.decode("utf-8")
+        except UnicodeDecodeError:
+            filename = raw.decode("latin-1")
+        content_type = self._headers.get(b"content-type", b"").decode("latin-1") or None
+        # antes de aceptar un solo byte: nombre y tipo (mismas reglas que upload_pdf)
+        self.filename = clean_pdf_filename(filename, content_type)
+        os.makedirs(self.staging_dir, exist_ok=True)
+        fd, self.tmp_path = tempfile.mkstemp(dir=self.staging_dir, prefix=".upload-", suffix=".part")
+        os.close(fd)
+        self._out = await anyio.open_file(self.tmp_path, "wb")
+
+    async def _flush(self) -> None:
+        if self._buffer:
+            await self._out.write(b"".join(self._buffer))
+            self._buffer, self._buffered = [], 0
+
+    async def discard(self) -> None:
+        if self._out is not None:
+            await self._out.aclose()
+            self._out = None
+        if self.tmp_path:
+            try:
+                os.remove(self.tmp_path)
+            except OSError:
+                pass
+            self.tmp_path = None
+
+
+async def _stage_multipart(request: Request, writer: _PdfPartWriter, max_size: int | None) -> None:
+    MultipartParser, parse_options_header = _multipart_parser()
+    ctype, params = parse_options_header(request.headers.get("content-type", ""))
+    boundary = params.get(b"boundary")
+    if ctype != b"multipart/form-data" or not boundary:
+        raise ValueError("Expected multipart/form-data")
+
+    events: list[tuple[str, bytes]] = []
+
+    def on(kind):
+        return lambda: events.append((kind, b""))
+
+    def on_data(kind):
+        return lambda data, start, end: events.append((kind, data[start:end]))
+
+    parser = MultipartParser(boundary, {
+        "on_part_begin": on("begin"),
+        "on_header_field": on_data("header_field"),
+        "on_header_value": on_data("header_value"),
+        "on_header_end": on("header_end"),
+        "on_headers_finished": on("headers_finished"),
+        "on_part_data": on_data("data"),
+        "on_part_end": on("end"),
+    })
+    received = 0
+    async for chunk in request.stream():
+        received += len(chunk)
+        if max_size and received > max_size:
+            raise _TooLarge()
+        parser.write(chunk)
+        for kind, data in events:
+            await writer.handle(kind, data)
+        events.clear()
+    parser.finalize()
+    for kind, data in events:
+        await writer.handle(kind, data)
+
+
+def _ingest(file_model, dataroom_id, folder_id, filename, tmp_path, size, checksum):
+    from flask import current_app
+    from flask_restx import marshal
+    from app.extensions import db
+    entity = ingest_staged_file(dataroom_id, folder_id, filename, tmp_path, size, checksum,
+                                current_app.extensions["storage"])
+    body = marshal(entity, file_model)
+    token = None
+    if "replica_monitor" in current_app.extensions:
+        token = db.session.execute(text("SELECT pg_current_wal_lsn()::text")).scalar()
+    return body, token
+
+
+async def upload_file(request: Request) -> Response:
+    """
+    POST /datarooms/{id}/folders/{id}/files: mismo contrato que
+    FileUpload.post. El cuerpo multipart se parsea en streaming y se escribe
+    al staging desde el event loop; solo el registro (blob, File, job) pasa
+    por el threadpool, con los mismos services que la versión Flask.
+    """
+    from app.features.storage.interfaces.web.restx import file_model
+    flask_app = request.app.state.flask_app
+    max_size = flask_app.config.get("MAX_CONTENT_LENGTH")
+    declared = request.headers.get("content-length")
+    if max_size and declared and declared.isdigit() and int(declared) > max_size:
+        return _error(413, "Request entity too large")
+
+    try:
+        dataroom_id, folder_id = await _in_app(
+            request, resolve_upload_target,
+            request.path_params["dataroom_id"], request.path_params["folder_id"])
+    except NotFound:
+        return _error(404, "not found")
+    except ValueError as e:
+        return _error(400, str(e))
+
+    storage = flask_app.extensions["storage"]
+    writer = _PdfPartWriter(storage.staging_dir, flask_app.config["UPLOAD_CHUNK_SIZE"],
+                            _multipart_parser()[1])
+    try:
+        started = time.perf_counter()
+        await _stage_multipart(request, writer, max_size)
+        if not writer.done:
+            # mismo 400 que el reqparse de restx sin el campo "file"
+            return JSONResponse({
+                "errors": {"file": "PDF a subir Missing required parameter in an uploaded file"},
+                "message": "Input payload validation failed",
+            }, status_code=400)
+        observe_upload_phase("stage", time.perf_counter() - started)
+        count_upload_bytes(writer.size, "asgi")
+        # ingest_staged_file consume (o borra) el temporal
+        tmp_path, writer.tmp_path = writer.tmp_path, None
+        body, token = await _in_app(request, _ingest, file_model, dataroom_id, folder_id,
+                                    writer.filename, tmp_path, writer.size,
+                                    writer.sha.hexdigest())
+    except _TooLarge:
+        return _error(413, "Request entity too large")
+    except NotFound:
+        return _error(404, "not found")
+    except ValueError as e:
+        return _error(400, str(e))
+    finally:
+        await writer.discard()
+    return JSONResponse(body, status_code=201,
+                        headers={CONSISTENCY_HEADER: token} if token else None)
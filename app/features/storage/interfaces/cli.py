@@ -0,0 +1,110 @@
+# app/features/storage/interfaces/cli.py
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+storage_cli = AppGroup("storage", help="Mantenimiento del storage de archivos.")
+
+
+@storage_cli.command("purge-uploads")
+def purge_uploads():
+    """Borra subidas reanudables expiradas y su staging."""
+    from app.features.storage.aplications.services.resumable_services import purge_expired_uploads
+    n = purge_expired_uploads()
+    click.echo(f"{n} subidas expiradas eliminadas")
+
+
+@storage_cli.command("reap")
+def reap():
+    """Borra ya (sin esperar al hilo de fondo) los blobs sin referencias."""
+    from app.features.storage.aplications.services.cleanup_services import reap_blobs
+    from app.features.storage.infrastructure.storage_backend import get_storage
+    n = reap_blobs(get_storage(), current_app.config["REAPER_BATCH_SIZE"])
+    click.echo(f"{n} blobs eliminados")
+
+
+@storage_cli.command("orphan-scan")
+@click.option("--delete", "delete_orphans", is_flag=True,
+              help="Borra los huérfanos (por defecto solo los lista).")
+@click.option("--min-age", default=3600, show_default=True,
+              help="Segundos mínimos de antigüedad para borrar un huérfano.")
+@click.option("--fix-refcounts", is_flag=True,
+              help="Recalcula blob.ref_count desde la tabla file antes de escanear.")
+def orphan_scan(delete_orphans: bool, min_age: int, fix_refcounts: bool):
+    """Reconcilia el storage contra las tablas blob/file."""
+    from app.features.storage.aplications.services.cleanup_services import (
+        recount_blob_refs, scan_orphans,
+    )
+    from app.features.storage.infrastructure.storage_backend import get_storage
+    if fix_refcounts:
+        click.echo(f"{recount_blob_refs()} blobs con ref_count corregido")
+    report = scan_orphans(get_storage(), root=current_app.config["UPLOAD_FOLDER"],
+                          min_age_seconds=min_age, delete_orphans=delete_orphans)
+    for key in report["orphans"]:
+        click.echo(f"orphan  {key}")
+    for key in report["missing"]:
+        click.echo(f"missing {key}")
+    click.echo(f"{len(report['orphans'])} huérfanos ({len(report['deleted'])} borrados), "
+               f"{len(report['missing'])} blobs faltantes")
+
+
+@storage_cli.command("purge-trash")
+@click.option("--days", default=30, show_default=True,
+              help="Borra lo que está en la papelera hace más de N días (0 = todo).")
+def purge_trash(days: int):
+    """Vacía la papelera de todos los datarooms."""
+    from app.features.storage.aplications.services.trash_services import purge_trash as _purge
+    result = _purge(older_than_seconds=days * 86400 if days else None)
+    click.echo(f"{result['folders']} carpetas y {result['files']} archivos eliminados")
+
+
+@storage_cli.command("extract-text")
+@click.option("--retry-empty", is_flag=True,
+              help="Reintenta también los PDFs que quedaron sin texto.")
+@click.option("--enqueue", "to_queue", is_flag=True,
+              help="Encola los pendientes para `flask worker` en vez de procesarlos aquí.")
+def extract_text(retry_empty: bool, to_queue: bool):
+    """
+    Indexa ya (sin pasar por la cola) el texto de los blobs pendientes. Antes
+    pasa al blob store los archivos subidos antes de él, que sin fila Blob
+    no se pueden buscar.
+    """
+    from app.features.storage.aplications.services.search_services import (
+        enqueue_pending_text, extract_pending_text, pdf_text_available, reset_empty_extractions,
+    )
+    from app.features.storage.aplications.services.storege_services import adopt_legacy_files
+    from app.features.storage.infrastructure.storage_backend import get_storage
+    if not to_queue and not pdf_text_available():
+        raise click.ClickException("Falta pypdf (pip install pypdf)")
+    adopted, skipped = adopt_legacy_files(get_storage())
+    if adopted or skipped:
+        click.echo(f"{adopted} archivos antiguos pasados al blob store ({skipped} ilegibles)")
+    if retry_empty:
+        click.echo(f"{reset_empty_extractions()} blobs vueltos a pendientes")
+    if to_queue:
+        click.echo(f"{enqueue_pending_text()} blobs encolados")
+        return
+    n = extract_pending_text(get_storage(), current_app.config["SEARCH_EXTRACT_BATCH_SIZE"],
+                             current_app.config["SEARCH_TEXT_CONFIG"])
+    click.echo(f"{n} blobs procesados")
+
+
+@storage_cli.command("jobs")
+@click.option("--retry-failed", is_flag=True,
+              help="Vuelve a encolar los jobs fallidos (con --type, solo ese tipo).")
+@click.option("--type", "job_type", default=None, help="Tipo de job.")
+def jobs(retry_failed: bool, job_type: str | None):
+    """Estado de la cola de jobs de background."""
+    from app.features.storage.aplications.services.jobs_services import (
+        job_stats, retry_failed_jobs,
+    )
+    if retry_failed:
+        click.echo(f"{retry_failed_jobs(job_type)} jobs fallidos reencolados")
+    for r in job_stats():
+        click.echo(f"{r.type:<20} {r.status:<8} {r.n:>8}  desde {r.oldest:%Y-%m-%d %H:%M}")
+
+
+def register_cli(app) -> None:
+    from app.features.storage.interfaces.worker import worker_command
+    app.cli.add_command(storage_cli)
+    app.cli.add_command(worker_command)
@@ -0,0 +1,229 @@
+# app/features/storage/interfaces/web/downloads.py
+import os
+import uuid
+from datetime import timezone
+from urllib.parse import quote
+
+from flask import request, current_app, send_file, redirect, Response
+from werkzeug.wsgi import wrap_file
+
+from app.database.models.file import File
+from app.features.storage.aplications.services.thumbnail_services import (
+    THUMBNAIL_CONTENT_TYPE, ensure_thumbnail,
+)
+from app.features.storage.infrastructure.storage_backend import StorageBackend
+from app.metrics import count_download_bytes
+
+# más rangos que esto en un solo request se sirve el archivo completo (evita abusos)
+MAX_RANGES = 16
+# la miniatura de un File nunca cambia (su checksum es fijo): cache de un año
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+
+def content_disposition(name: str, disposition: str = "inline") -> str:
+    try:
+        name.encode("ascii")
+        return f'{disposition}; filename="{name}"'
+    except UnicodeEncodeError:
+        return f"{disposition}; filename*=UTF-8''{quote(name)}"
+
+
+def _last_modified(f: File):
+    # updated_at se guarda sin tz (now() del servidor, UTC); HTTP trabaja en segundos
+    if f.updated_at is None:
+        return None
+    return f.updated_at.replace(tzinfo=timezone.utc, microsecond=0)
+
+
+def _not_modified(etag: str | None, last_modified) -> bool:
+    # If-None-Match manda sobre If-Modified-Since (RFC 9110 §13.2.2)
+    if request.if_none_match:
+        return bool(etag) and request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified <= request.if_modified_since
+    return False
+
+
+def _if_range_matches(etag: str | None, last_modified) -> bool:
+    if_range = request.if_range
+    if if_range.etag is not None:
+        return bool(etag) and if_range.etag == etag
+    if if_range.date is not None:
+        return last_modified is not None and if_range.date == last_modified
+    return True
+
+
+def _requested_ranges(size: int, etag: str | None, last_modified) -> list[tuple[int, int]] | None:
+    """
+    Devuelve [(start, end)] inclusivos ya recortados al tamaño, [] si ninguno
+    es satisfacible, o None si hay que servir el archivo completo.
+    """
+    rng = request.range
+    if rng is None or rng.units != "bytes" or len(rng.ranges) > MAX_RANGES:
+        return None
+    if not _if_range_matches(etag, last_modified):
+        return None
+    out = []
+    for begin, end in rng.ranges:
+        if begin < 0:  # sufijo: últimos N bytes
+            start, stop = max(size + begin, 0), size
+        else:
+            start, stop = begin, size if end is None else min(end, size)
+        if start < stop:
+            out.append((start, stop - 1))
+    return out
+
+
+def _multipart_byteranges(storage: StorageBackend, key: str, ranges, size: int,
+                          content_type: str) -> tuple[str, int, object]:
+    boundary = uuid.uuid4().hex
+    heads = [
+        (f"\r\n--{boundary}\r\nContent-Type: {content_type}\r\n"
+         f"Content-Range: bytes {start}-{end}/{size}\r\n\r\n").encode("latin-1")
+        for start, end in ranges
+    ]
+    tail = f"\r\n--{boundary}--\r\n".encode("latin-1")
+    length = sum(len(h) for h in heads) + sum(e - s + 1 for s, e in ranges) + len(tail)
+
+    def body():
+        for head, (start, end) in zip(heads, ranges):
+            yield head
+            yield from storage.get_range(key, start, end)
+        yield tail
+
+    return f"multipart/byteranges; boundary={boundary}", length, body()
+
+
+def _offload_response(f: File, path: str, headers: dict) -> Response | None:
+    """
+    Flask solo resuelve DB + autorización; los bytes los manda el proxy
+    (nginx con X-Accel-Redirect, Apache/lighttpd con X-Sendfile) con
+    sendfile(2). El proxy también resuelve Range sobre el archivo real.
+    """
+    mode = current_app.config.get("DOWNLOAD_OFFLOAD")
+    if mode == "x-accel":
+        rel = os.path.relpath(path, current_app.config["UPLOAD_FOLDER"])
+        if rel.startswith(".."):
+            return None  # fuera del root que expone la location interna de nginx
+        prefix = current_app.config["X_ACCEL_REDIRECT_PREFIX"].rstrip("/")
+        location = f"{prefix}/{quote(rel.replace(os.sep, '/'))}"
+        return Response(mimetype=f.content_type,
+                        headers={**headers, "X-Accel-Redirect": location})
+    if mode == "x-sendfile":
+        return Response(mimetype=f.content_type,
+                        headers={**headers, "X-Sendfile": os.path.abspath(path)})
+    return None
+
+
+def _range_body(storage: StorageBackend, f: File, path: str | None, start: int, end: int):
+    """
+    Sin proxy: si corre bajo gunicorn, devolvemos el archivo por
+    wsgi.file_wrapper ya posicionado en start; gunicorn lo envía con
+    os.sendfile() y corta en Content-Length. Otros servidores reciben el
+    stream en Python.
+    """
+    if (path and current_app.config.get("DOWNLOAD_OFFLOAD") == "sendfile"
+            and request.environ.get("SERVER_SOFTWARE", "").startswith("gunicorn")):
+        fh = open(path, "rb")
+        fh.seek(start)
+        return wrap_file(request.environ, fh)
+    return storage.get_range(f.storage_path, start, end)
+
+
+def _body_response(f: File, storage: StorageBackend, headers: dict, ranges) -> Response:
+    size = f.size_bytes
+    path = storage.local_path(f.storage_path)
+    if path:
+        offloaded = _offload_response(f, path, headers)
+        if offloaded is not None:
+            return offloaded
+
+    if ranges == []:
+        return Response(status=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    if ranges and len(ranges) == 1:
+        start, end = ranges[0]
+        return Response(
+            _range_body(storage, f, path, start, end),
+            status=206,
+            mimetype=f.content_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}",
+                     "Content-Length": str(end - start + 1)},
+            direct_passthrough=True,
+        )
+    if ranges:
+        ctype, length, body = _multipart_byteranges(
+            storage, f.storage_path, ranges, size, f.content_type)
+        return Response(body, status=206, content_type=ctype,
+                        headers={**headers, "Content-Length": str(length)},
+                        direct_passthrough=True)
+
+    if path:
+        # send_file usa wsgi.file_wrapper: bajo gunicorn ya es os.sendfile()
+        resp = send_file(path, mimetype=f.content_type, as_attachment=False,
+                         download_name=f.name, conditional=False, etag=False)
+        resp.headers.update(headers)
+        return resp
+    return Response(storage.get_range(f.storage_path), mimetype=f.content_type,
+                    headers={**headers, "Content-Length": str(size)},
+                    direct_passthrough=True)
+
+
+def file_response(f: File, storage: StorageBackend):
+    """
+    Respuesta de descarga con ETag fuerte (checksum_sha256), Last-Modified
+    (updated_at) y soporte de Range. Los 304 se deciden solo con la fila de
+    la DB, sin tocar el storage.
+    """
+    etag = f.checksum_sha256
+    last_modified = _last_modified(f)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "private, no-cache",
+        "Content-Disposition": content_disposition(f.name),
+    }
+
+    if _not_modified(etag, last_modified):
+        resp = Response(status=304, headers=headers)
+    else:
+        # S3: el cliente descarga directo del bucket (el bucket resuelve Range)
+        url = storage.presigned_url(f.storage_path, download_name=f.name,
+                                    content_type=f.content_type)
+        if url:
+            return redirect(url)
+        resp = _body_response(f, storage, headers,
+                              _requested_ranges(f.size_bytes, etag, last_modified))
+        if request.method != "HEAD" and resp.status_code in (200, 206):
+            # con offload (x-accel / x-sendfile) el proxy manda los bytes: no se cuentan
+            count_download_bytes(resp.content_length or 0)
+
+    if etag:
+        resp.set_etag(etag)
+    resp.last_modified = last_modified
+    return resp
+
+
+def thumbnail_response(f: File, size: int, storage: StorageBackend):
+    """
+    Miniatura de la primera página (WebP). El ETag sale de checksum + tamaño
+    y el 304 se decide sin tocar el storage; si la imagen no existe se genera
+    en este request y queda guardada para los siguientes.
+    """
+    etag = f"{f.checksum_sha256 or f.id}-{size}"
+    headers = {"Cache-Control": f"private, max-age={THUMBNAIL_MAX_AGE}, immutable"}
+
+    if _not_modified(etag, None):
+        resp = Response(status=304, headers=headers)
+    else:
+        key = ensure_thumbnail(storage, f.storage_path, size)
+        path = storage.local_path(key)
+        if path:
+            resp = send_file(path, mimetype=THUMBNAIL_CONTENT_TYPE,
+                             conditional=False, etag=False)
+            resp.headers.update(headers)
+        else:
+            # unos KB: se leen enteros en vez de redirigir a una URL firmada
+            # que caducaría antes que la cache del navegador
+            resp = Response(b"".join(storage.get_range(key)),
+                            mimetype=THUMBNAIL_CONTENT_TYPE, headers=headers)
+    resp.set_etag(etag)
+    return resp
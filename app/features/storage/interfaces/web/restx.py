@@ -1,6 +1,7 @@
 # app/features/storage/interfaces/web/restx.py
 from flask_restx import Namespace, Resource, fields, reqparse
-from flask import request, current_app, send_file
+from flask_restx.mask import Mask, MaskError
+from flask import request, current_app, Response
 from werkzeug.datastructures import FileStorage
 from uuid import UUID
 
@@ -9,11 +10,29 @@ from app.features.storage.aplications.services.datarooms_services import (
     create_dataroom, list_datarooms, get_dataroom
 )
 from app.features.storage.aplications.services.folders_services import (
-    create_folder, rename_folder, delete_folder_recursive, list_folders, list_files
+    create_folder, rename_folder, delete_folder_recursive, list_folders, list_files,
+    get_tree, move_folder,
 )
 from app.features.storage.aplications.services.storege_services import (
-    upload_pdf, rename_file, delete_file, get_file_by_id, get_file_disk_path,
+    upload_pdf, rename_file, delete_file, get_file_by_id,
 )
+from app.features.storage.aplications.services.trash_services import (
+    trash_folder, restore_folder, trash_file, restore_file, list_trash, purge_trash,
+)
+from app.features.storage.aplications.services.batch_services import upload_batch
+from app.features.storage.aplications.services.search_services import search_files, search_names
+from app.features.storage.aplications.services.archive_services import folder_archive
+from app.features.storage.aplications.services.thumbnail_services import (
+    THUMBNAIL_SIZES, DEFAULT_THUMBNAIL_SIZE, thumbnails_available,
+)
+from app.features.storage.aplications.services.resumable_services import (
+    create_upload, get_upload, append_chunk, finalize_upload, cancel_upload,
+)
+from app.features.storage.infrastructure.storage_backend import get_storage
+from app.features.storage.interfaces.web.downloads import (
+    file_response, content_disposition, thumbnail_response,
+)
+from app.features.storage.interfaces.web.serializers import marshal_list_fast
 
 ns = Namespace(
     "storage",
@@ -45,6 +64,70 @@ folder_contents_model = ns.model("FolderContents", {
     "files": fields.List(fields.Raw),   # simplificado
 })
 
+tree_file_model = ns.model("TreeFile", {
+    "id": fields.String,
+    "name": fields.String,
+    "original_filename": fields.String,
+    "size_bytes": fields.Integer,
+    "content_type": fields.String,
+    "version": fields.Integer,
+})
+
+tree_folder_model = ns.model("TreeFolder", {
+    "id": fields.String,
+    "name": fields.String,
+    "path": fields.String,
+    "parent_id": fields.String,
+    "children": fields.List(fields.Raw, description="TreeFolder anidados"),
+    "files": fields.List(fields.Nested(tree_file_model)),
+})
+
+tree_model = ns.model("FolderTree", {
+    "folders": fields.List(fields.Nested(tree_folder_model)),
+    "next_cursor": fields.String(description="path desde donde pedir la página siguiente"),
+})
+
+tree_parser = ns.parser()
+tree_parser.add_argument("depth", type=int, location="args",
+                         help="Niveles a devolver (1 = solo raíz)")
+tree_parser.add_argument("cursor", type=str, location="args",
+                         help="next_cursor de la página anterior")
+tree_parser.add_argument("limit", type=int, location="args", default=500)
+tree_parser.add_argument("files", type=int, location="args", default=1,
+                         help="0 para omitir archivos")
+
+search_parser = ns.parser()
+search_parser.add_argument("q", type=str, location="args", required=True,
+                           help='Texto a buscar (sintaxis web: "frase", -excluir, OR)')
+search_parser.add_argument("limit", type=int, location="args", default=20)
+
+search_hit_model = ns.model("SearchHit", {
+    "id": fields.String,
+    "name": fields.String,
+    "folder_id": fields.String,
+    "folder_path": fields.String,
+    "size_bytes": fields.Integer,
+    "rank": fields.Float,
+    "snippet": fields.String(description="Fragmentos con <b>coincidencias</b>"),
+})
+
+name_search_parser = ns.parser()
+name_search_parser.add_argument("q", type=str, location="args", required=True)
+name_search_parser.add_argument("mode", type=str, location="args", default="substring",
+                                choices=("prefix", "substring", "fuzzy"))
+name_search_parser.add_argument("type", type=str, location="args", default="all",
+                                choices=("all", "files", "folders"))
+name_search_parser.add_argument("limit", type=int, location="args", default=20)
+
+name_hit_model = ns.model("NameHit", {
+    "type": fields.String(description="file | folder"),
+    "id": fields.String,
+    "name": fields.String,
+    "path": fields.String,
+    "parent_id": fields.String(description="Carpeta que lo contiene"),
+    "score": fields.Float,
+})
+
 file_model = ns.model("File", {
     "id": fields.String,
     "name": fields.String,
@@ -55,14 +138,87 @@ file_model = ns.model("File", {
     "version": fields.Integer,
 })
 
+thumbnail_parser = ns.parser()
+thumbnail_parser.add_argument("size", type=int, location="args", default=DEFAULT_THUMBNAIL_SIZE,
+                              choices=THUMBNAIL_SIZES, help="Lado mayor en px")
+
 upload_parser = ns.parser()
 upload_parser.add_argument("file", type=FileStorage,
                            location="files", required=True, help="PDF a subir")
 
+list_parser = ns.parser()
+list_parser.add_argument("limit", type=int, location="args",
+                         help="Tamaño de página; sin limit ni cursor, la lista completa")
+list_parser.add_argument("cursor", type=str, location="args",
+                         help="Valor de X-Next-Cursor de la página anterior")
+list_parser.add_argument("sort", type=str, location="args",
+                         help="Orden (p.ej. name, -created_at)")
+
+
+def _list_page(service, **kwargs):
+    """
+    Llama a un listado paginado con limit/cursor/sort del query string y las
+    columnas de X-Fields; el cursor siguiente va en el header X-Next-Cursor
+    (el cuerpo sigue siendo una lista). Sin ?limit= ni ?cursor= la lista va
+    completa: los clientes que no conocen la paginación no pierden filas.
+    """
+    args = list_parser.parse_args()
+    if args["sort"]:
+        kwargs["sort"] = args["sort"]
+    try:
+        mask = Mask(request.headers.get("X-Fields"))
+    except MaskError:
+        mask = None  # marshal responde el 400 de máscara inválida
+    rows, next_cursor = service(
+        limit=args["limit"] or (current_app.config["LIST_DEFAULT_LIMIT"]
+                                if args["cursor"] else None),
+        cursor=args["cursor"],
+        fields=set(mask) if mask else None,
+        max_limit=current_app.config["LIST_MAX_LIMIT"],
+        **kwargs,
+    )
+    if next_cursor:
+        return rows, 200, {"X-Next-Cursor": next_cursor}
+    return rows
+
 rename_parser = ns.model("Rename", {
     "name": fields.String(required=True),
 })
 
+move_model = ns.model("MoveFolder", {
+    "parent_id": fields.String(description="Carpeta destino; null para mover a la raíz"),
+})
+
+delete_parser = ns.parser()
+delete_parser.add_argument("permanent", type=int, location="args", default=0,
+                           help="1 para borrar definitivamente (sin papelera)")
+
+trash_folder_model = ns.model("TrashFolder", {
+    "id": fields.String,
+    "name": fields.String,
+    "path": fields.String,
+    "parent_id": fields.String,
+    "deleted_at": fields.String,
+})
+
+trash_file_model = ns.model("TrashFile", {
+    "id": fields.String,
+    "name": fields.String,
+    "folder_id": fields.String,
+    "folder_path": fields.String,
+    "size_bytes": fields.Integer,
+    "deleted_at": fields.String,
+})
+
+trash_model = ns.model("Trash", {
+    "folders": fields.List(fields.Nested(trash_folder_model)),
+    "files": fields.List(fields.Nested(trash_file_model)),
+})
+
+purge_parser = ns.parser()
+purge_parser.add_argument("older_than_days", type=int, location="args",
+                          help="Solo lo borrado hace más de N días")
+
 # ---------- Health ----------
 
 
@@ -77,10 +233,11 @@ class Ping(Resource):
 
 @ns.route("/datarooms")
 class DataroomList(Resource):
-    @ns.marshal_list_with(dataroom_model)
+    @ns.expect(list_parser)
+    @marshal_list_fast(ns, dataroom_model)
     def get(self):
-        """Lista datarooms."""
-        return list_datarooms()
+        """Lista datarooms (paginado por cursor; sort: -created_at, created_at, name)."""
+        return _list_page(list_datarooms)
 
     @ns.expect(create_dataroom_model, validate=True)
     @ns.marshal_with(dataroom_model, code=201)
@@ -122,18 +279,58 @@ class FolderCreate(Resource):
 
 @ns.route("/datarooms/<uuid:dataroom_id>/folders")
 class DataroomFolders(Resource):
-    @ns.marshal_list_with(folder_model, code=200)
+    @ns.expect(list_parser)
+    @marshal_list_fast(ns, folder_model)
     def get(self, dataroom_id: UUID):
-        """Lista TODOS los folders que pertenecen a un dataroom."""
-        return list_folders(dataroom_id=dataroom_id)
+        """Lista los folders de un dataroom (paginado por cursor; sort: path, created_at, -created_at)."""
+        return _list_page(list_folders, dataroom_id=dataroom_id)
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/tree")
+class DataroomTree(Resource):
+    @ns.expect(tree_parser)
+    @ns.response(200, "OK", tree_model)
+    def get(self, dataroom_id: UUID):
+        """Árbol de carpetas y archivos del dataroom (paginado por path)."""
+        args = tree_parser.parse_args()
+        return get_tree(
+            dataroom_id=dataroom_id,
+            max_depth=args["depth"],
+            cursor=args["cursor"],
+            limit=args["limit"],
+            include_files=bool(args["files"]),
+        )
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/search")
+class DataroomSearch(Resource):
+    @ns.expect(search_parser)
+    @ns.marshal_list_with(search_hit_model, code=200)
+    def get(self, dataroom_id: UUID):
+        """Búsqueda full-text en el contenido de los PDFs del dataroom (por relevancia)."""
+        args = search_parser.parse_args()
+        return search_files(dataroom_id=dataroom_id, q=args["q"], limit=args["limit"],
+                            text_config=current_app.config["SEARCH_TEXT_CONFIG"])
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/search/names")
+class DataroomNameSearch(Resource):
+    @ns.expect(name_search_parser)
+    @ns.marshal_list_with(name_hit_model, code=200)
+    def get(self, dataroom_id: UUID):
+        """Busca archivos (por nombre) y carpetas (por path): prefix, substring o fuzzy."""
+        args = name_search_parser.parse_args()
+        return search_names(dataroom_id=dataroom_id, q=args["q"], mode=args["mode"],
+                            kind=args["type"], limit=args["limit"])
 
 
 @ns.route("/folders/<uuid:folder_id>/files")
 class FolderFiles(Resource):
-    @ns.marshal_list_with(file_model, code=200)
+    @ns.expect(list_parser)
+    @marshal_list_fast(ns, file_model)
     def get(self, folder_id: UUID):
-        """Lista TODOS los archivos que pertenecen a un folder."""
-        return list_files(folder_id=folder_id)
+        """Lista los archivos de un folder (paginado por cursor; sort: name, -name, created_at, -created_at)."""
+        return _list_page(list_files, folder_id=folder_id)
 
 
 @ns.route("/folders/<uuid:folder_id>")
@@ -145,11 +342,50 @@ class FolderDetail(Resource):
         f = rename_folder(folder_id=folder_id, new_name=data["name"])
         return {"id": str(f.id), "name": f.name, "path": f.path}
 
+    @ns.expect(delete_parser)
     def delete(self, folder_id: UUID):
-        """Borra una carpeta (recursivo)."""
-        delete_folder_recursive(folder_id=folder_id)
+        """Manda la carpeta (y su subárbol) a la papelera; ?permanent=1 la borra definitivamente."""
+        if delete_parser.parse_args()["permanent"]:
+            delete_folder_recursive(folder_id=folder_id)
+        else:
+            trash_folder(folder_id=folder_id)
         return "", 204
 
+
+@ns.route("/folders/<uuid:folder_id>/restore")
+class FolderRestore(Resource):
+    def post(self, folder_id: UUID):
+        """Restaura desde la papelera la carpeta y lo que se borró junto con ella."""
+        f = restore_folder(folder_id=folder_id)
+        return {"id": str(f.id), "name": f.name, "path": f.path,
+                "parent_id": str(f.parent_id) if f.parent_id else None}
+
+
+@ns.route("/folders/<uuid:folder_id>/archive")
+class FolderArchive(Resource):
+    @ns.produces(["application/zip"])
+    def get(self, folder_id: UUID):
+        """Descarga la carpeta (y todo su subárbol) como ZIP en streaming."""
+        name, body = folder_archive(folder_id=folder_id, storage=get_storage())
+        return Response(
+            body,
+            mimetype="application/zip",
+            headers={"Content-Disposition": content_disposition(name, "attachment"),
+                     "X-Accel-Buffering": "no"},
+            direct_passthrough=True,
+        )
+
+
+@ns.route("/folders/<uuid:folder_id>/move")
+class FolderMove(Resource):
+    @ns.expect(move_model, validate=True)
+    def post(self, folder_id: UUID):
+        """Mueve una carpeta (y su subárbol) bajo otro padre."""
+        data = request.get_json() or {}
+        f = move_folder(folder_id=folder_id, new_parent_id=data.get("parent_id"))
+        return {"id": str(f.id), "name": f.name, "path": f.path,
+                "parent_id": str(f.parent_id) if f.parent_id else None}
+
 # ---------- Files ----------
 
 
@@ -178,18 +414,147 @@ class FileUpload(Resource):
             dataroom_id=dataroom_id,
             folder_id=folder_id,
             file_storage=args["file"],  # nombre del campo: "file"
-            upload_dir=current_app.config["UPLOAD_FOLDER"],
+            storage=get_storage(),
+            chunk_size=current_app.config["UPLOAD_CHUNK_SIZE"],
         )
         return saved, 201
 
 
+batch_upload_parser = ns.parser()
+batch_upload_parser.add_argument(
+    "files",
+    type=FileStorage,
+    location="files",
+    action="append",
+    required=True,
+    help="PDFs a subir (o un único .zip con carpetas)",
+)
+
+batch_result_model = ns.model("BatchUploadItem", {
+    "source": fields.String(description="Nombre enviado / ruta dentro del ZIP"),
+    "status": fields.String(description="created | error"),
+    "id": fields.String,
+    "name": fields.String,
+    "folder_id": fields.String,
+    "size_bytes": fields.Integer,
+    "error": fields.String,
+})
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/folders/<uuid:folder_id>/files/batch")
+class FileBatchUpload(Resource):
+    @ns.expect(batch_upload_parser)
+    @ns.doc(consumes=["multipart/form-data"])
+    @ns.response(200, "Resultado por ítem", [batch_result_model])
+    def post(self, dataroom_id: UUID, folder_id: UUID):
+        """Sube muchos PDFs o un ZIP (recrea sus carpetas) en una sola transacción."""
+        # el lote puede superar el límite de un upload individual
+        request.max_content_length = current_app.config["BATCH_MAX_CONTENT_LENGTH"]
+        args = batch_upload_parser.parse_args()
+        return upload_batch(
+            dataroom_id=dataroom_id,
+            folder_id=folder_id,
+            file_storages=args["files"],
+            storage=get_storage(),
+            chunk_size=current_app.config["UPLOAD_CHUNK_SIZE"],
+            max_items=current_app.config["BATCH_MAX_ITEMS"],
+        )
+
+
+# ---------- Subidas reanudables (tus-style) ----------
+
+
+create_upload_model = ns.model("CreateUpload", {
+    "filename": fields.String(required=True),
+    "length": fields.Integer(required=True, description="Tamaño total en bytes"),
+})
+
+upload_session_model = ns.model("UploadSession", {
+    "id": fields.String,
+    "filename": fields.String,
+    "offset": fields.Integer,
+    "length": fields.Integer,
+    "expires_at": fields.DateTime,
+})
+
+
+def _upload_headers(up, offset: int) -> dict:
+    return {
+        "Upload-Offset": str(offset),
+        "Upload-Length": str(up.upload_length),
+        "Upload-Expires": up.expires_at.isoformat() + "Z",
+        "Cache-Control": "no-store",
+    }
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/folders/<uuid:folder_id>/uploads")
+class UploadCreate(Resource):
+    @ns.expect(create_upload_model, validate=True)
+    @ns.response(201, "Subida creada", upload_session_model)
+    def post(self, dataroom_id: UUID, folder_id: UUID):
+        """Inicia una subida reanudable; luego PATCH /uploads/{id} con los chunks."""
+        data = request.get_json()
+        up = create_upload(
+            dataroom_id=dataroom_id,
+            folder_id=folder_id,
+            filename=data["filename"],
+            length=data["length"],
+            storage=get_storage(),
+            max_size=current_app.config["RESUMABLE_MAX_SIZE"],
+            ttl_seconds=current_app.config["RESUMABLE_TTL_SECONDS"],
+        )
+        body = {"id": str(up.id), "filename": up.filename, "offset": 0,
+                "length": up.upload_length, "expires_at": up.expires_at.isoformat()}
+        headers = {**_upload_headers(up, 0),
+                   "Location": f"{ns.path}/uploads/{up.id}"}
+        return body, 201, headers
+
+
+@ns.route("/uploads/<uuid:upload_id>")
+class UploadDetail(Resource):
+    def head(self, upload_id: UUID):
+        """Offset actual (Upload-Offset) para reanudar."""
+        up, offset = get_upload(upload_id)
+        return Response(status=200, headers=_upload_headers(up, offset))
+
+    @ns.doc(consumes=["application/offset+octet-stream"],
+            params={"Upload-Offset": {"in": "header", "type": "integer", "required": True}})
+    def patch(self, upload_id: UUID):
+        """Agrega un chunk en Upload-Offset (cuerpo binario crudo)."""
+        try:
+            offset = int(request.headers["Upload-Offset"])
+        except (KeyError, ValueError):
+            raise ValueError("Missing or invalid Upload-Offset header")
+        new_offset = append_chunk(
+            upload_id=upload_id,
+            offset=offset,
+            stream=request.stream,
+            chunk_size=current_app.config["UPLOAD_CHUNK_SIZE"],
+            ttl_seconds=current_app.config["RESUMABLE_TTL_SECONDS"],
+        )
+        up, _ = get_upload(upload_id)
+        return Response(status=204, headers=_upload_headers(up, new_offset))
+
+    def delete(self, upload_id: UUID):
+        """Cancela la subida y borra lo recibido."""
+        cancel_upload(upload_id)
+        return "", 204
+
+
+@ns.route("/uploads/<uuid:upload_id>/finalize")
+class UploadFinalize(Resource):
+    @ns.marshal_with(file_model, code=201)
+    def post(self, upload_id: UUID):
+        """Completa la subida: verifica tamaño, calcula checksum y crea el File."""
+        return finalize_upload(upload_id=upload_id, storage=get_storage()), 201
+
+
 @ns.route("/files/<uuid:file_id>")
 class FileDetail(Resource):
     def get(self, file_id: UUID):
-        """Devuelve el PDF (stream)."""
+        """Devuelve el PDF (stream; soporta Range, ETag y GET condicional)."""
         f = get_file_by_id(file_id)
-        path = get_file_disk_path(f)
-        return send_file(path, mimetype=f.content_type, as_attachment=False, download_name=f.name)
+        return file_response(f, get_storage())
 
     @ns.expect(rename_parser, validate=True)
     def patch(self, file_id: UUID):
@@ -198,7 +563,46 @@ class FileDetail(Resource):
         f = rename_file(file_id=file_id, new_name=data["name"])
         return {"id": str(f.id), "name": f.name}
 
+    @ns.expect(delete_parser)
     def delete(self, file_id: UUID):
-        """Borra un archivo."""
-        delete_file(file_id)
+        """Manda el archivo a la papelera; ?permanent=1 lo borra definitivamente."""
+        if delete_parser.parse_args()["permanent"]:
+            delete_file(file_id)
+        else:
+            trash_file(file_id)
+        return "", 204
+
+
+@ns.route("/files/<uuid:file_id>/thumbnail")
+class FileThumbnail(Resource):
+    @ns.expect(thumbnail_parser)
+    def get(self, file_id: UUID):
+        """Miniatura WebP de la primera página (generada una vez por contenido y tamaño)."""
+        size = thumbnail_parser.parse_args()["size"]
+        if not thumbnails_available():
+            return {"error": "Thumbnails are not available (install pypdfium2 and Pillow)"}, 501
+        return thumbnail_response(get_file_by_id(file_id), size, get_storage())
+
+
+@ns.route("/files/<uuid:file_id>/restore")
+class FileRestore(Resource):
+    @ns.marshal_with(file_model, code=200)
+    def post(self, file_id: UUID):
+        """Restaura un archivo desde la papelera."""
+        return restore_file(file_id)
+
+
+@ns.route("/datarooms/<uuid:dataroom_id>/trash")
+class DataroomTrash(Resource):
+    @ns.response(200, "OK", trash_model)
+    def get(self, dataroom_id: UUID):
+        """Contenido de la papelera (solo los elementos borrados de primer nivel)."""
+        return list_trash(dataroom_id=dataroom_id)
+
+    @ns.expect(purge_parser)
+    def delete(self, dataroom_id: UUID):
+        """Vacía la papelera del dataroom (opcionalmente solo lo más antiguo)."""
+        days = purge_parser.parse_args()["older_than_days"]
+        purge_trash(dataroom_id=dataroom_id,
+                    older_than_seconds=days * 86400 if days is not None else None)
         return "", 204
@@ -0,0 +1,109 @@
+# app/features/storage/interfaces/web/serializers.py
+from collections.abc import Mapping
+from functools import wraps
+from inspect import isclass
+
+from flask import current_app, request
+from flask_restx import fields, marshal
+from flask_restx.mask import Mask, MaskError
+from flask_restx.utils import unpack
+
+
+def _str(value):
+    return str(value)
+
+
+def _int(value):
+    return int(value)
+
+
+# campos que sabemos formatear igual que restx (String.format / Integer.format)
+_FORMATTERS = {fields.String: _str, fields.Integer: _int}
+
+
+class ListEncoder:
+    """
+    Serializador precompilado de un modelo restx plano (String/Integer) para
+    listas de Rows/objetos/dicts. Produce exactamente los mismos dicts que
+    marshal() —mismas claves, orden, None y defaults— pero sin recorrer los
+    objetos Field por fila; el JSON lo sigue escribiendo output_json de restx,
+    así que el cuerpo de la respuesta es byte a byte el mismo.
+    """
+
+    def __init__(self, model):
+        self.model = model
+        self._specs = {}
+        for name, field in model.resolved.items():
+            if isclass(field):
+                field = field()
+            fmt = _FORMATTERS.get(type(field))
+            if fmt is None:
+                raise TypeError(f"{model.name}.{name}: {type(field).__name__} not supported")
+            self._specs[name] = (field.attribute or name, fmt, field.default)
+        self._compiled: dict = {}
+
+    def _plan(self, mask: str | None):
+        plan = self._compiled.get(mask)
+        if plan is None:
+            names = list(self._specs)
+            if mask:
+                parsed = Mask(mask, skip=True)
+                if any(v is not True for v in parsed.values()) or "*" in parsed:
+                    return None  # máscaras anidadas o comodín: que decida marshal()
+                names = [n for n in parsed if n in self._specs]
+            plan = tuple((n, *self._specs[n]) for n in names)
+            if len(self._compiled) < 256:
+                self._compiled[mask] = plan
+        return plan
+
+    def encode(self, rows, mask: str | None = None) -> list[dict] | None:
+        """Lista lista para output_json, o None si hay que caer en marshal()."""
+        plan = self._plan(mask)
+        if plan is None:
+            return None
+        out = []
+        for row in rows:
+            is_map = isinstance(row, Mapping)
+            item = {}
+            for name, attr, fmt, default in plan:
+                # como fields.get_value: clave si es dict, atributo si no
+                value = row.get(attr) if is_map else getattr(row, attr, None)
+                if value is None:
+                    # Raw.output: el default se formatea solo si es truthy
+                    item[name] = fmt(default) if default else default
+                else:
+                    item[name] = fmt(value)
+            out.append(item)
+        return out
+
+
+def marshal_list_fast(ns, model, code: int = 200, description: str | None = None):
+    """
+    Reemplazo de ns.marshal_list_with(model) para listados grandes. Deja la
+    misma documentación Swagger (incluido X-Fields) y, con FAST_SERIALIZER
+    activo, usa ListEncoder en vez de marshal(); si no, o si la máscara no es
+    plana, cae en el camino normal de restx.
+    """
+    encoder = ListEncoder(model)
+    restx_marshal = ns.marshal_list_with(model, code=code, description=description)
+
+    def decorator(f):
+        slow = restx_marshal(f)  # también deja f.__apidoc__ para Swagger
+
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if not current_app.config.get("FAST_SERIALIZER"):
+                return slow(*args, **kwargs)
+            data, status, headers = unpack(f(*args, **kwargs))
+            mask = request.headers.get(current_app.config["RESTX_MASK_HEADER"])
+            try:
+                body = encoder.encode(data, mask)
+            except MaskError:
+                body = None
+            if body is None:
+                body = marshal(data, model, mask=mask)
+            return body, status, headers
+
+        return wrapper
+
+    return decorator
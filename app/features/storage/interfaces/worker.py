@@ -0,0 +1,221 @@
+# app/features/storage/interfaces/worker.py
+import logging
+import multiprocessing
+import os
+import select as _select
+import signal
+import socket
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import create_engine
+from sqlalchemy.pool import NullPool
+
+from app.extensions import db
+from app.features.storage.aplications.services.jobs_services import (
+    JOB_TYPES, JOBS_CHANNEL, claim_jobs, complete_job, fail_job, requeue_stale_jobs,
+)
+
+log = logging.getLogger(__name__)
+
+# --- lado hijo: cada proceso del pool tiene su propia app (y su pool de conexiones) ---
+
+_child_app = None
+
+
+def _init_child() -> None:
+    global _child_app
+    # el apagado lo decide el dispatcher: el hijo termina el job en curso
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from app import create_app
+    _child_app = create_app()
+
+
+def _run_job(job_type: str, payload: dict) -> None:
+    with _child_app.app_context():
+        try:
+            JOB_TYPES[job_type].func(payload)
+        finally:
+            db.session.remove()
+
+
+# --- lado padre: reclama jobs y los reparte al pool ---
+
+def parse_concurrency(value: str | None) -> dict[str, int]:
+    """'extract_text=4,thumbnail=2' -> {'extract_text': 4, 'thumbnail': 2}"""
+    out = {}
+    for part in filter(None, (p.strip() for p in (value or "").split(","))):
+        name, sep, n = part.partition("=")
+        if not sep or not n.strip().isdigit():
+            raise ValueError(f"Invalid JOB_CONCURRENCY entry: {part!r}")
+        out[name.strip()] = int(n)
+    return out
+
+
+class _Wakeup:
+    """LISTEN en una conexión propia (NullPool) para no esperar al próximo poll."""
+
+    def __init__(self, url: str):
+        self._engine = create_engine(url, poolclass=NullPool)
+        self._conn = None
+
+    def wait(self, timeout: float) -> None:
+        try:
+            if self._conn is None:
+                conn = self._engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+                conn.exec_driver_sql(f"LISTEN {JOBS_CHANNEL}")
+                self._conn = conn
+            raw = self._conn.connection.dbapi_connection
+            if _select.select([raw], [], [], timeout) != ([], [], []):
+                raw.poll()
+                del raw.notifies[:]
+        except Exception:
+            log.warning("worker: LISTEN connection lost, falling back to polling", exc_info=True)
+            self.close()
+            time.sleep(timeout)
+
+    def close(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except Exception:
+                pass
+            self._conn = None
+
+
+class Dispatcher:
+    """
+    Bucle del `flask worker`: reclama jobs (SKIP LOCKED) respetando el límite
+    de concurrencia de cada tipo, los ejecuta en un ProcessPoolExecutor y
+    registra el resultado (borrar, o reintentar con backoff). Todo el acceso
+    a la tabla job lo hace este proceso; los hijos solo corren handlers.
+    """
+
+    def __init__(self, app, processes: int, types: list[str], concurrency: dict[str, int],
+                 poll_interval: float = 1.0, lease_seconds: float = 900.0):
+        self.app = app
+        self.processes = processes
+        self.types = types
+        self.limits = {t: max(1, concurrency.get(t, JOB_TYPES[t].concurrency)) for t in types}
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._running: dict = {}  # future -> (job_id, type, attempts)
+        self._stopping = False
+        self._pool_broken = False
+
+    def _new_pool(self) -> ProcessPoolExecutor:
+        # spawn: los hijos no heredan conexiones ni hilos del dispatcher
+        return ProcessPoolExecutor(max_workers=self.processes,
+                                   mp_context=multiprocessing.get_context("spawn"),
+                                   initializer=_init_child)
+
+    def stop(self, *_) -> None:
+        if not self._stopping:
+            log.info("worker: stopping, waiting for %d running jobs", len(self._running))
+        self._stopping = True
+
+    def run(self) -> None:
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        wakeup = _Wakeup(self.app.config.get("DATABASE_LISTEN_URI")
+                         or self.app.config["SQLALCHEMY_DATABASE_URI"])
+        pool = self._new_pool()
+        next_recovery = 0.0
+        log.info("worker %s: %d processes, limits %s", self.worker_id, self.processes, self.limits)
+        try:
+            with self.app.app_context():
+                while not (self._stopping and not self._running):
+                    try:
+                        if self._harvest() or self._pool_broken:
+                            pool.shutdown(wait=False, cancel_futures=True)
+                            pool = self._new_pool()
+                            self._pool_broken = False
+                        if not self._stopping:
+                            if time.monotonic() >= next_recovery:
+                                n = requeue_stale_jobs(self.lease_seconds)
+                                if n:
+                                    log.warning("worker: %d jobs with expired lease requeued", n)
+                                next_recovery = time.monotonic() + min(60.0, self.lease_seconds / 4)
+                            self._dispatch(pool)
+                    except Exception:
+                        # p.ej. la base se cayó: lo que no se pudo registrar vuelve por lease
+                        log.exception("worker: dispatcher iteration failed")
+                        db.session.rollback()
+                        time.sleep(self.poll_interval)
+                    if self._running:
+                        wait(list(self._running), timeout=self.poll_interval,
+                             return_when=FIRST_COMPLETED)
+                    elif not self._stopping:
+                        wakeup.wait(self.poll_interval)
+        finally:
+            wakeup.close()
+            pool.shutdown(wait=True)
+
+    def _harvest(self) -> bool:
+        """Registra los jobs terminados; True si el pool se rompió (un hijo murió)."""
+        broken = False
+        for fut in [f for f in self._running if f.done()]:
+            job_id, job_type, attempts = self._running.pop(fut)
+            # cancelado = quedó en un pool roto que ya se descartó
+            exc = BrokenProcessPool("job cancelled") if fut.cancelled() else fut.exception()
+            if exc is None:
+                complete_job(job_id)
+                continue
+            broken = broken or isinstance(exc, BrokenProcessPool)
+            log.warning("worker: job %s (%s) failed on attempt %d: %s",
+                        job_id, job_type, attempts, exc)
+            fail_job(job_id, attempts, "".join(traceback.format_exception(exc)),
+                     JOB_TYPES[job_type].backoff_seconds)
+        return broken
+
+    def _dispatch(self, pool: ProcessPoolExecutor) -> None:
+        free = self.processes - len(self._running)
+        for job_type in self.types:
+            if free <= 0:
+                return
+            mine = sum(1 for _, t, _ in self._running.values() if t == job_type)
+            want = min(free, self.limits[job_type] - mine)
+            if want <= 0:
+                continue
+            for job in claim_jobs(job_type, want, self.worker_id, self.limits[job_type]):
+                try:
+                    fut = pool.submit(_run_job, job.type, job.payload)
+                except BrokenProcessPool as e:
+                    # el próximo _harvest no lo ve: se devuelve a la cola ya
+                    fail_job(job.id, job.attempts, repr(e), JOB_TYPES[job_type].backoff_seconds)
+                    self._pool_broken = True
+                    continue
+                self._running[fut] = (job.id, job.type, job.attempts)
+                free -= 1
+
+
+@click.command("worker")
+@click.option("--processes", type=int, default=None,
+              help="Procesos del pool (por defecto JOB_WORKER_PROCESSES).")
+@click.option("--types", "types_", default=None,
+              help="Tipos de job a atender, separados por coma (por defecto todos).")
+@with_appcontext
+def worker_command(processes: int | None, types_: str | None):
+    """Procesa la cola de jobs de background (texto, etc.) hasta recibir SIGTERM."""
+    app = current_app._get_current_object()
+    types = [t.strip() for t in types_.split(",")] if types_ else sorted(JOB_TYPES)
+    unknown = [t for t in types if t not in JOB_TYPES]
+    if unknown:
+        raise click.BadParameter(f"unknown job types: {', '.join(unknown)}", param_hint="--types")
+    try:
+        concurrency = parse_concurrency(app.config.get("JOB_CONCURRENCY"))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    Dispatcher(app,
+               processes=processes or app.config["JOB_WORKER_PROCESSES"],
+               types=types,
+               concurrency=concurrency,
+               poll_interval=app.config["JOB_POLL_INTERVAL_SECONDS"],
+               lease_seconds=app.config["JOB_LEASE_SECONDS"]).run()
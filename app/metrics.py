@@ -0,0 +1,203 @@
+# app/metrics.py
+import hmac
+import logging
+import os
+import time
+from collections import defaultdict
+
+from flask import Response, current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+log = logging.getLogger(__name__)
+# logger propio para poder mandarlo a otro handler / nivel
+slow_log = logging.getLogger("asvita.slow_requests")
+
+# buckets en segundos: de un lookup cacheado (~ms) a un upload grande
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 250, 1000)
+SLOW_SQL_SHOWN = 5
+MAX_SQL_CHARS = 500
+
+_metrics = None  # _Metrics si prometheus_client está instalado y METRICS_ENABLED
+_sql_hooked = False
+
+
+class _Metrics:
+    """
+    Colectores del proceso. Con PROMETHEUS_MULTIPROC_DIR (lo define
+    gunicorn.conf.py) cada worker escribe sus valores en archivos mmap y
+    /metrics los suma: da igual qué worker atienda el scrape.
+    """
+
+    def __init__(self):
+        from prometheus_client import Counter, Histogram  # dependencia opcional
+
+        self.request_seconds = Histogram(
+            "asvita_http_request_duration_seconds",
+            "Tiempo hasta tener la respuesta (sin el envío del cuerpo)",
+            ["method", "endpoint", "status"], buckets=LATENCY_BUCKETS)
+        self.request_queries = Histogram(
+            "asvita_http_request_db_queries", "Consultas SQL por request",
+            ["endpoint"], buckets=QUERY_COUNT_BUCKETS)
+        self.request_db_seconds = Histogram(
+            "asvita_http_request_db_seconds", "Tiempo en SQL por request",
+            ["endpoint"], buckets=LATENCY_BUCKETS)
+        self.upload_bytes = Counter(
+            "asvita_upload_bytes", "Bytes de PDFs recibidos", ["path"])
+        self.download_bytes = Counter(
+            "asvita_download_bytes", "Bytes de archivos servidos (incluye Range)", ["path"])
+        self.upload_phase_seconds = Histogram(
+            "asvita_upload_phase_seconds",
+            "Duración de cada fase de un upload (hash+staging, escritura del blob, commit)",
+            ["phase"], buckets=LATENCY_BUCKETS)
+
+
+def _endpoint() -> str:
+    # la regla de la URL, no el path: cardinalidad acotada (sin ids)
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+# --- API para los services (no hacen nada si las métricas están apagadas) ---
+
+def observe_upload_phase(phase: str, seconds: float) -> None:
+    if _metrics is not None:
+        _metrics.upload_phase_seconds.labels(phase).observe(seconds)
+
+
+def count_upload_bytes(n: int, path: str = "flask") -> None:
+    if _metrics is not None and n:
+        _metrics.upload_bytes.labels(path).inc(n)
+
+
+def count_download_bytes(n: int, path: str = "flask") -> None:
+    if _metrics is not None and n:
+        _metrics.download_bytes.labels(path).inc(n)
+
+
+# --- SQL por request ---
+
+class _SqlStats:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        # sentencia -> [veces, segundos]: un N+1 aparece como la misma
+        # sentencia repetida decenas de veces
+        self.statements = defaultdict(lambda: [0, 0.0])
+
+    def add(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        entry = self.statements[statement]
+        entry[0] += 1
+        entry[1] += seconds
+
+    def worst(self, n: int = SLOW_SQL_SHOWN) -> list:
+        return sorted(self.statements.items(), key=lambda kv: kv[1][1], reverse=True)[:n]
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # una conexión ejecuta un cursor a la vez: alcanza con un valor
+    conn.info["_query_start"] = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info.pop("_query_start", None)
+    if started is None:
+        return
+    elapsed = time.perf_counter() - started
+    if has_request_context():
+        stats = g.get("_sql_stats")
+        if stats is not None:
+            stats.add(statement, elapsed)
+
+
+def _hook_sql() -> None:
+    # a nivel de clase: cubre el primario, la réplica y cualquier engine nuevo
+    global _sql_hooked
+    if not _sql_hooked:
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+        _sql_hooked = True
+
+
+def _log_slow(stats: _SqlStats, status: int, elapsed: float) -> None:
+    lines = [f"{request.method} {request.full_path.rstrip('?')} -> {status} "
+             f"in {elapsed * 1000:.0f} ms, {stats.count} queries "
+             f"({stats.seconds * 1000:.0f} ms in SQL)"]
+    for statement, (n, seconds) in stats.worst():
+        sql = " ".join(statement.split())
+        if len(sql) > MAX_SQL_CHARS:
+            sql = sql[:MAX_SQL_CHARS] + "..."
+        lines.append(f"  {n}x {seconds * 1000:.1f} ms  {sql}")
+    slow_log.warning("\n".join(lines))
+
+
+# --- endpoint ---
+
+def _metrics_view():
+    token = current_app.config.get("METRICS_TOKEN")
+    if token and not hmac.compare_digest(
+            request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return Response("unauthorized\n", status=401, mimetype="text/plain")
+    from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, generate_latest
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+def init_metrics(app) -> None:
+    """
+    Instrumenta los requests: latencia por endpoint, consultas SQL y tiempo
+    en SQL por request (eventos de SQLAlchemy) y un log de requests lentos
+    (SLOW_REQUEST_MS) o con demasiadas consultas (SLOW_REQUEST_QUERIES) con
+    las sentencias que más tiempo tomaron. Sin prometheus_client el log
+    lento sigue funcionando y /metrics no se registra.
+    """
+    global _metrics
+    slow_ms = app.config.get("SLOW_REQUEST_MS", 0)
+    slow_queries = app.config.get("SLOW_REQUEST_QUERIES", 0)
+    if app.config.get("METRICS_ENABLED") and _metrics is None:
+        try:
+            _metrics = _Metrics()
+        except ImportError:
+            log.warning("metrics: prometheus_client is not installed, /metrics disabled")
+        else:
+            if not app.config.get("METRICS_TOKEN"):
+                log.warning("metrics: /metrics is public, set METRICS_TOKEN to protect it")
+    if _metrics is None and not slow_ms and not slow_queries:
+        return
+    _hook_sql()
+
+    if _metrics is not None:
+        app.add_url_rule("/metrics", "metrics", _metrics_view)
+
+    @app.before_request
+    def _start_timer():
+        g._request_started = time.perf_counter()
+        g._sql_stats = _SqlStats()
+
+    @app.after_request
+    def _record(response):
+        started = g.pop("_request_started", None)
+        stats = g.pop("_sql_stats", None)
+        if started is None or stats is None:
+            return response
+        elapsed = time.perf_counter() - started
+        if _metrics is not None:
+            endpoint = _endpoint()
+            _metrics.request_seconds.labels(
+                request.method, endpoint, str(response.status_code)).observe(elapsed)
+            _metrics.request_queries.labels(endpoint).observe(stats.count)
+            _metrics.request_db_seconds.labels(endpoint).observe(stats.seconds)
+        if ((slow_ms and elapsed * 1000 >= slow_ms)
+                or (slow_queries and stats.count >= slow_queries)):
+            _log_slow(stats, response.status_code, elapsed)
+        return response
@@ -0,0 +1,9 @@
+# asgi.py: entrada de uvicorn (SERVER_MODE=asgi); manage.py sigue siendo la de gunicorn/flask
+import os
+
+# como en gunicorn.conf.py: el statement timeout es solo del servidor web
+os.environ["WEB_SERVER_PROCESS"] = "1"
+
+from app.features.storage.interfaces.asgi.app import create_asgi_app  # noqa: E402
+
+app = create_asgi_app()
@@ -0,0 +1,79 @@
+# benchmarks/compare.py
+"""
+Compara dos reportes de benchmarks/run.py:
+
+    python -m benchmarks.compare baseline.json current.json --threshold 10
+
+Sale con 1 si alguna operación empeoró más de --threshold % en p99 o en
+throughput (o si aparecen errores que el baseline no tenía).
+"""
+import argparse
+import json
+import sys
+
+
+def _pct(before: float, after: float) -> float | None:
+    if not before:
+        return None
+    return (after - before) / before * 100
+
+
+def compare_reports(baseline: dict, current: dict, threshold: float = 10.0):
+    """[(op, métrica, antes, después, cambio %, regresión)], hubo_regresión."""
+    rows, regressed = [], False
+    if baseline.get("scale", {}).get("files") != current.get("scale", {}).get("files"):
+        print("warning: baseline was run at a different scale, numbers are not comparable",
+              file=sys.stderr)
+    for op, cur in current.get("results", {}).items():
+        base = baseline.get("results", {}).get(op)
+        if base is None:
+            rows.append((op, "new", None, None, None, False))
+            continue
+        checks = (
+            # (métrica, antes, después, peor_si_sube)
+            ("p50_ms", base["latency_ms"]["p50"], cur["latency_ms"]["p50"], True),
+            ("p99_ms", base["latency_ms"]["p99"], cur["latency_ms"]["p99"], True),
+            ("throughput_rps", base["throughput_rps"], cur["throughput_rps"], False),
+            ("errors", base["errors"], cur["errors"], True),
+        )
+        for metric, before, after, higher_is_worse in checks:
+            change = _pct(before, after)
+            if metric == "errors":
+                bad = after > before
+            elif metric == "p50_ms" or change is None:
+                bad = False  # p50 se informa; la regresión se decide por p99 y throughput
+            else:
+                bad = change > threshold if higher_is_worse else change < -threshold
+            regressed = regressed or bad
+            rows.append((op, metric, before, after, change, bad))
+    return rows, regressed
+
+
+def print_comparison(rows) -> None:
+    print(f"{'operation':15s} {'metric':15s} {'baseline':>12s} {'current':>12s} {'change':>9s}")
+    for op, metric, before, after, change, bad in rows:
+        if metric == "new":
+            print(f"{op:15s} (not in baseline)")
+            continue
+        pct = f"{change:+.1f}%" if change is not None else "-"
+        flag = "  REGRESSION" if bad else ""
+        print(f"{op:15s} {metric:15s} {before:>12} {after:>12} {pct:>9s}{flag}")
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("baseline")
+    p.add_argument("current")
+    p.add_argument("--threshold", type=float, default=10.0)
+    args = p.parse_args(argv)
+    with open(args.baseline) as fh:
+        baseline = json.load(fh)
+    with open(args.current) as fh:
+        current = json.load(fh)
+    rows, regressed = compare_reports(baseline, current, args.threshold)
+    print_comparison(rows)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
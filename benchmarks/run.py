@@ -0,0 +1,374 @@
+# benchmarks/run.py
+"""
+Benchmark de la API de storage contra un Postgres local.
+
+    python -m benchmarks.run --scale small --out bench.json
+    python -m benchmarks.run --scale medium --baseline bench-main.json
+    python -m benchmarks.run --url http://localhost:8000 --concurrency 16
+
+Siembra datos sintéticos (benchmarks/seed.py), corre cada operación con N
+clientes concurrentes y escribe un reporte JSON (throughput, p50/p90/p99).
+Sin --url los requests van in-process por el test client de Flask (mide
+routing + services + SQL + storage, sin red); con --url van por HTTP a un
+servidor ya levantado (gunicorn o uvicorn) que use la misma base y storage.
+"""
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+from benchmarks.compare import compare_reports, print_comparison
+from benchmarks.seed import SCALES, Scale, check_local_database, cleanup, make_pdf, seed
+
+API = "/api/v1/storage"
+REPORT_VERSION = 1
+OPERATIONS = ("upload", "download", "download_range", "list_folders", "list_files",
+              "rename_folder", "delete_folder")
+
+
+# --- clientes ---
+
+class FlaskClient:
+    """Un test client por hilo (no son thread-safe)."""
+
+    def __init__(self, app):
+        self._app = app
+        self._local = threading.local()
+
+    def request(self, method: str, path: str, body: bytes | None = None,
+                headers: dict | None = None) -> tuple[int, int]:
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = self._app.test_client()
+        resp = client.open(path, method=method, data=body, headers=headers or {})
+        try:
+            return resp.status_code, len(resp.get_data())
+        finally:
+            resp.close()
+
+
+class HttpClient:
+    """Conexión keep-alive por hilo (http.client, sin dependencias)."""
+
+    def __init__(self, base_url: str):
+        parts = urlsplit(base_url)
+        self._https = parts.scheme == "https"
+        self._netloc = parts.netloc
+        self._prefix = parts.path.rstrip("/")
+        self._local = threading.local()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            cls = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = self._local.conn = cls(self._netloc, timeout=120)
+        return conn
+
+    def request(self, method: str, path: str, body: bytes | None = None,
+                headers: dict | None = None) -> tuple[int, int]:
+        for attempt in (1, 2):
+            conn = self._conn()
+            try:
+                conn.request(method, self._prefix + path, body=body, headers=headers or {})
+                resp = conn.getresponse()
+                return resp.status, len(resp.read())
+            except (http.client.HTTPException, ConnectionError):
+                # el servidor cerró la conexión keep-alive: se reabre una vez
+                conn.close()
+                self._local.conn = None
+                if attempt == 2:
+                    raise
+
+
+def multipart_pdf(filename: str, data: bytes) -> tuple[bytes, str]:
+    boundary = uuid.uuid4().hex
+    body = b"".join((
+        f"--{boundary}\r\n".encode(),
+        f'Content-Disposition: form-data; name="file"; filename="{filename}"\r\n'.encode(),
+        b"Content-Type: application/pdf\r\n\r\n",
+        data,
+        f"\r\n--{boundary}--\r\n".encode(),
+    ))
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+# --- operaciones: i -> ((method, path, body, headers), status_ok); el
+# request se arma antes de empezar a medir ---
+
+class Workload:
+    def __init__(self, seeded, scale: Scale, upload_size: int, page_limit: int):
+        self.s = seeded
+        self.scale = scale
+        self.upload_size = upload_size
+        self.page_limit = page_limit
+        self.rng = random.Random(0)
+        # contenido de uploads distinto en cada corrida (si no, la 2da deduplica)
+        self.salt = random.randrange(1 << 20) * 1_000_000
+        self._lock = threading.Lock()
+
+    def _pick(self, seq):
+        with self._lock:
+            return self.rng.choice(seq)
+
+    def upload(self, i):
+        # contenido único: mide el camino completo (sin dedupe de blob)
+        body, ctype = multipart_pdf(f"upload-{i:06d}.pdf",
+                                    make_pdf(self.upload_size, self.salt + i))
+        folder_id = self._pick(self.s.folder_ids)
+        return ("POST", f"{API}/datarooms/{self.s.dataroom_id}/folders/{folder_id}/files",
+                body, {"Content-Type": ctype}), (201,)
+
+    def download(self, i):
+        return ("GET", f"{API}/files/{self._pick(self.s.file_ids)}", None, None), (200, 302)
+
+    def download_range(self, i):
+        # lo que pide un visor PDF: el primer bloque de 64 KiB
+        return ("GET", f"{API}/files/{self._pick(self.s.file_ids)}", None,
+                {"Range": "bytes=0-65535"}), (206, 302)
+
+    def list_folders(self, i):
+        return ("GET", f"{API}/datarooms/{self.s.dataroom_id}/folders?limit={self.page_limit}",
+                None, None), (200,)
+
+    def list_files(self, i):
+        return ("GET", f"{API}/folders/{self._pick(self.s.folder_ids)}/files"
+                       f"?limit={self.page_limit}", None, None), (200,)
+
+    def rename_folder(self, i):
+        # carpetas de primer nivel: cada rename reescribe el path de todo su subárbol
+        folder_id = self.s.root_ids[i % len(self.s.root_ids)]
+        body = json.dumps({"name": f"L1-{i % len(self.s.root_ids):03d}-r{i}"}).encode()
+        return ("PATCH", f"{API}/folders/{folder_id}", body,
+                {"Content-Type": "application/json"}), (200,)
+
+    def delete_folder(self, i):
+        folder_id = self.s.delete_root_ids[i]
+        return ("DELETE", f"{API}/folders/{folder_id}?permanent=1", None, None), (204,)
+
+    def max_requests(self, op: str) -> int | None:
+        # cada borrado consume un subárbol sembrado
+        return len(self.s.delete_root_ids) if op == "delete_folder" else None
+
+    def max_concurrency(self, op: str) -> int | None:
+        # dos renames del mismo folder a la vez solo medirían la espera del lock
+        return len(self.s.root_ids) if op == "rename_folder" else None
+
+
+# --- medición ---
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * p / 100
+    lo, hi = int(k), min(int(k) + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def run_operation(op: str, workload: Workload, client, requests: int, concurrency: int,
+                  warmup: int, offset: int = 0) -> dict:
+    func = getattr(workload, op)
+    latencies: list[float] = []
+    errors: dict[str, int] = {}
+    nbytes = 0
+    lock = threading.Lock()
+
+    def one(i: int, record: bool) -> None:
+        nonlocal nbytes
+        req, ok = func(i)
+        started = time.perf_counter()
+        try:
+            status, size = client.request(*req)
+            error = None if status in ok else str(status)
+        except Exception as e:  # el benchmark sigue; el error queda en el reporte
+            size, error = 0, type(e).__name__
+        elapsed = time.perf_counter() - started
+        if not record:
+            return
+        with lock:
+            latencies.append(elapsed)
+            nbytes += size
+            if error:
+                errors[error] = errors.get(error, 0) + 1
+
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(lambda i: one(i, False), range(offset, offset + warmup)))
+        started = time.perf_counter()
+        list(pool.map(lambda i: one(i, True),
+                      range(offset + warmup, offset + warmup + requests)))
+        wall = time.perf_counter() - started
+
+    values = sorted(latencies)
+    ms = lambda v: round(v * 1000, 3)  # noqa: E731
+    return {
+        "requests": len(values),
+        "concurrency": concurrency,
+        "errors": sum(errors.values()),
+        "error_statuses": errors,
+        "seconds": round(wall, 4),
+        "throughput_rps": round(len(values) / wall, 2) if wall else 0.0,
+        "bytes": nbytes,
+        "latency_ms": {
+            "p50": ms(percentile(values, 50)),
+            "p90": ms(percentile(values, 90)),
+            "p99": ms(percentile(values, 99)),
+            "mean": ms(statistics.fmean(values)) if values else 0.0,
+            "max": ms(values[-1]) if values else 0.0,
+        },
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _environment(app) -> dict:
+    from sqlalchemy import text
+    from app.extensions import db
+    with app.app_context():
+        server = db.session.execute(text("SHOW server_version")).scalar()
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "postgres": server,
+        "storage_backend": app.config.get("STORAGE_BACKEND"),
+        "metadata_cache_size": app.config.get("METADATA_CACHE_SIZE"),
+        "fast_serializer": app.config.get("FAST_SERIALIZER"),
+    }
+
+
+def _scale_from_args(args) -> Scale:
+    base = SCALES[args.scale]
+    overrides = {k: getattr(args, k) for k in
+                 ("depth", "fanout", "files_per_folder", "distinct_blobs", "delete_depth")
+                 if getattr(args, k) is not None}
+    if args.file_sizes:
+        overrides["file_sizes"] = [int(x) for x in args.file_sizes.split(",")]
+    scale = Scale(**{**base.__dict__, **overrides})
+    # tantos subárboles para borrar como requests de delete_folder
+    scale.delete_subtrees = args.requests_write + args.warmup
+    return scale
+
+
+def parse_args(argv=None):
+    p = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    p.add_argument("--scale", choices=sorted(SCALES), default="small")
+    p.add_argument("--depth", type=int, help="niveles de carpetas")
+    p.add_argument("--fanout", type=int, help="subcarpetas por carpeta")
+    p.add_argument("--files-per-folder", type=int)
+    p.add_argument("--file-sizes", help="tamaños en bytes separados por coma")
+    p.add_argument("--distinct-blobs", type=int)
+    p.add_argument("--delete-depth", type=int, help="profundidad de los subárboles que se borran")
+    p.add_argument("--upload-size", type=int, default=256 * 1024)
+    p.add_argument("--page-limit", type=int, default=100, help="?limit= de los listados")
+    p.add_argument("--ops", default=",".join(OPERATIONS),
+                   help=f"operaciones a medir (de: {', '.join(OPERATIONS)})")
+    p.add_argument("--requests", type=int, default=500, help="requests por operación de lectura")
+    p.add_argument("--requests-write", type=int, default=50,
+                   help="requests de upload, rename_folder y delete_folder")
+    p.add_argument("--concurrency", type=int, default=8)
+    p.add_argument("--warmup", type=int, default=10, help="requests no medidos al inicio")
+    p.add_argument("--url", help="servidor ya levantado (si no, in-process)")
+    p.add_argument("--out", default="benchmark-report.json")
+    p.add_argument("--baseline", help="reporte anterior para comparar")
+    p.add_argument("--threshold", type=float, default=10.0,
+                   help="%% de empeoramiento de p99 o throughput que cuenta como regresión")
+    p.add_argument("--keep", action="store_true", help="no borrar los datos sembrados")
+    p.add_argument("--cleanup-only", action="store_true",
+                   help="borrar datarooms bench-* de corridas anteriores y salir")
+    p.add_argument("--allow-remote", action="store_true",
+                   help="permitir una base que no sea local (escribe y borra datos)")
+    args = p.parse_args(argv)
+    ops = [o.strip() for o in args.ops.split(",") if o.strip()]
+    unknown = set(ops) - set(OPERATIONS)
+    if unknown:
+        p.error(f"unknown operations: {', '.join(sorted(unknown))}")
+    args.ops = ops
+    return args
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    from app import create_app
+    from app.extensions import db
+    app = create_app()
+
+    with app.app_context():
+        check_local_database(args.allow_remote)
+        if args.cleanup_only:
+            print(f"removed {cleanup()} benchmark datarooms")
+            return 0
+        scale = _scale_from_args(args)
+        print(f"seeding {scale.as_dict()} ...", file=sys.stderr)
+        started = time.perf_counter()
+        seeded = seed(app.extensions["storage"], scale)
+        seed_seconds = time.perf_counter() - started
+        db.session.remove()
+
+    client = HttpClient(args.url) if args.url else FlaskClient(app)
+    workload = Workload(seeded, scale, args.upload_size, args.page_limit)
+    results = {}
+    try:
+        for op in args.ops:
+            write = op in ("upload", "rename_folder", "delete_folder")
+            requests = args.requests_write if write else args.requests
+            limit = workload.max_requests(op)
+            warmup = args.warmup
+            if limit is not None:
+                requests = min(requests, max(limit - warmup, 0))
+            concurrency = min(args.concurrency, workload.max_concurrency(op) or args.concurrency)
+            print(f"{op}: {requests} requests, concurrency {concurrency}", file=sys.stderr)
+            results[op] = run_operation(op, workload, client, requests, concurrency, warmup)
+    finally:
+        if not args.keep:
+            with app.app_context():
+                cleanup()
+
+    report = {
+        "version": REPORT_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_commit": _git_commit(),
+        "target": args.url or "in-process",
+        "scale": {"name": args.scale, **scale.as_dict()},
+        "config": {"concurrency": args.concurrency, "requests": args.requests,
+                   "requests_write": args.requests_write, "warmup": args.warmup,
+                   "upload_size": args.upload_size, "page_limit": args.page_limit},
+        "environment": _environment(app),
+        "seed_seconds": round(seed_seconds, 3),
+        "results": results,
+    }
+    with open(args.out, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"report written to {args.out}", file=sys.stderr)
+
+    for op, r in results.items():
+        lat = r["latency_ms"]
+        print(f"{op:15s} {r['throughput_rps']:>9.1f} req/s  p50 {lat['p50']:>8.2f} ms  "
+              f"p99 {lat['p99']:>8.2f} ms  errors {r['errors']}")
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        rows, regressed = compare_reports(baseline, report, args.threshold)
+        print_comparison(rows)
+        return 1 if regressed else 0
+    return 1 if any(r["errors"] for r in results.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,211 @@
+# benchmarks/seed.py
+"""
+Datos sintéticos para el benchmark: datarooms con un árbol de carpetas de
+profundidad/fan-out configurables, N archivos por carpeta y blobs reales en
+el storage configurado. Todo se inserta set-based (unos pocos INSERT por
+lote), así sembrar 100k archivos toma segundos y no minutos.
+"""
+import hashlib
+import os
+import random
+import tempfile
+import uuid
+from dataclasses import asdict, dataclass, field
+
+from sqlalchemy import delete, insert, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.engine import make_url
+
+from app.extensions import db
+from app.database.models.blob import Blob
+from app.database.models.dataroom import Dataroom
+from app.database.models.file import File
+from app.database.models.folder import Folder
+from app.features.storage.aplications.services.folders_services import delete_folder_recursive
+from app.features.storage.aplications.services.storege_services import blob_key
+
+BENCH_PREFIX = "bench-"
+LOCAL_HOSTS = {None, "", "localhost", "127.0.0.1", "::1", "db", "postgres"}
+INSERT_BATCH = 5000
+
+
+@dataclass
+class Scale:
+    depth: int = 3              # niveles de carpetas bajo la raíz del dataroom
+    fanout: int = 4             # subcarpetas por carpeta
+    files_per_folder: int = 10
+    file_sizes: list[int] = field(default_factory=lambda: [64 * 1024, 1024 * 1024])
+    distinct_blobs: int = 20    # contenidos distintos (los archivos los comparten)
+    delete_subtrees: int = 20   # subárboles descartables para delete_folder
+    delete_depth: int = 2
+
+    def folder_count(self, depth: int | None = None) -> int:
+        depth = self.depth if depth is None else depth
+        return sum(self.fanout ** level for level in range(1, depth + 1))
+
+    def as_dict(self) -> dict:
+        out = asdict(self)
+        out["folders"] = self.folder_count()
+        out["files"] = out["folders"] * self.files_per_folder
+        return out
+
+
+SCALES = {
+    "small": Scale(depth=3, fanout=4, files_per_folder=10),
+    "medium": Scale(depth=4, fanout=6, files_per_folder=20),
+    "large": Scale(depth=5, fanout=8, files_per_folder=10, distinct_blobs=50,
+                   file_sizes=[64 * 1024, 1024 * 1024, 8 * 1024 * 1024]),
+}
+
+
+@dataclass
+class Seeded:
+    dataroom_id: uuid.UUID
+    root_ids: list[uuid.UUID]        # primer nivel: rename sobre subárboles profundos
+    folder_ids: list[uuid.UUID]
+    file_ids: list[uuid.UUID]
+    delete_dataroom_id: uuid.UUID
+    delete_root_ids: list[uuid.UUID]
+
+
+def check_local_database(allow_remote: bool = False) -> None:
+    url = make_url(db.engine.url)
+    if url.host not in LOCAL_HOSTS and not allow_remote:
+        raise SystemExit(
+            f"refusing to seed {url.host!r}: the benchmark writes and deletes data. "
+            "Point DATABASE_URL at a local Postgres or pass --allow-remote.")
+
+
+def make_pdf(size: int, seed: int) -> bytes:
+    """PDF de una página, rellenado con comentarios hasta `size` bytes (contenido único por seed)."""
+    head = (b"%PDF-1.4\n"
+            b"1 0 obj<</Type/Catalog/Pages 2 0 R>>endobj\n"
+            b"2 0 obj<</Type/Pages/Kids[3 0 R]/Count 1>>endobj\n"
+            b"3 0 obj<</Type/Page/Parent 2 0 R/MediaBox[0 0 612 792]>>endobj\n")
+    tail = b"trailer<</Root 1 0 R>>\n%%EOF\n"
+    rng = random.Random(seed)
+    parts, remaining = [head], max(size - len(head) - len(tail), 0)
+    while remaining > 0:
+        line = b"%" + rng.randbytes(48).hex().encode() + b"\n"
+        parts.append(line[:remaining])
+        remaining -= len(parts[-1])
+    parts.append(tail)
+    return b"".join(parts)
+
+
+def _insert(model, rows: list[dict]) -> None:
+    for i in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(insert(model), rows[i:i + INSERT_BATCH])
+
+
+def _seed_blobs(storage, scale: Scale, run_seed: int) -> list[tuple[str, str, int]]:
+    """Escribe `distinct_blobs` PDFs en el storage; devuelve [(checksum, key, size)]."""
+    blobs = []
+    for i in range(scale.distinct_blobs):
+        size = scale.file_sizes[i % len(scale.file_sizes)]
+        data = make_pdf(size, run_seed * 100003 + i)
+        checksum = hashlib.sha256(data).hexdigest()
+        key = blob_key(checksum)
+        if storage.stat(key) is None:
+            os.makedirs(storage.staging_dir, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=storage.staging_dir, suffix=".part")
+            with os.fdopen(fd, "wb") as out:
+                out.write(data)
+            try:
+                storage.put_file(key, tmp, content_type="application/pdf")
+            finally:
+                if os.path.exists(tmp):
+                    os.remove(tmp)
+        blobs.append((checksum, key, len(data)))
+    return blobs
+
+
+def _seed_tree(dataroom_id, depth: int, fanout: int, files_per_folder: int,
+               blobs, refs: dict, roots: int | None = None):
+    """Inserta el árbol (BFS) y sus archivos; devuelve (ids_primer_nivel, ids_carpetas, ids_archivos)."""
+    folders, files = [], []
+    level = [(None, "")]
+    first_level = []
+    for d in range(1, depth + 1):
+        width = roots if (d == 1 and roots) else fanout
+        next_level = []
+        for parent_id, parent_path in level:
+            for i in range(width):
+                fid = uuid.uuid4()
+                name = f"L{d}-{i:03d}"
+                path = f"{parent_path}/{name}" if parent_path else name
+                folders.append({"id": fid, "name": name, "path": path,
+                                "dataroom_id": dataroom_id, "parent_id": parent_id})
+                next_level.append((fid, path))
+                if d == 1:
+                    first_level.append(fid)
+        level = next_level
+
+    n = 0
+    for folder in folders:
+        for j in range(files_per_folder):
+            checksum, key, size = blobs[n % len(blobs)]
+            n += 1
+            refs[checksum] = refs.get(checksum, 0) + 1
+            files.append({"id": uuid.uuid4(), "name": f"doc-{j:05d}.pdf",
+                          "original_filename": f"doc-{j:05d}.pdf",
+                          "content_type": "application/pdf", "size_bytes": size,
+                          "storage_path": key, "checksum_sha256": checksum, "version": 1,
+                          "folder_id": folder["id"], "dataroom_id": dataroom_id})
+    _insert(Folder, folders)
+    _insert(File, files)
+    return first_level, [f["id"] for f in folders], [f["id"] for f in files]
+
+
+def seed(storage, scale: Scale, run_seed: int | None = None) -> Seeded:
+    """
+    Crea dos datarooms `bench-<id>`: el principal (lecturas, uploads,
+    rename) y uno con `delete_subtrees` subárboles que el benchmark de
+    borrado va consumiendo. Los ref_count de los blobs quedan consistentes.
+    """
+    run_seed = run_seed if run_seed is not None else random.randrange(1 << 30)
+    tag = uuid.uuid4().hex[:8]
+    blobs = _seed_blobs(storage, scale, run_seed)
+    refs: dict[str, int] = {}
+
+    main_id, delete_id = uuid.uuid4(), uuid.uuid4()
+    _insert(Dataroom, [
+        {"id": main_id, "name": f"{BENCH_PREFIX}{tag}", "description": "benchmark data"},
+        {"id": delete_id, "name": f"{BENCH_PREFIX}{tag}-delete", "description": "benchmark data"},
+    ])
+    roots, folder_ids, file_ids = _seed_tree(
+        main_id, scale.depth, scale.fanout, scale.files_per_folder, blobs, refs)
+    delete_roots, _, _ = _seed_tree(
+        delete_id, scale.delete_depth, scale.fanout, scale.files_per_folder, blobs, refs,
+        roots=scale.delete_subtrees)
+
+    for checksum, key, size in blobs:
+        # el blob puede existir de una corrida anterior: se suman referencias
+        db.session.execute(
+            pg_insert(Blob)
+            .values(checksum_sha256=checksum, storage_path=key, size_bytes=size,
+                    ref_count=refs.get(checksum, 0))
+            .on_conflict_do_update(index_elements=[Blob.checksum_sha256],
+                                   set_={"ref_count": Blob.ref_count + refs.get(checksum, 0)}))
+    db.session.commit()
+    # estadísticas frescas: sin ANALYZE los planes del primer minuto no son los reales
+    for table in ("dataroom", "folder", "file", "blob"):
+        db.session.execute(text(f"ANALYZE {table}"))
+    db.session.commit()
+    return Seeded(main_id, roots, folder_ids, file_ids, delete_id, delete_roots)
+
+
+def cleanup(dataroom_names_prefix: str = BENCH_PREFIX) -> int:
+    """Borra los datarooms del benchmark (carpetas por delete_folder_recursive: libera refs de blobs)."""
+    ids = db.session.execute(
+        select(Dataroom.id).where(Dataroom.name.startswith(dataroom_names_prefix))
+    ).scalars().all()
+    for dataroom_id in ids:
+        roots = db.session.execute(
+            select(Folder.id).where(Folder.dataroom_id == dataroom_id, Folder.parent_id.is_(None))
+        ).scalars().all()
+        for folder_id in roots:
+            delete_folder_recursive(folder_id)
+        db.session.execute(delete(Dataroom).where(Dataroom.id == dataroom_id))
+        db.session.commit()
+    return len(ids)
@@ -12,6 +12,26 @@ for i in 1 2 3 4 5; do
   sleep 5
 done
 
-# Arrancar gunicorn en el puerto que Render expone en $PORT
-exec gunicorn -w ${WEB_CONCURRENCY:-2} -k gthread --threads ${THREADS:-4} \
-  -b 0.0.0.0:${PORT:-8000} manage:app
+# métricas multiproceso (gunicorn y uvicorn con varios workers): cada
+# proceso escribe en este directorio y /metrics suma todos. Se vacía en cada
+# arranque para no sumar valores de pids anteriores.
+if [ "${METRICS_ENABLED:-0}" = "1" ]; then
+  export PROMETHEUS_MULTIPROC_DIR="${PROMETHEUS_MULTIPROC_DIR:-/tmp/asvita-metrics}"
+  rm -rf "$PROMETHEUS_MULTIPROC_DIR"
+  mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+# SERVER_MODE=asgi: uvicorn con descargas/subidas async (asgi.py); el resto
+# de la API sigue siendo Flask dentro del mismo proceso
+if [ "${SERVER_MODE:-wsgi}" = "asgi" ]; then
+  if ! python -c "import a2wsgi, anyio, asyncpg, starlette, uvicorn, python_multipart" 2>/dev/null; then
+    echo "SERVER_MODE=asgi needs the packages in requirements-asgi.txt (pip install -r requirements-asgi.txt)" >&2
+    exit 1
+  fi
+  exec uvicorn asgi:app --host 0.0.0.0 --port "${PORT:-8000}" \
+    --workers "${WEB_CONCURRENCY:-2}" --proxy-headers --forwarded-allow-ips "*"
+fi
+
+# Arrancar gunicorn en el puerto que Render expone en $PORT; workers,
+# threads y el hook post_fork (pool de la DB) están en gunicorn.conf.py
+exec gunicorn -c gunicorn.conf.py manage:app
@@ -0,0 +1,55 @@
+# gunicorn.conf.py
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+worker_class = "gthread"
+# el pool de SQLAlchemy se dimensiona con estos mismos valores (app/database/db.py)
+threads = int(os.getenv("THREADS", 4))
+# con preload la app se importa una vez en el master (arranque y memoria menores)
+preload_app = os.getenv("GUNICORN_PRELOAD", "0") == "1"
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 120))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 25))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# solo el servidor web lleva DB_STATEMENT_TIMEOUT_MS (ver get_engine_options);
+# se define antes de que se importe la app
+os.environ["WEB_SERVER_PROCESS"] = "1"
+
+# métricas: cada worker escribe en este directorio y /metrics suma todos.
+# Tiene que estar en el entorno antes de que la app importe prometheus_client
+# (entrypoint.sh ya lo define; esto cubre un gunicorn lanzado a mano).
+if os.getenv("METRICS_ENABLED", "0") == "1":
+    os.environ.setdefault("PROMETHEUS_MULTIPROC_DIR", "/tmp/asvita-metrics")
+
+
+def on_starting(server):
+    # valores del arranque anterior (pids que ya no existen) fuera
+    path = os.getenv("PROMETHEUS_MULTIPROC_DIR")
+    if path:
+        shutil.rmtree(path, ignore_errors=True)
+        os.makedirs(path, exist_ok=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        try:
+            from prometheus_client import multiprocess
+        except ImportError:
+            return
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def post_fork(server, worker):
+    # con preload_app el engine se creó en el master: sus conexiones no se
+    # pueden compartir entre procesos. dispose(close=False) olvida las
+    # heredadas sin cerrarlas (el socket sigue siendo del master) y el
+    # worker abre las suyas.
+    if not server.cfg.preload_app:
+        return
+    from manage import app
+    from app.extensions import db
+    with app.app_context():
+        for engine in db.engines.values():
+            engine.dispose(close=False)
@@ -0,0 +1,32 @@
+"""content-addressed blob store
+
+Revision ID: 3f2b9c1d7e4a
+Revises: a7caa0dc5f3b
+Create Date: 2026-10-18 10:12:03.118402
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f2b9c1d7e4a'
+down_revision = 'a7caa0dc5f3b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('blob',
+    sa.Column('checksum_sha256', sa.String(length=64), nullable=False),
+    sa.Column('storage_path', sa.String(length=2048), nullable=False),
+    sa.Column('size_bytes', sa.Integer(), nullable=False),
+    sa.Column('ref_count', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('checksum_sha256')
+    )
+
+
+def downgrade():
+    op.drop_table('blob')
@@ -0,0 +1,38 @@
+"""partial indexes for soft delete (live rows / trash)
+
+Revision ID: 4e7f2a9b6d15
+Revises: c5a0d93f1b27
+Create Date: 2026-10-18 15:21:09.664210
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4e7f2a9b6d15'
+down_revision = 'c5a0d93f1b27'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.create_index('ix_file_live_folder_name', ['folder_id', 'name'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_file_trash_dataroom', ['dataroom_id', 'deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.create_index('ix_folder_live_dataroom_parent', ['dataroom_id', 'parent_id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_folder_live_dataroom_path', ['dataroom_id', 'path'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.create_index('ix_folder_trash_dataroom', ['dataroom_id', 'deleted_at'], unique=False, postgresql_where=sa.text('deleted_at IS NOT NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.drop_index('ix_folder_trash_dataroom', postgresql_where=sa.text('deleted_at IS NOT NULL'))
+        batch_op.drop_index('ix_folder_live_dataroom_path', postgresql_where=sa.text('deleted_at IS NULL'))
+        batch_op.drop_index('ix_folder_live_dataroom_parent', postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_trash_dataroom', postgresql_where=sa.text('deleted_at IS NOT NULL'))
+        batch_op.drop_index('ix_file_live_folder_name', postgresql_where=sa.text('deleted_at IS NULL'))
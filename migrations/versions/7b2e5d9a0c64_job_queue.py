@@ -0,0 +1,48 @@
+"""background job queue
+
+Revision ID: 7b2e5d9a0c64
+Revises: f6a3b18d4c52
+Create Date: 2026-10-18 19:32:08.114207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = '7b2e5d9a0c64'
+down_revision = 'f6a3b18d4c52'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('job',
+    sa.Column('type', sa.String(length=64), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('status', sa.String(length=16), server_default='queued', nullable=False),
+    sa.Column('attempts', sa.Integer(), nullable=False),
+    sa.Column('max_attempts', sa.Integer(), nullable=False),
+    sa.Column('run_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('locked_at', sa.DateTime(), nullable=True),
+    sa.Column('locked_by', sa.String(length=128), nullable=True),
+    sa.Column('last_error', sa.Text(), nullable=True),
+    sa.Column('dedupe_key', sa.String(length=255), nullable=True),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.create_index('ix_job_queued_type_run_at', ['type', 'run_at'], unique=False, postgresql_where=sa.text("status = 'queued'"))
+        batch_op.create_index('ix_job_running_type', ['type', 'locked_at'], unique=False, postgresql_where=sa.text("status = 'running'"))
+        batch_op.create_index('ix_job_active_dedupe', ['dedupe_key'], unique=True, postgresql_where=sa.text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')"))
+
+
+def downgrade():
+    with op.batch_alter_table('job', schema=None) as batch_op:
+        batch_op.drop_index('ix_job_active_dedupe', postgresql_where=sa.text("dedupe_key IS NOT NULL AND status IN ('queued', 'running')"))
+        batch_op.drop_index('ix_job_running_type', postgresql_where=sa.text("status = 'running'"))
+        batch_op.drop_index('ix_job_queued_type_run_at', postgresql_where=sa.text("status = 'queued'"))
+
+    op.drop_table('job')
@@ -0,0 +1,26 @@
+"""folder path prefix index (text_pattern_ops)
+
+Revision ID: 8d41e6a2c0b9
+Revises: 3f2b9c1d7e4a
+Create Date: 2026-10-18 11:02:47.530118
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8d41e6a2c0b9'
+down_revision = '3f2b9c1d7e4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.create_index('ix_folder_dataroom_path_pattern', ['dataroom_id', 'path'], unique=False, postgresql_ops={'path': 'text_pattern_ops'})
+
+
+def downgrade():
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.drop_index('ix_folder_dataroom_path_pattern', postgresql_ops={'path': 'text_pattern_ops'})
@@ -0,0 +1,38 @@
+"""keyset indexes for paginated listings (created_at, id)
+
+Revision ID: b91d3e5c7a20
+Revises: 4e7f2a9b6d15
+Create Date: 2026-10-18 16:40:52.118307
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b91d3e5c7a20'
+down_revision = '4e7f2a9b6d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('dataroom', schema=None) as batch_op:
+        batch_op.create_index('ix_dataroom_created', ['created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.create_index('ix_file_live_folder_created', ['folder_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.create_index('ix_folder_live_dataroom_created', ['dataroom_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('deleted_at IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.drop_index('ix_folder_live_dataroom_created', postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_live_folder_created', postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('dataroom', schema=None) as batch_op:
+        batch_op.drop_index('ix_dataroom_created')
@@ -0,0 +1,46 @@
+"""resumable upload sessions
+
+Revision ID: c5a0d93f1b27
+Revises: 8d41e6a2c0b9
+Create Date: 2026-10-18 12:20:31.904571
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5a0d93f1b27'
+down_revision = '8d41e6a2c0b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('uploadsession',
+    sa.Column('dataroom_id', sa.UUID(), nullable=False),
+    sa.Column('folder_id', sa.UUID(), nullable=False),
+    sa.Column('filename', sa.String(length=255), nullable=False),
+    sa.Column('upload_length', sa.BigInteger(), nullable=False),
+    sa.Column('staging_path', sa.String(length=2048), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['dataroom_id'], ['dataroom.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['folder_id'], ['folder.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('uploadsession', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_uploadsession_dataroom_id'), ['dataroom_id'], unique=False)
+        batch_op.create_index(batch_op.f('ix_uploadsession_expires_at'), ['expires_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_uploadsession_folder_id'), ['folder_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('uploadsession', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_uploadsession_folder_id'))
+        batch_op.drop_index(batch_op.f('ix_uploadsession_expires_at'))
+        batch_op.drop_index(batch_op.f('ix_uploadsession_dataroom_id'))
+
+    op.drop_table('uploadsession')
@@ -0,0 +1,34 @@
+"""full-text search columns on blob (tsvector + GIN)
+
+Revision ID: e2c84f6a1d93
+Revises: b91d3e5c7a20
+Create Date: 2026-10-18 17:58:31.402276
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision = 'e2c84f6a1d93'
+down_revision = 'b91d3e5c7a20'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('blob', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('text_extracted_at', sa.DateTime(), nullable=True))
+        batch_op.add_column(sa.Column('text_content', sa.Text(), nullable=True))
+        batch_op.add_column(sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+        batch_op.create_index('ix_blob_search_vector', ['search_vector'], unique=False, postgresql_using='gin')
+        batch_op.create_index('ix_blob_text_pending', ['checksum_sha256'], unique=False, postgresql_where=sa.text('text_extracted_at IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('blob', schema=None) as batch_op:
+        batch_op.drop_index('ix_blob_text_pending', postgresql_where=sa.text('text_extracted_at IS NULL'))
+        batch_op.drop_index('ix_blob_search_vector', postgresql_using='gin')
+        batch_op.drop_column('search_vector')
+        batch_op.drop_column('text_content')
+        batch_op.drop_column('text_extracted_at')
@@ -0,0 +1,36 @@
+"""pg_trgm indexes on file.name and folder.path
+
+Revision ID: f6a3b18d4c52
+Revises: e2c84f6a1d93
+Create Date: 2026-10-18 18:44:15.730941
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f6a3b18d4c52'
+down_revision = 'e2c84f6a1d93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.create_index('ix_file_live_name_trgm', ['name'], unique=False, postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.create_index('ix_folder_live_path_trgm', ['path'], unique=False, postgresql_using='gin', postgresql_ops={'path': 'gin_trgm_ops'}, postgresql_where=sa.text('deleted_at IS NULL'))
+
+
+def downgrade():
+    with op.batch_alter_table('folder', schema=None) as batch_op:
+        batch_op.drop_index('ix_folder_live_path_trgm', postgresql_using='gin', postgresql_ops={'path': 'gin_trgm_ops'}, postgresql_where=sa.text('deleted_at IS NULL'))
+
+    with op.batch_alter_table('file', schema=None) as batch_op:
+        batch_op.drop_index('ix_file_live_name_trgm', postgresql_using='gin', postgresql_ops={'name': 'gin_trgm_ops'}, postgresql_where=sa.text('deleted_at IS NULL'))
+
+    # la extensión pg_trgm se deja instalada: puede usarla otra cosa en la base
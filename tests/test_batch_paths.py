@@ -0,0 +1,39 @@
+# tests/test_batch_paths.py
+import pytest
+from app.features.storage.aplications.services.batch_services import _clean_dir
+
+
+@pytest.mark.parametrize("path, expected", [
+    ("docs", "docs"),
+    ("docs/legal", "docs/legal"),
+    ("docs/./legal/", "docs/legal"),
+    (" docs / legal ", "docs/legal"),
+])
+def test_clean_dir_keeps_relative_paths(path, expected):
+    assert _clean_dir(path.split("/")) == expected
+
+
+def test_clean_dir_root_entry_is_destination_folder():
+    # "x.pdf" en la raíz del ZIP: _items_from_zip pasa parts[:-1] == []
+    assert _clean_dir([]) == ""
+
+
+@pytest.mark.parametrize("path", [
+    "..",
+    "../etc",
+    "docs/../../etc",
+    "docs/ .. ",
+    "/etc",
+    "/etc/passwd",
+    "C:",
+    "C:/Windows",
+    "c:x",
+])
+def test_clean_dir_rejects_zip_slip(path):
+    assert _clean_dir(path.split("/")) is None
+
+
+def test_clean_dir_rejects_backslash_paths_once_normalized():
+    # _items_from_zip normaliza "\\" a "/" antes de partir la ruta
+    assert _clean_dir("..\\..\\etc".replace("\\", "/").split("/")) is None
+    assert _clean_dir("C:\\Windows".replace("\\", "/").split("/")) is None
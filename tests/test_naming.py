@@ -0,0 +1,37 @@
+# tests/test_naming.py
+from app.features.storage.aplications.services.naming import (
+    like_prefix, next_free_name, split_extension, split_first_dot,
+)
+
+
+def test_next_free_name_returns_desired_when_free():
+    assert next_free_name("a.pdf", set()) == "a.pdf"
+    assert next_free_name("a.pdf", {"b.pdf", "a (2).pdf"}) == "a.pdf"
+
+
+def test_next_free_name_picks_first_free_suffix():
+    assert next_free_name("a.pdf", {"a.pdf"}) == "a (2).pdf"
+    assert next_free_name("a.pdf", {"a.pdf", "a (2).pdf", "a (3).pdf"}) == "a (4).pdf"
+    assert next_free_name("a.pdf", {"a.pdf", "a (3).pdf"}) == "a (2).pdf"
+
+
+def test_next_free_name_files_split_on_last_dot():
+    assert split_extension("a.b.pdf") == ("a.b", ".pdf")
+    assert split_extension("README") == ("README", "")
+    assert next_free_name("a.b.pdf", {"a.b.pdf"}) == "a.b (2).pdf"
+    assert next_free_name("README", {"README"}) == "README (2)"
+
+
+def test_next_free_name_folders_split_on_first_dot():
+    assert split_first_dot("a.b.c") == ("a", ".b.c")
+    assert next_free_name("v1.2", {"v1.2"}, split_first_dot) == "v1 (2).2"
+    assert next_free_name("docs", {"docs"}, split_first_dot) == "docs (2)"
+
+
+def test_like_prefix_escapes_wildcards():
+    assert like_prefix("docs") == "docs%"
+    assert like_prefix("100%") == "100\\%%"
+    assert like_prefix("a_b") == "a\\_b%"
+    assert like_prefix("a\\b") == "a\\\\b%"
+    # el backslash se escapa antes que los comodines (no se duplica el escape)
+    assert like_prefix("\\%") == "\\\\\\%%"
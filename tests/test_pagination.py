@@ -0,0 +1,51 @@
+# tests/test_pagination.py
+from datetime import datetime
+from types import SimpleNamespace
+from uuid import UUID, uuid4
+import pytest
+from app.features.storage.aplications.services.pagination import decode_cursor, encode_cursor
+
+
+def _col(py_type):
+    # basta con col.type.python_type, que es lo único que lee decode_cursor
+    return SimpleNamespace(type=SimpleNamespace(python_type=py_type))
+
+
+def test_cursor_round_trip_restores_types():
+    created = datetime(2026, 1, 2, 3, 4, 5, 678901)
+    file_id = uuid4()
+    columns = [_col(str), _col(datetime), _col(UUID)]
+    cursor = encode_cursor("name", ["a_b.pdf", created, file_id])
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "name", columns) == ["a_b.pdf", created, file_id]
+
+
+def test_cursor_keeps_unicode_and_padding_free_lengths():
+    for name in ("", "x", "xy", "contrato ñ.pdf"):
+        cursor = encode_cursor("name", [name])
+        assert decode_cursor(cursor, "name", [_col(str)]) == [name]
+
+
+def test_cursor_rejects_other_sort():
+    cursor = encode_cursor("name", ["a"])
+    with pytest.raises(ValueError, match="sort order"):
+        decode_cursor(cursor, "-created_at", [_col(str)])
+
+
+def test_cursor_rejects_wrong_column_count():
+    cursor = encode_cursor("name", ["a", str(uuid4())])
+    with pytest.raises(ValueError, match="sort order"):
+        decode_cursor(cursor, "name", [_col(str)])
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor!", "e30", "W10", "bnVsbA"])
+def test_cursor_rejects_garbage(cursor):
+    # "e30" = "{}", "W10" = "[]", "bnVsbA" = "null"
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "name", [_col(str)])
+
+
+def test_cursor_rejects_bad_typed_values():
+    cursor = encode_cursor("name", ["not-a-uuid"])
+    with pytest.raises(ValueError):
+        decode_cursor(cursor, "name", [_col(UUID)])